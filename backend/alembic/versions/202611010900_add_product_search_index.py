@@ -0,0 +1,77 @@
+"""Add full-text search index on products"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202611010900"
+down_revision = "202411071200"
+branch_labels = None
+depends_on = None
+
+FTS_COLUMNS = "name, brand, description"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            """
+            ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('french', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('french', coalesce(brand, '')), 'B') ||
+                setweight(to_tsvector('french', coalesce(description, '')), 'C')
+            ) STORED
+            """
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)")
+    elif bind.dialect.name == "sqlite":
+        existed = sa.inspect(bind).has_table("products_fts")
+        op.execute(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                {FTS_COLUMNS},
+                content='products', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, {FTS_COLUMNS}) VALUES (new.id, new.name, new.brand, new.description);
+            END
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, {FTS_COLUMNS})
+                VALUES ('delete', old.id, old.name, old.brand, old.description);
+            END
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, {FTS_COLUMNS})
+                VALUES ('delete', old.id, old.name, old.brand, old.description);
+                INSERT INTO products_fts(rowid, {FTS_COLUMNS}) VALUES (new.id, new.name, new.brand, new.description);
+            END
+            """
+        )
+        if not existed:
+            # Index rows that were written before the FTS table existed.
+            op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_products_search_vector")
+        op.execute("ALTER TABLE products DROP COLUMN IF EXISTS search_vector")
+    elif bind.dialect.name == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS products_fts_{suffix}")
+        op.execute("DROP TABLE IF EXISTS products_fts")
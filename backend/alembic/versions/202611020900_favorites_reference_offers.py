@@ -0,0 +1,83 @@
+"""Point favorites at offers instead of products"""
+
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# revision identifiers, used by Alembic.
+revision = "202611020900"
+down_revision = "202611010900"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("favorites", sa.Column("offer_id", sa.Integer(), nullable=True))
+    # Favorited products without offers get one at the price stored on the product.
+    op.execute(
+        """
+        INSERT INTO offers (title, description, price, product_id)
+        SELECT COALESCE(products.source, products.name), products.name, products.price, products.id
+        FROM products
+        WHERE products.price IS NOT NULL
+          AND EXISTS (SELECT 1 FROM favorites WHERE favorites.product_id = products.id)
+          AND NOT EXISTS (SELECT 1 FROM offers WHERE offers.product_id = products.id)
+        """
+    )
+    # Attach existing favorites to the cheapest offer of their product.
+    op.execute(
+        """
+        UPDATE favorites SET offer_id = (
+            SELECT offers.id FROM offers
+            WHERE offers.product_id = favorites.product_id
+            ORDER BY offers.price ASC, offers.id ASC
+            LIMIT 1
+        )
+        """
+    )
+    # Favorites of products without any price cannot reference an offer: keep them aside.
+    op.create_table(
+        "favorites_without_offer",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute(
+        """
+        INSERT INTO favorites_without_offer (id, user_id, product_id, created_at)
+        SELECT id, user_id, product_id, created_at FROM favorites WHERE offer_id IS NULL
+        """
+    )
+    kept_aside = op.get_bind().execute(sa.text("SELECT COUNT(*) FROM favorites_without_offer")).scalar()
+    if kept_aside:
+        logger.warning("%s favorites reference products without price, moved to favorites_without_offer", kept_aside)
+    op.execute("DELETE FROM favorites WHERE offer_id IS NULL")
+    with op.batch_alter_table("favorites") as batch_op:
+        batch_op.alter_column("offer_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key("fk_favorites_offer_id", "offers", ["offer_id"], ["id"])
+        batch_op.create_index("ix_favorites_offer_id", ["offer_id"])
+        batch_op.drop_column("product_id")
+
+
+def downgrade() -> None:
+    op.add_column("favorites", sa.Column("product_id", sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE favorites SET product_id = (SELECT offers.product_id FROM offers WHERE offers.id = favorites.offer_id)"
+    )
+    with op.batch_alter_table("favorites") as batch_op:
+        batch_op.alter_column("product_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key("fk_favorites_product_id", "products", ["product_id"], ["id"])
+        batch_op.drop_index("ix_favorites_offer_id")
+        batch_op.drop_constraint("fk_favorites_offer_id", type_="foreignkey")
+        batch_op.drop_column("offer_id")
+    op.execute(
+        """
+        INSERT INTO favorites (id, user_id, product_id, created_at)
+        SELECT id, user_id, product_id, created_at FROM favorites_without_offer
+        """
+    )
+    op.drop_table("favorites_without_offer")
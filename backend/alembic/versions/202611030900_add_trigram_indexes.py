@@ -0,0 +1,28 @@
+"""Add pg_trgm indexes on product and gym names"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202611030900"
+down_revision = "202611020900"
+branch_labels = None
+depends_on = None
+
+TRIGRAM_COLUMNS = {"products": ("name", "brand"), "gyms": ("name", "city")}
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, columns in TRIGRAM_COLUMNS.items():
+        for column in columns:
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm ON {table} USING GIN ({column} gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, columns in TRIGRAM_COLUMNS.items():
+        for column in columns:
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_{column}_trgm")
@@ -0,0 +1,34 @@
+"""Add the append-only product price history"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202611040900"
+down_revision = "202611030900"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "price_observations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("observed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_price_observations_product_observed", "price_observations", ["product_id", "observed_at"])
+    # Start every series from the price currently stored on the product.
+    op.execute(
+        """
+        INSERT INTO price_observations (product_id, source, price)
+        SELECT id, source, price FROM products WHERE price IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_price_observations_product_observed", table_name="price_observations")
+    op.drop_table("price_observations")
@@ -0,0 +1,100 @@
+"""Link duplicate products to a canonical product"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.product_dedup_service import blocking_key, canonicalize_url
+
+# revision identifiers, used by Alembic.
+revision = "202611050900"
+down_revision = "202611040900"
+branch_labels = None
+depends_on = None
+
+
+def _canonicalize_product_urls(bind) -> None:
+    """Rewrite stored URLs to their canonical spelling, merging products that collide.
+
+    Ingestion looks products up by canonical URL: without this, re-ingesting a
+    stored URL carrying tracking parameters would create a second product. The
+    oldest product of a URL is kept; offers and price observations of the
+    others move to it.
+    """
+    groups: dict[str, list[tuple[int, str]]] = {}
+    for product_id, url in bind.execute(
+        sa.text("SELECT id, url FROM products WHERE url IS NOT NULL ORDER BY id")
+    ).all():
+        groups.setdefault(canonicalize_url(url), []).append((product_id, url))
+
+    for canonical_url, products in groups.items():
+        (kept_id, kept_url), merged = products[0], products[1:]
+        for merged_id, _url in merged:
+            for table in ("offers", "price_observations"):
+                bind.execute(
+                    sa.text(f"UPDATE {table} SET product_id = :kept WHERE product_id = :merged"),
+                    {"kept": kept_id, "merged": merged_id},
+                )
+            bind.execute(sa.text("DELETE FROM products WHERE id = :id"), {"id": merged_id})
+        if kept_url != canonical_url:
+            bind.execute(
+                sa.text("UPDATE products SET url = :url WHERE id = :id"), {"url": canonical_url, "id": kept_id}
+            )
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("products") as batch_op:
+        batch_op.add_column(sa.Column("blocking_key", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("canonical_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_products_canonical_id", "products", ["canonical_id"], ["id"], ondelete="SET NULL"
+        )
+        batch_op.create_index("ix_products_blocking_key", ["blocking_key"])
+        batch_op.create_index("ix_products_canonical_id", ["canonical_id"])
+    with op.batch_alter_table("offers") as batch_op:
+        batch_op.add_column(sa.Column("url", sa.String(), nullable=True))
+        batch_op.create_unique_constraint("uq_offers_url", ["url"])
+
+    bind = op.get_bind()
+    _canonicalize_product_urls(bind)
+
+    # Key existing products; the oldest product of each key stays canonical and
+    # the others become its offers.
+    canonical: dict[str, int] = {}
+    rows = bind.execute(sa.text("SELECT id, name, brand, price, url, source FROM products ORDER BY id")).all()
+    for product_id, name, brand, price, url, source in rows:
+        key = blocking_key(name, brand)
+        if key is None:
+            continue
+        canonical_id = canonical.setdefault(key, product_id)
+        if canonical_id == product_id:
+            canonical_id = None
+        bind.execute(
+            sa.text("UPDATE products SET blocking_key = :key, canonical_id = :canonical_id WHERE id = :id"),
+            {"key": key, "canonical_id": canonical_id, "id": product_id},
+        )
+        if canonical_id is not None and price is not None and url:
+            bind.execute(
+                sa.text(
+                    "INSERT INTO offers (title, description, price, url, product_id) "
+                    "VALUES (:title, :description, :price, :url, :product_id)"
+                ),
+                {
+                    "title": source or name,
+                    "description": name,
+                    "price": round(price, 2),
+                    "url": url,
+                    "product_id": canonical_id,
+                },
+            )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("offers") as batch_op:
+        batch_op.drop_constraint("uq_offers_url", type_="unique")
+        batch_op.drop_column("url")
+    with op.batch_alter_table("products") as batch_op:
+        batch_op.drop_index("ix_products_canonical_id")
+        batch_op.drop_index("ix_products_blocking_key")
+        batch_op.drop_constraint("fk_products_canonical_id", type_="foreignkey")
+        batch_op.drop_column("canonical_id")
+        batch_op.drop_column("blocking_key")
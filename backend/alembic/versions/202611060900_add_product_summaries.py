@@ -0,0 +1,46 @@
+"""Add the product summary projection"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202611060900"
+down_revision = "202611050900"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_summaries",
+        sa.Column(
+            "product_id", sa.Integer(), sa.ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("min_offer_price", sa.Numeric(10, 2), nullable=True),
+        sa.Column("min_offer_id", sa.Integer(), sa.ForeignKey("offers.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("offer_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("favorite_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_price_change_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    # Frozen copy of the projection at this revision; later changes to
+    # product_summary_service must not change what this migration writes.
+    op.execute(
+        """
+        INSERT INTO product_summaries
+            (product_id, min_offer_price, min_offer_id, offer_count, favorite_count, last_price_change_at)
+        SELECT
+            p.id,
+            (SELECT min(o.price) FROM offers o WHERE o.product_id = p.id),
+            (SELECT o.id FROM offers o WHERE o.product_id = p.id ORDER BY o.price, o.id LIMIT 1),
+            (SELECT count(*) FROM offers o WHERE o.product_id = p.id),
+            (SELECT count(*) FROM favorites f JOIN offers o ON f.offer_id = o.id WHERE o.product_id = p.id),
+            (SELECT max(po.observed_at) FROM price_observations po WHERE po.product_id = p.id)
+        FROM products p
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("product_summaries")
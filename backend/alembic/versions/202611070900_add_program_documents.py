@@ -0,0 +1,30 @@
+"""Add pre-encoded workout program documents"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202611070900"
+down_revision = "202611060900"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Documents are built on the first read of each program.
+    op.create_table(
+        "program_documents",
+        sa.Column(
+            "program_id",
+            sa.Integer(),
+            sa.ForeignKey("workout_programs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("body", sa.LargeBinary(), nullable=False),
+        sa.Column("built_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("program_documents")
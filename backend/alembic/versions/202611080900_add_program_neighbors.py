@@ -0,0 +1,162 @@
+"""Add the content-based program vector and neighbour tables"""
+
+import heapq
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202611080900"
+down_revision = "202611070900"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of program_recommendation_service at this revision; later changes
+# to the service must not change what this migration writes.
+FEATURE_WEIGHTS = {"goal": 3.0, "level": 2.0, "duration": 1.0, "specialty": 1.0, "exercises": 2.0}
+DURATION_BUCKETS = (4, 8, 12)
+WORD_PATTERN = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+TERM_LENGTH = 255
+PROGRAM_NEIGHBORS = int(os.environ.get("PROGRAM_NEIGHBORS", 20))
+
+
+def _normalize(value):
+    if not value:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value.strip().lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char)) or None
+
+
+def _duration_bucket(duration_weeks):
+    if not duration_weeks:
+        return None
+    for bound in DURATION_BUCKETS:
+        if duration_weeks <= bound:
+            return f"<={bound}"
+    return f">{DURATION_BUCKETS[-1]}"
+
+
+def _program_vectors(bind) -> list[dict]:
+    """Unit-length feature vector of every program, one ``program_terms`` row per term."""
+    terms: dict[int, dict[str, Counter]] = {}
+    for program_id, goal, level, duration_weeks, specialty in bind.execute(
+        sa.text(
+            "SELECT p.id, p.goal, p.level, p.duration_weeks, c.specialty "
+            "FROM workout_programs p LEFT OUTER JOIN coaches c ON p.coach_id = c.id"
+        )
+    ):
+        groups = {name: Counter() for name in FEATURE_WEIGHTS}
+        for name, value in (
+            ("goal", _normalize(goal)),
+            ("level", _normalize(level)),
+            ("duration", _duration_bucket(duration_weeks)),
+            ("specialty", _normalize(specialty)),
+        ):
+            if value:
+                groups[name][value[:TERM_LENGTH]] = 1
+        terms[program_id] = groups
+    for program_id, name in bind.execute(
+        sa.text(
+            "SELECT w.program_id, e.name FROM workout_exercises e "
+            "JOIN workout_sessions s ON e.session_id = s.id JOIN workout_weeks w ON s.week_id = w.id"
+        )
+    ):
+        if program_id in terms and name:
+            words = WORD_PATTERN.findall(_normalize(name) or "")
+            terms[program_id]["exercises"].update(word[:TERM_LENGTH] for word in words)
+
+    rows: list[dict] = []
+    for program_id, groups in terms.items():
+        weights: dict[tuple[str, str], float] = {}
+        for group, counts in groups.items():
+            norm = math.sqrt(sum(count * count for count in counts.values()))
+            for term, count in counts.items():
+                weights[(group, term)] = count / norm * math.sqrt(FEATURE_WEIGHTS[group])
+        total = math.sqrt(sum(weight * weight for weight in weights.values()))
+        rows.extend(
+            {"program_id": program_id, "feature": group, "term": term, "weight": weight / total}
+            for (group, term), weight in weights.items()
+        )
+    return rows
+
+
+def _backfill(bind) -> None:
+    vectors = _program_vectors(bind)
+    if not vectors:
+        return
+    bind.execute(
+        sa.text(
+            "INSERT INTO program_terms (program_id, feature, term, weight) "
+            "VALUES (:program_id, :feature, :term, :weight)"
+        ),
+        vectors,
+    )
+    similarities: dict[int, dict[int, float]] = {}
+    for program_id, other_id, score in bind.execute(
+        sa.text(
+            "SELECT own.program_id, other.program_id, sum(own.weight * other.weight) "
+            "FROM program_terms own JOIN program_terms other "
+            "ON own.feature = other.feature AND own.term = other.term "
+            "WHERE own.program_id <> other.program_id "
+            "GROUP BY own.program_id, other.program_id"
+        )
+    ):
+        if score > 0:
+            similarities.setdefault(program_id, {})[other_id] = score
+    rows = [
+        {"program_id": program_id, "neighbor_id": neighbor_id, "score": score}
+        for program_id, scores in similarities.items()
+        for neighbor_id, score in heapq.nlargest(PROGRAM_NEIGHBORS, scores.items(), key=lambda item: item[1])
+    ]
+    if rows:
+        bind.execute(
+            sa.text(
+                "INSERT INTO program_neighbors (program_id, neighbor_id, score) "
+                "VALUES (:program_id, :neighbor_id, :score)"
+            ),
+            rows,
+        )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "program_terms",
+        sa.Column(
+            "program_id",
+            sa.Integer(),
+            sa.ForeignKey("workout_programs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("feature", sa.String(length=20), primary_key=True),
+        sa.Column("term", sa.String(length=255), primary_key=True),
+        sa.Column("weight", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_program_terms_feature_term", "program_terms", ["feature", "term"])
+    op.create_table(
+        "program_neighbors",
+        sa.Column(
+            "program_id",
+            sa.Integer(),
+            sa.ForeignKey("workout_programs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "neighbor_id",
+            sa.Integer(),
+            sa.ForeignKey("workout_programs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("score", sa.Float(), nullable=False),
+    )
+    _backfill(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_table("program_neighbors")
+    op.drop_index("ix_program_terms_feature_term", table_name="program_terms")
+    op.drop_table("program_terms")
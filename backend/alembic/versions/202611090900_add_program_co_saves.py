@@ -0,0 +1,68 @@
+"""Add saved-together counts of workout programs"""
+
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "202611090900"
+down_revision = "202611080900"
+branch_labels = None
+depends_on = None
+
+
+def _backfill(bind) -> None:
+    """Count the users who saved each pair of programs, in both directions, with the
+    cosine score ``count / sqrt(saves(a) * saves(b))``.
+
+    Frozen copy of ``rebuild_co_saves`` at this revision.
+    """
+    saves = dict(
+        bind.execute(sa.text("SELECT program_id, count(*) FROM favorite_programs GROUP BY program_id")).all()
+    )
+    pairs = bind.execute(
+        sa.text(
+            "SELECT a.program_id, b.program_id, count(*) FROM favorite_programs a "
+            "JOIN favorite_programs b ON a.user_id = b.user_id AND a.program_id <> b.program_id "
+            "GROUP BY a.program_id, b.program_id"
+        )
+    ).all()
+    if pairs:
+        bind.execute(
+            sa.text(
+                "INSERT INTO program_co_saves (program_id, other_id, count, score) "
+                "VALUES (:program_id, :other_id, :count, :score)"
+            ),
+            [
+                {"program_id": a, "other_id": b, "count": count, "score": count / math.sqrt(saves[a] * saves[b])}
+                for a, b, count in pairs
+            ],
+        )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "program_co_saves",
+        sa.Column(
+            "program_id",
+            sa.Integer(),
+            sa.ForeignKey("workout_programs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "other_id",
+            sa.Integer(),
+            sa.ForeignKey("workout_programs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_program_co_saves_program_score", "program_co_saves", ["program_id", "score"])
+    _backfill(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_index("ix_program_co_saves_program_score", table_name="program_co_saves")
+    op.drop_table("program_co_saves")
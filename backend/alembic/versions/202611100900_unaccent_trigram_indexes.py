@@ -0,0 +1,43 @@
+"""Build the pg_trgm indexes on unaccented product and gym names"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202611100900"
+down_revision = "202611090900"
+branch_labels = None
+depends_on = None
+
+TRIGRAM_COLUMNS = {"products": ("name", "brand"), "gyms": ("name", "city")}
+
+
+def _rebuild_indexes(expression: str) -> None:
+    for table, columns in TRIGRAM_COLUMNS.items():
+        for column in columns:
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_{column}_trgm")
+            op.execute(
+                f"CREATE INDEX ix_{table}_{column}_trgm ON {table} "
+                f"USING GIN ({expression.format(column=column)} gin_trgm_ops)"
+            )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() is only STABLE; the indexes need an IMMUTABLE wrapper.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """
+    )
+    _rebuild_indexes("immutable_unaccent({column})")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _rebuild_indexes("{column}")
+    op.execute("DROP FUNCTION IF EXISTS immutable_unaccent(text)")
@@ -0,0 +1,50 @@
+"""Ignore accents in the PostgreSQL product full-text index"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "202611110900"
+down_revision = "202611100900"
+branch_labels = None
+depends_on = None
+
+
+def _rebuild_search_vector(config: str) -> None:
+    op.execute("DROP INDEX IF EXISTS ix_products_search_vector")
+    op.execute("ALTER TABLE products DROP COLUMN IF EXISTS search_vector")
+    op.execute(
+        f"""
+        ALTER TABLE products ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('{config}', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('{config}', coalesce(brand, '')), 'B') ||
+            setweight(to_tsvector('{config}', coalesce(description, '')), 'C')
+        ) STORED
+        """
+    )
+    op.execute("CREATE INDEX ix_products_search_vector ON products USING GIN (search_vector)")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute(
+        """
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'french_unaccent') THEN
+                CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+                ALTER TEXT SEARCH CONFIGURATION french_unaccent
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+            END IF;
+        END $$
+        """
+    )
+    _rebuild_search_vector("french_unaccent")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _rebuild_search_vector("french")
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS french_unaccent")
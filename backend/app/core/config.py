@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Literal
 from pydantic_settings import BaseSettings
 from pydantic import Field, field_validator
 
@@ -14,6 +14,43 @@ class Settings(BaseSettings):
     serpapi_key: str | None = Field(default=None, alias="SERPAPI_KEY")
     dev_seed: bool = Field(default=False, alias="DEV_SEED")
 
+    http_max_connections: int = Field(default=100, alias="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive_connections: int = Field(default=20, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    http_max_connections_per_host: int = Field(default=10, alias="HTTP_MAX_CONNECTIONS_PER_HOST")
+    http_keepalive_seconds: float = Field(default=30.0, alias="HTTP_KEEPALIVE_SECONDS")
+    http2: bool = Field(default=False, alias="HTTP2")
+
+    scrape_rate_per_host: float = Field(default=2.0, alias="SCRAPE_RATE_PER_HOST")
+    scrape_burst_per_host: int = Field(default=4, alias="SCRAPE_BURST_PER_HOST")
+    scrape_concurrency_per_host: int = Field(default=4, alias="SCRAPE_CONCURRENCY_PER_HOST")
+    scrape_host_rates: dict[str, float] = Field(default_factory=dict, alias="SCRAPE_HOST_RATES")
+    scrape_max_concurrency: int = Field(default=50, alias="SCRAPE_MAX_CONCURRENCY")
+    scrape_max_retries: int = Field(default=2, alias="SCRAPE_MAX_RETRIES")
+    scrape_max_retry_after_seconds: float = Field(default=60.0, alias="SCRAPE_MAX_RETRY_AFTER_SECONDS")
+
+    html_parser: Literal["lxml", "selectolax", "html.parser"] = Field(default="lxml", alias="HTML_PARSER")
+    parse_executor: Literal["process", "thread", "inline"] = Field(default="process", alias="PARSE_EXECUTOR")
+    parse_workers: int = Field(default=2, alias="PARSE_WORKERS")
+    parse_inline_max_bytes: int = Field(default=64 * 1024, alias="PARSE_INLINE_MAX_BYTES")
+    program_neighbors: int = Field(default=20, alias="PROGRAM_NEIGHBORS")
+
+    local_cache_max_entries: int = Field(default=2048, alias="LOCAL_CACHE_MAX_ENTRIES")
+    local_cache_max_bytes: int = Field(default=32 * 1024 * 1024, alias="LOCAL_CACHE_MAX_BYTES")
+    local_cache_ttl_seconds: float = Field(default=30.0, alias="LOCAL_CACHE_TTL_SECONDS")
+
+    count_mode: Literal["exact", "estimated", "capped", "cached"] = Field(default="exact", alias="COUNT_MODE")
+    count_cap: int = Field(default=10_000, alias="COUNT_CAP")
+    count_cache_seconds: int = Field(default=300, alias="COUNT_CACHE_SECONDS")
+
+    facet_cache_seconds: int = Field(default=600, alias="FACET_CACHE_SECONDS")
+    trigram_similarity_threshold: float = Field(default=0.3, alias="TRIGRAM_SIMILARITY_THRESHOLD")
+    serpapi_cache_soft_seconds: int = Field(default=900, alias="SERPAPI_CACHE_SOFT_SECONDS")
+    serpapi_cache_hard_seconds: int = Field(default=86_400, alias="SERPAPI_CACHE_HARD_SECONDS")
+    bulk_scrape_parallelism: int = Field(default=8, alias="BULK_SCRAPE_PARALLELISM")
+    bulk_upsert_chunk_size: int = Field(default=50, alias="BULK_UPSERT_CHUNK_SIZE")
+    job_ttl_seconds: int = Field(default=86_400, alias="JOB_TTL_SECONDS")
+    search_miss_cache_seconds: int = Field(default=900, alias="SEARCH_MISS_CACHE_SECONDS")
+
     @field_validator("backend_cors_origins", mode="before")
     @classmethod
     def assemble_cors_origins(cls, value):
@@ -11,8 +11,14 @@ from app.models.exercise import Exercise
 from app.models.favorite import Favorite
 from app.models.gym import Gym
 from app.models.offer import Offer
+from app.models.price_observation import PriceObservation
 from app.models.product import Product
+from app.models.product_summary import ProductSummary
 from app.models.program import Program
+from app.models.program_co_save import ProgramCoSave
+from app.models.program_document import ProgramDocument
+from app.models.program_neighbor import ProgramNeighbor
+from app.models.program_term import ProgramTerm
 from app.models.training import (
     Coach,
     FavoriteProgram,
@@ -23,6 +29,21 @@ from app.models.training import (
 )
 from app.models.user import User
 
+# Register dialect-specific DDL hooks (full-text index, ...)
+from app.db import search_index  # noqa: F401
+
+# Keep the product summary projection in sync with every flush
+from app.services import product_summary_service  # noqa: F401
+
+# Drop pre-encoded program documents when their programs change
+from app.services import program_document_service  # noqa: F401
+
+# Re-rank similar programs when programs change
+from app.services import program_recommendation_service  # noqa: F401
+
+# Update saved-together counts when favorites change
+from app.services import program_co_save_service  # noqa: F401
+
 __all__ = [
     "Base",
     "Coach",
@@ -31,8 +52,14 @@ __all__ = [
     "FavoriteProgram",
     "Gym",
     "Offer",
+    "PriceObservation",
     "Product",
+    "ProductSummary",
     "Program",
+    "ProgramCoSave",
+    "ProgramDocument",
+    "ProgramNeighbor",
+    "ProgramTerm",
     "User",
     "WorkoutExercise",
     "WorkoutProgram",
@@ -0,0 +1,10 @@
+"""Helpers reading the pending changes of ORM instances inside flush hooks."""
+from __future__ import annotations
+
+from sqlalchemy import inspect
+
+
+def history_values(instance: object, attribute: str) -> set:
+    """Old and new non-null values of ``attribute`` (e.g. both products of a moved offer)."""
+    history = inspect(instance).attrs[attribute].history
+    return {value for value in (*history.added, *history.unchanged, *history.deleted) if value is not None}
@@ -0,0 +1,151 @@
+"""Search index DDL for the product catalog and gyms.
+
+PostgreSQL gets a generated ``tsvector`` column backed by a GIN index, SQLite
+gets an external-content FTS5 table kept in sync by triggers. Both ignore
+accents: the ``french_unaccent`` text search configuration runs ``unaccent``
+before the French stemmer, like FTS5's ``remove_diacritics``. Both are
+maintained by the database itself, so every writer (``ingest_product``, seeds,
+admin scripts) keeps the index current without extra bookkeeping.
+
+On PostgreSQL, ``pg_trgm`` GIN indexes additionally serve typo-tolerant
+similarity lookups on product and gym names. They are built on
+``immutable_unaccent(column)`` so accents are ignored like in the in-process
+index of ``app.services.trigram_service`` that SQLite relies on.
+"""
+from __future__ import annotations
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.models.gym import Gym
+from app.models.product import Product
+
+TEXT_SEARCH_CONFIG = "french_unaccent"
+FTS_TABLE = "products_fts"
+
+POSTGRES_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"""
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{TEXT_SEARCH_CONFIG}') THEN
+            CREATE TEXT SEARCH CONFIGURATION {TEXT_SEARCH_CONFIG} (COPY = french);
+            ALTER TEXT SEARCH CONFIGURATION {TEXT_SEARCH_CONFIG}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+        END IF;
+    END $$
+    """,
+    f"""
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(brand, '')), 'B') ||
+        setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+]
+
+SQLITE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, brand, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, brand, description)
+        VALUES (new.id, new.name, new.brand, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, brand, description)
+        VALUES ('delete', old.id, old.name, old.brand, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, brand, description)
+        VALUES ('delete', old.id, old.name, old.brand, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, brand, description)
+        VALUES (new.id, new.name, new.brand, new.description);
+    END
+    """,
+]
+
+
+# unaccent() is only STABLE (its dictionary can change); indexes need an
+# IMMUTABLE wrapper pinned to the default dictionary.
+UNACCENT_FUNCTION = "immutable_unaccent"
+UNACCENT_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"""
+    CREATE OR REPLACE FUNCTION {UNACCENT_FUNCTION}(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+]
+
+TRIGRAM_COLUMNS: dict[str, tuple[str, ...]] = {
+    "products": ("name", "brand"),
+    "gyms": ("name", "city"),
+}
+
+
+def install_unaccent(connection: Connection) -> None:
+    """Create the ``immutable_unaccent`` function on PostgreSQL (idempotent)."""
+    if connection.dialect.name != "postgresql":
+        return
+    for statement in UNACCENT_STATEMENTS:
+        connection.execute(text(statement))
+
+
+def install_trigram_indexes(connection: Connection, table: str) -> None:
+    """Create ``pg_trgm`` GIN indexes for ``table`` on PostgreSQL (idempotent)."""
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    install_unaccent(connection)
+    for column in TRIGRAM_COLUMNS[table]:
+        connection.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm "
+                f"ON {table} USING GIN ({UNACCENT_FUNCTION}({column}) gin_trgm_ops)"
+            )
+        )
+
+
+def install_search_index(connection: Connection) -> None:
+    """Create the full-text structures for the current dialect (idempotent)."""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for statement in POSTGRES_STATEMENTS:
+            connection.execute(text(statement))
+    elif dialect == "sqlite":
+        existed = inspect(connection).has_table(FTS_TABLE)
+        for statement in SQLITE_STATEMENTS:
+            connection.execute(text(statement))
+        if not existed:
+            # Index rows that were written before the FTS table existed.
+            connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Install the full-text and trigram indexes on an existing database."""
+    with engine.begin() as connection:
+        install_search_index(connection)
+        for table in TRIGRAM_COLUMNS:
+            install_trigram_indexes(connection, table)
+
+
+@event.listens_for(Product.__table__, "after_create")
+def _create_search_index(target, connection: Connection, **kwargs) -> None:
+    install_search_index(connection)
+    install_trigram_indexes(connection, "products")
+
+
+@event.listens_for(Gym.__table__, "after_create")
+def _create_gym_search_index(target, connection: Connection, **kwargs) -> None:
+    install_trigram_indexes(connection, "gyms")
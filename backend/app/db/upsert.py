@@ -0,0 +1,12 @@
+"""Dialect-specific ``INSERT`` constructs supporting ``ON CONFLICT``."""
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+
+def upsert_insert(connection: Connection) -> Callable[[Any], Any]:
+    """Return the ``insert`` of the connection's dialect (PostgreSQL or SQLite)."""
+    return postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
@@ -1,19 +1,28 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import redis.asyncio as redis
 
 from app.core.config import settings
 from app.db.base import Base  # noqa: F401  Ensures models are imported for metadata
+from app.db.search_index import ensure_search_index
 from app.db.session import SessionLocal, engine
 from app.routes import (
     auth_routes,
     compare_routes,
     favorite_routes,
     gym_routes,
+    job_routes,
     product_routes,
     program_routes,
     training_routes,
 )
+from app.services.cache_service import listen_for_invalidations
+from app.services.http_client import close_http_client, start_http_client
+from app.services.job_service import cancel_jobs
+from app.services.parse_pool import shutdown_parse_pool
+from app.services.response_cache import invalidate_route_cache
 from app.services.training_seed import seed_training_data
 
 app = FastAPI(title=settings.project_name)
@@ -31,17 +40,28 @@ app.add_middleware(
 async def startup_event() -> None:
     """Initialize external connections when the application starts."""
     Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
     with SessionLocal() as db:
         seed_training_data(db)
     app.state.redis = redis.from_url(settings.redis_url, decode_responses=True)
+    app.state.cache_listener = asyncio.create_task(listen_for_invalidations(app.state.redis))
+    app.state.http_client = await start_http_client()
+    # Seeds may have written programs and coaches behind cached responses.
+    await invalidate_route_cache(app.state.redis, "programs")
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
     """Gracefully close external connections when the application stops."""
+    await cancel_jobs()
+    cache_listener = getattr(app.state, "cache_listener", None)
+    if cache_listener:
+        cache_listener.cancel()
     redis_client = getattr(app.state, "redis", None)
     if redis_client:
         await redis_client.aclose()
+    await close_http_client()
+    shutdown_parse_pool()
 
 
 def include_router_if_available(module) -> None:
@@ -59,6 +79,7 @@ auth_modules = [
     gym_routes,
     program_routes,
     training_routes,
+    job_routes,
 ]
 
 for module in auth_modules:
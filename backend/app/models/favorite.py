@@ -11,8 +11,8 @@ class Favorite(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    offer_id = Column(Integer, ForeignKey("offers.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     user = relationship("User", back_populates="favorites")
-    product = relationship("Product", back_populates="favorites")
+    offer = relationship("Offer", back_populates="favorites")
@@ -13,6 +13,7 @@ class Offer(Base):
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     price = Column(Numeric(10, 2), nullable=False)
+    url = Column(String, unique=True, nullable=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     gym_id = Column(Integer, ForeignKey("gyms.id"), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -21,3 +22,4 @@ class Offer(Base):
     product = relationship("Product", back_populates="offers")
     gym = relationship("Gym", back_populates="offers")
     creator = relationship("User", back_populates="offers")
+    favorites = relationship("Favorite", back_populates="offer", cascade="all, delete-orphan")
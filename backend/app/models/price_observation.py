@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, func
+
+from app.db.session import Base
+
+
+class PriceObservation(Base):
+    """One price seen for a product; rows are only appended when the price changes."""
+
+    __tablename__ = "price_observations"
+    __table_args__ = (Index("ix_price_observations_product_observed", "product_id", "observed_at"),)
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    source = Column(String, nullable=True)
+    observed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    price = Column(Float, nullable=False)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import JSON, Column, DateTime, Float, Integer, Numeric, String, Text, func
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer, Numeric, String, Text, func
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
@@ -20,7 +20,12 @@ class Product(Base):
     images = Column(JSON, nullable=True)
     url = Column(String, unique=True, nullable=True)
     source = Column(String, nullable=True)
+    # Cross-source de-duplication (see app.services.product_dedup_service).
+    blocking_key = Column(String, nullable=True, index=True)
+    canonical_id = Column(Integer, ForeignKey("products.id", ondelete="SET NULL"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     offers = relationship("Offer", back_populates="product", cascade="all, delete-orphan")
-    favorites = relationship("Favorite", back_populates="product", cascade="all, delete-orphan")
+    price_observations = relationship("PriceObservation", cascade="all, delete-orphan", passive_deletes=True)
+    # Read-only projection maintained in SQL; loaded with the product in the same query.
+    summary = relationship("ProductSummary", uselist=False, lazy="joined", viewonly=True)
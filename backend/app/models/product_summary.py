@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric, func
+
+from app.db.session import Base
+
+
+class ProductSummary(Base):
+    """Offer and favorite aggregates of a product, kept current by
+    ``app.services.product_summary_service`` whenever offers, favorites or
+    price observations are flushed."""
+
+    __tablename__ = "product_summaries"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    min_offer_price = Column(Numeric(10, 2), nullable=True)
+    min_offer_id = Column(Integer, ForeignKey("offers.id", ondelete="SET NULL"), nullable=True)
+    offer_count = Column(Integer, nullable=False, default=0)
+    favorite_count = Column(Integer, nullable=False, default=0)
+    last_price_change_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
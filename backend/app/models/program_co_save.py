@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer
+
+from app.db.session import Base
+
+
+class ProgramCoSave(Base):
+    """Number of users who saved both programs and its cosine score, stored in
+    both directions and kept current by ``app.services.program_co_save_service``."""
+
+    __tablename__ = "program_co_saves"
+    __table_args__ = (Index("ix_program_co_saves_program_score", "program_id", "score"),)
+
+    program_id = Column(Integer, ForeignKey("workout_programs.id", ondelete="CASCADE"), primary_key=True)
+    other_id = Column(Integer, ForeignKey("workout_programs.id", ondelete="CASCADE"), primary_key=True)
+    count = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
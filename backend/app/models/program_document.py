@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, func
+
+from app.db.session import Base
+
+
+class ProgramDocument(Base):
+    """Pre-encoded ``WorkoutProgramDetail`` JSON of a workout program, dropped by
+    ``app.services.program_document_service`` whenever the program, its coach,
+    weeks, sessions or exercises are flushed."""
+
+    __tablename__ = "program_documents"
+
+    program_id = Column(Integer, ForeignKey("workout_programs.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    built_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Float, ForeignKey, Integer
+
+from app.db.session import Base
+
+
+class ProgramNeighbor(Base):
+    """One of the ``PROGRAM_NEIGHBORS`` most similar programs of a workout
+    program, kept current by ``app.services.program_recommendation_service``."""
+
+    __tablename__ = "program_neighbors"
+
+    program_id = Column(Integer, ForeignKey("workout_programs.id", ondelete="CASCADE"), primary_key=True)
+    neighbor_id = Column(Integer, ForeignKey("workout_programs.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
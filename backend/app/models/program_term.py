@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String
+
+from app.db.session import Base
+
+
+class ProgramTerm(Base):
+    """One weighted component of a workout program's unit-length feature vector,
+    kept current by ``app.services.program_recommendation_service``."""
+
+    __tablename__ = "program_terms"
+    __table_args__ = (Index("ix_program_terms_feature_term", "feature", "term"),)
+
+    program_id = Column(Integer, ForeignKey("workout_programs.id", ondelete="CASCADE"), primary_key=True)
+    feature = Column(String(20), primary_key=True)
+    term = Column(String(255), primary_key=True)
+    weight = Column(Float, nullable=False)
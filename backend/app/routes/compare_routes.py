@@ -1,18 +1,23 @@
 from typing import Any, List
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from app.db.session import get_db
 from app.models.product import Product
 from app.schemas.offer import OfferRead
 from app.schemas.product import ProductRead
 from app.services.cache_service import get_cache, set_cache
+from app.services.product_dedup_service import resolve_canonical_ids
+from app.services.response_cache import CachedRoute, RouteCache
 from app.services import serpapi_service
 
 router = APIRouter(tags=["comparison"])
 
+comparison_cache = RouteCache("products", expire_seconds=300)
+
 
 class CompareRequest(BaseModel):
     query: str = Field(..., description="Search term for the product to compare")
@@ -43,7 +48,7 @@ async def compare_products(payload: CompareRequest, redis=Depends(get_redis_clie
         return cached
 
     try:
-        result = await serpapi_service.search_product(payload.query)
+        result = await serpapi_service.search_product(payload.query, redis=redis)
     except serpapi_service.SerpApiError as exc:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
 
@@ -51,20 +56,11 @@ async def compare_products(payload: CompareRequest, redis=Depends(get_redis_clie
     return result
 
 
-@router.get("/comparison", response_model=ComparisonResponse)
-def get_comparison(
-    *, ids: str = Query(..., description="Comma-separated product IDs"), db: Session = Depends(get_db)
-) -> ComparisonResponse:
-    """Retrieve comparison data for provided product IDs."""
-    try:
-        product_ids = [int(item) for item in ids.split(",") if item]
-    except ValueError as exc:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be integers") from exc
-
-    if not product_ids:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No product ids provided")
-
-    products = db.query(Product).filter(Product.id.in_(product_ids)).all()
+def _comparisons(db: Session, product_ids: List[int]) -> List[ProductComparison]:
+    # Duplicates from other sources are compared through their canonical product.
+    canonical_ids = resolve_canonical_ids(db, product_ids)
+    product_ids = list(dict.fromkeys(canonical_ids[product_id] for product_id in product_ids if product_id in canonical_ids))
+    products = db.query(Product).options(selectinload(Product.offers)).filter(Product.id.in_(product_ids)).all()
     product_map = {product.id: product for product in products}
 
     comparisons: List[ProductComparison] = []
@@ -78,7 +74,32 @@ def get_comparison(
         )
         comparisons.append(comparison)
 
+    return comparisons
+
+
+@router.get("/comparison", response_model=ComparisonResponse)
+async def get_comparison(
+    *,
+    ids: str = Query(..., description="Comma-separated product IDs"),
+    db: Session = Depends(get_db),
+    cache: CachedRoute = Depends(comparison_cache),
+) -> ComparisonResponse:
+    """Retrieve comparison data for provided product IDs."""
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+
+    try:
+        product_ids = [int(item) for item in ids.split(",") if item]
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be integers") from exc
+
+    if not product_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No product ids provided")
+
+    comparisons = await run_in_threadpool(_comparisons, db, product_ids)
+
     if not comparisons:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No matching products found")
 
-    return ComparisonResponse(products=comparisons)
+    return await cache.set(ComparisonResponse(products=comparisons))
@@ -1,22 +1,31 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, joinedload
 
 from app.auth.auth import get_current_user
 from app.db.session import get_db
 from app.models.favorite import Favorite
 from app.models.offer import Offer
 from app.models.product import Product
+from app.models.product_summary import ProductSummary
 from app.models.user import User
 from app.schemas.offer import OfferRead
 from app.schemas.product import ProductRead
+from app.services.pagination import cursor_param, paginate
+from app.services.product_dedup_service import resolve_canonical_ids
+from app.services.response_cache import invalidate_route_cache
 
 router = APIRouter(prefix="/favorites", tags=["favorites"])
 
 
+async def get_redis_client(request: Request):
+    return getattr(request.app.state, "redis", None)
+
+
 class FavoriteWithProduct(BaseModel):
     id: int
     created_at: datetime
@@ -28,10 +37,11 @@ class FavoriteWithProduct(BaseModel):
 
 
 def _get_offer_for_product(db: Session, product_id: int) -> Offer:
+    # The cheapest offer is precomputed in the product summary.
     offer = (
         db.query(Offer)
-        .filter(Offer.product_id == product_id)
-        .order_by(Offer.price.asc())
+        .join(ProductSummary, ProductSummary.min_offer_id == Offer.id)
+        .filter(ProductSummary.product_id == product_id)
         .first()
     )
     if not offer:
@@ -52,43 +62,36 @@ def _favorite_to_response(favorite: Favorite) -> FavoriteWithProduct:
     )
 
 
-@router.post("/{product_id}", response_model=FavoriteWithProduct, status_code=status.HTTP_201_CREATED)
-def add_favorite(
-    product_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> FavoriteWithProduct:
+def _add_favorite(db: Session, user_id: int, product_id: int) -> tuple[FavoriteWithProduct, bool]:
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    # Offers of a duplicate listing live on its canonical product.
+    product_id = product.canonical_id or product.id
 
     existing_favorite = (
         db.query(Favorite)
         .join(Offer)
-        .filter(Favorite.user_id == current_user.id, Offer.product_id == product_id)
+        .filter(Favorite.user_id == user_id, Offer.product_id == product_id)
         .first()
     )
     if existing_favorite:
-        return _favorite_to_response(existing_favorite)
+        return _favorite_to_response(existing_favorite), False
 
     offer = _get_offer_for_product(db, product_id)
-    favorite = Favorite(user_id=current_user.id, offer_id=offer.id)
+    favorite = Favorite(user_id=user_id, offer_id=offer.id)
     db.add(favorite)
     db.commit()
     db.refresh(favorite)
-    return _favorite_to_response(favorite)
+    return _favorite_to_response(favorite), True
 
 
-@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_favorite(
-    product_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> None:
+def _remove_favorite(db: Session, user_id: int, product_id: int) -> None:
+    product_id = resolve_canonical_ids(db, [product_id]).get(product_id, product_id)
     favorite = (
         db.query(Favorite)
         .join(Offer)
-        .filter(Favorite.user_id == current_user.id, Offer.product_id == product_id)
+        .filter(Favorite.user_id == user_id, Offer.product_id == product_id)
         .first()
     )
     if not favorite:
@@ -98,17 +101,63 @@ def remove_favorite(
     db.commit()
 
 
+@router.post("/{product_id}", response_model=FavoriteWithProduct, status_code=status.HTTP_201_CREATED)
+async def add_favorite(
+    product_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    redis=Depends(get_redis_client),
+) -> FavoriteWithProduct:
+    favorite, created = await run_in_threadpool(_add_favorite, db, current_user.id, product_id)
+    if created:
+        # Cached product payloads carry the favorite count of their summary.
+        await invalidate_route_cache(redis, "products")
+    return favorite
+
+
+@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_favorite(
+    product_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    redis=Depends(get_redis_client),
+) -> None:
+    await run_in_threadpool(_remove_favorite, db, current_user.id, product_id)
+    await invalidate_route_cache(redis, "products")
+
+
 @router.get("", response_model=List[FavoriteWithProduct])
 def list_favorites(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    limit: Optional[int] = Query(
+        None, ge=1, le=100, description="Taille de page ; sans valeur, tous les favoris sont renvoyés"
+    ),
+    cursor_id: Optional[int] = Depends(cursor_param),
 ) -> List[FavoriteWithProduct]:
-    favorites = (
+    """List the user's favorites, newest first.
+
+    When ``limit`` or ``cursor`` is given the list is paginated by keyset and the
+    cursor of the following page is returned in the ``X-Next-Cursor`` header.
+    """
+    query = (
         db.query(Favorite)
-        .join(Offer)
+        .join(Favorite.offer)
+        .options(contains_eager(Favorite.offer).joinedload(Offer.product))
         .filter(Favorite.user_id == current_user.id)
-        .order_by(Favorite.created_at.desc())
-        .all()
     )
 
+    if limit is None and cursor_id is None:
+        favorites = query.order_by(Favorite.created_at.desc(), Favorite.id.desc()).all()
+    else:
+        favorites, next_cursor = paginate(
+            query,
+            key_column=Favorite.id,
+            page_size=limit or 20,
+            cursor_id=cursor_id,
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+
     return [_favorite_to_response(favorite) for favorite in favorites]
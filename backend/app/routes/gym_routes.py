@@ -3,23 +3,35 @@ from typing import List, Optional
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
-from app.db.session import get_db
+from app.db.session import get_db, get_session_factory
 from app.models.gym import Gym
+from app.models.offer import Offer
+from app.models.program import Program
+from app.schemas.facet import GymFacets
 from app.schemas.gym import GymRead, GymReadWithRelations
-from app.services.gym_logo_service import get_gym_logo
+from app.schemas.job import JobAccepted
+from app.services.count_service import CountMode, count_query
+from app.services.facet_service import cached_facets, gym_facets
+from app.services.pagination import cursor_param, paginate
+from app.services.response_cache import CachedRoute, RouteCache
+from app.services.trigram_service import DEFAULT_LIMIT as FUZZY_LIMIT, fuzzy_match
 from app.services.gym_scraper_service import (
     scrape_and_persist_all_gyms,
+    sync_all_gyms,
     update_or_create_gym_from_scraping,
 )
-from app.scrapers import sync_all
+from app.services.job_service import ProgressReporter, job_accepted, start_job
 
 router = APIRouter(prefix="/gyms", tags=["gyms"])
 logger = logging.getLogger(__name__)
 
+gym_cache = RouteCache("gyms", expire_seconds=600)
+
 
 async def get_redis_client(request: Request):
     return getattr(request.app.state, "redis", None)
@@ -28,8 +40,18 @@ async def get_redis_client(request: Request):
 class PaginatedGymsResponse(BaseModel):
     items: List[GymRead]
     total: int
+    total_mode: CountMode = Field("exact", description="Stratégie ayant produit `total`")
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+
+
+def _with_relation_ids(query):
+    """Load offer and program ids of the gyms alongside them (one query per relation)."""
+    return query.options(
+        selectinload(Gym.offers).load_only(Offer.id, Offer.gym_id),
+        selectinload(Gym.programs).load_only(Program.id, Program.gym_id),
+    )
 
 
 def _gym_to_response(gym: Gym) -> GymReadWithRelations:
@@ -61,56 +83,125 @@ def _gym_to_response(gym: Gym) -> GymReadWithRelations:
     )
 
 
+def _fuzzy_gyms(db: Session, query, search: str) -> tuple[List[Gym], bool]:
+    """Filtered gyms similar to ``search``, best first, and whether more than ``FUZZY_LIMIT`` matched."""
+    scores = dict(fuzzy_match(db, Gym, ("name", "city"), search, query=query, limit=FUZZY_LIMIT + 1))
+    if not scores:
+        return [], False
+    gyms = query.filter(Gym.id.in_(scores)).all()
+    gyms.sort(key=lambda gym: (-scores[gym.id], -gym.id))
+    return gyms[:FUZZY_LIMIT], len(gyms) > FUZZY_LIMIT
+
+
 @router.get("", response_model=PaginatedGymsResponse)
-def list_gyms(
+async def list_gyms(
     *,
     db: Session = Depends(get_db),
+    redis=Depends(get_redis_client),
     search: Optional[str] = Query(None, description="Filter gyms by name or address"),
     city: Optional[str] = Query(None, description="Filter gyms by city"),
     brand: Optional[str] = Query(None, description="Filter gyms by brand"),
     page: int = Query(1, ge=1, description="Page number for pagination"),
     page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    cursor_id: Optional[int] = Depends(cursor_param),
+    count_mode: Optional[CountMode] = Query(None, description="Stratégie de calcul de `total`"),
+    fuzzy: bool = Query(
+        True,
+        description="Rechercher par similarité de trigrammes (nom, ville) quand `search` ne donne aucun résultat exact",
+    ),
 ) -> dict:
-    """List gyms with optional text search and pagination."""
-    query = db.query(Gym)
-
-    if search:
-        like_pattern = f"%{search}%"
-        query = query.filter(or_(Gym.name.ilike(like_pattern), Gym.address.ilike(like_pattern)))
+    """List gyms with optional text search and offset or cursor pagination."""
+    filtered = db.query(Gym)
 
     if city:
-        query = query.filter(Gym.city.ilike(f"%{city}%"))
+        filtered = filtered.filter(Gym.city.ilike(f"%{city}%"))
 
     if brand:
-        query = query.filter(Gym.brand.ilike(f"%{brand}%"))
+        filtered = filtered.filter(Gym.brand.ilike(f"%{brand}%"))
+
+    query = filtered
+    if search:
+        like_pattern = f"%{search}%"
+        query = query.filter(or_(Gym.name.ilike(like_pattern), Gym.address.ilike(like_pattern)))
 
-    total = query.count()
+    total, total_mode = await count_query(query, count_mode, redis=redis)
+    if search and fuzzy and total == 0 and cursor_id is None:
+        # Typos or combined terms ("basicfit paris") miss the ILIKE filter: rank
+        # gyms by trigram similarity on their name and city instead.
+        matches, capped = await run_in_threadpool(_fuzzy_gyms, db, filtered, search)
+        total, total_mode = len(matches), "capped" if capped else "exact"
+        gyms, next_cursor = matches[(page - 1) * page_size : page * page_size], None
+    else:
+        gyms, next_cursor = await run_in_threadpool(
+            lambda: paginate(
+                query,
+                key_column=Gym.id,
+                page=page,
+                page_size=page_size,
+                cursor_id=cursor_id,
+            )
+        )
     logger.info(
         "Gyms listing", extra={"search": search, "city": city, "brand": brand, "results": total}
     )
-    gyms = (
-        query.order_by(Gym.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
 
     return {
         "items": [GymRead.from_orm(gym) for gym in gyms],
         "total": total,
+        "total_mode": total_mode,
         "page": page,
         "page_size": page_size,
+        "next_cursor": next_cursor,
     }
 
 
+@router.get("/facets", response_model=GymFacets)
+async def get_gym_facets(
+    *,
+    db: Session = Depends(get_db),
+    redis=Depends(get_redis_client),
+    search: Optional[str] = Query(None, description="Filter gyms by name or address"),
+    city: Optional[str] = Query(None, description="Filter gyms by city"),
+    brand: Optional[str] = Query(None, description="Filter gyms by brand"),
+) -> dict:
+    """Count gyms per brand and city for the current filters."""
+
+    def compute() -> dict:
+        query = db.query(Gym)
+        if search:
+            like_pattern = f"%{search}%"
+            query = query.filter(or_(Gym.name.ilike(like_pattern), Gym.address.ilike(like_pattern)))
+        if city:
+            query = query.filter(Gym.city.ilike(f"%{city}%"))
+        if brand:
+            query = query.filter(Gym.brand.ilike(f"%{brand}%"))
+        return gym_facets(query)
+
+    filters = {"search": search, "city": city, "brand": brand}
+    return await cached_facets(redis, "gyms", filters, compute)
+
+
+def _gym_with_relations(db: Session, gym_id: int) -> Optional[GymReadWithRelations]:
+    gym = _with_relation_ids(db.query(Gym)).filter(Gym.id == gym_id).first()
+    return _gym_to_response(gym) if gym else None
+
+
 @router.get("/{gym_id}", response_model=GymReadWithRelations)
-def get_gym(gym_id: int, db: Session = Depends(get_db)) -> GymReadWithRelations:
+async def get_gym(
+    gym_id: int,
+    db: Session = Depends(get_db),
+    cache: CachedRoute = Depends(gym_cache),
+) -> GymReadWithRelations:
     """Retrieve a single gym with related offers and programs."""
-    gym = db.query(Gym).filter(Gym.id == gym_id).first()
-    if not gym:
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+
+    response = await run_in_threadpool(_gym_with_relations, db, gym_id)
+    if response is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Gym not found")
 
-    return _gym_to_response(gym)
+    return await cache.set(response)
 
 
 class SyncResponse(BaseModel):
@@ -120,71 +211,54 @@ class SyncResponse(BaseModel):
     synced_at: datetime
 
 
-@router.post("/sync", response_model=SyncResponse)
-def sync_gyms(db: Session = Depends(get_db)) -> SyncResponse:
-    gyms_payload = sync_all.sync_all_sources()
-    created = 0
-    updated = 0
-
-    for gym_data in gyms_payload:
-        brand = gym_data.get("brand")
-        gym_data["logo_url"] = get_gym_logo(brand) if brand else get_gym_logo("")
-        gym_data["last_synced"] = datetime.utcnow()
-
-        existing = (
-            db.query(Gym)
-            .filter(Gym.name == gym_data.get("name"))
-            .filter(Gym.brand == gym_data.get("brand"))
-            .filter(Gym.city == gym_data.get("city"))
-            .first()
-        )
+def _sync_response(db: Session, result: dict) -> SyncResponse:
+    return SyncResponse(
+        total=db.query(Gym).count(),
+        created=result.get("created", 0),
+        updated=result.get("updated", 0),
+        synced_at=datetime.utcnow(),
+    )
 
-        if existing:
-            for field, value in gym_data.items():
-                setattr(existing, field, value)
-            updated += 1
-        else:
-            db.add(
-                Gym(
-                    **gym_data,
-                )
-            )
-            created += 1
 
-    db.commit()
+@router.post("/sync", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def sync_gyms(
+    redis=Depends(get_redis_client),
+    session_factory=Depends(get_session_factory),
+) -> JobAccepted:
+    """Lancer la synchronisation des salles ; le `SyncResponse` final est disponible sur `/jobs/{id}`."""
 
-    total = db.query(Gym).count()
+    async def work(db: Session, progress: ProgressReporter) -> SyncResponse:
+        return _sync_response(db, await sync_all_gyms(db, redis, progress=progress))
 
-    return SyncResponse(
-        total=total,
-        created=created,
-        updated=updated,
-        synced_at=datetime.utcnow(),
-    )
+    job = await start_job(redis, "gyms.sync", work, session_factory)
+    return job_accepted(job)
 
 
 @router.post("/scrape", response_model=GymReadWithRelations)
 async def scrape_gym(
     url: str,
     gym_type: str,
+    refresh: bool = Query(False, description="Revalider la page même si elle est en cache"),
     db: Session = Depends(get_db),
     redis=Depends(get_redis_client),
 ) -> GymReadWithRelations:
     """Scrape et retourne les infos d'un gym."""
 
-    gym = await update_or_create_gym_from_scraping(db, url, gym_type, redis)
+    gym = await update_or_create_gym_from_scraping(db, url, gym_type, redis, refresh=refresh)
     return _gym_to_response(gym)
 
 
-@router.get("/scrape-all", response_model=SyncResponse)
-async def scrape_all_gyms(db: Session = Depends(get_db), redis=Depends(get_redis_client)) -> SyncResponse:
-    """Scrapper toutes les salles des réseaux et les stocker en base."""
+@router.post("/scrape-all", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def scrape_all_gyms(
+    refresh: bool = Query(False, description="Revalider les pages déjà en cache (requêtes conditionnelles)"),
+    redis=Depends(get_redis_client),
+    session_factory=Depends(get_session_factory),
+) -> JobAccepted:
+    """Scrapper toutes les salles des réseaux et les stocker en base (en tâche de fond)."""
 
-    result = await scrape_and_persist_all_gyms(db, redis)
-    total = db.query(Gym).count()
-    return SyncResponse(
-        total=total,
-        created=result.get("created", 0),
-        updated=result.get("updated", 0),
-        synced_at=datetime.utcnow(),
-    )
+    async def work(db: Session, progress: ProgressReporter) -> SyncResponse:
+        result = await scrape_and_persist_all_gyms(db, redis, refresh=refresh, progress=progress)
+        return _sync_response(db, result)
+
+    job = await start_job(redis, "gyms.scrape_all", work, session_factory)
+    return job_accepted(job)
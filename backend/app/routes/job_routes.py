@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from app.schemas.job import JobRead
+from app.services.job_service import get_job
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+async def get_redis_client(request: Request):
+    return getattr(request.app.state, "redis", None)
+
+
+@router.get("/{job_id}", response_model=JobRead)
+async def read_job(job_id: str, redis=Depends(get_redis_client)) -> dict:
+    """Statut, progression, erreurs et résultat d'un job de scraping ou de synchronisation."""
+    job = await get_job(redis, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
@@ -1,17 +1,32 @@
-from typing import List, Optional
+import asyncio
+from typing import AsyncIterator, List, Literal, Optional
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 import logging
 
-from app.db.session import get_db
+from app.db.session import get_db, get_session_factory
 from app.models.offer import Offer
 from app.models.product import Product
+from app.schemas.facet import ProductFacets
+from app.schemas.job import JobAccepted
 from app.schemas.offer import OfferRead
+from app.schemas.price_history import PriceHistory
 from app.schemas.product import ProductRead
-from app.services.product_ingest_service import ingest_product
+from app.services.product_ingest_service import ingest_product, ingest_products
+from app.services.count_service import CountMode, count_query
+from app.services.facet_service import cached_facets, product_facets
+from app.services.job_service import ProgressReporter, job_accepted, start_job
+from app.services.hybrid_search_service import is_known_miss, merge_items, remember_miss
+from app.services.pagination import cursor_param, paginate
+from app.services.price_history_service import price_history
+from app.services.product_dedup_service import canonical_only
+from app.services.product_search_service import apply_full_text_search
+from app.services.response_cache import CachedRoute, RouteCache
+from app.services.trigram_service import DEFAULT_LIMIT as FUZZY_LIMIT, fuzzy_match
 from app.services import serpapi_service
 from app.core.config import settings
 
@@ -19,6 +34,9 @@ router = APIRouter(prefix="/products", tags=["products"])
 
 logger = logging.getLogger(__name__)
 
+product_cache = RouteCache("products", expire_seconds=300)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 async def get_redis_client(request: Request):
     return getattr(request.app.state, "redis", None)
@@ -34,22 +52,91 @@ class ProductWithOffers(ProductRead):
 class PaginatedProductsResponse(BaseModel):
     items: List[ProductRead]
     total: int
+    total_mode: CountMode = Field("exact", description="Stratégie ayant produit `total`")
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+
+
+class BulkScrapeItem(BaseModel):
+    url: Optional[str] = None
+    source: Optional[str] = None
+    product: Optional[ProductRead] = None
+    error: Optional[str] = None
+
+
+def _bulk_item(result: dict) -> BulkScrapeItem:
+    product = result["product"]
+    return BulkScrapeItem(
+        url=result["url"],
+        source=result["source"],
+        product=ProductRead.from_orm(product) if product is not None else None,
+        error=result["error"],
+    )
+
+
+def _filter_products(
+    query,
+    *,
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    price_min: Optional[float] = None,
+    price_max: Optional[float] = None,
+    rating_min: Optional[float] = None,
+    source: Optional[str] = None,
+):
+    query = canonical_only(query)
+    if category:
+        query = query.filter(Product.category.ilike(f"%{category}%"))
+    if brand:
+        query = query.filter(Product.brand.ilike(f"%{brand}%"))
+    if price_min is not None:
+        query = query.filter(Product.price >= price_min)
+    if price_max is not None:
+        query = query.filter(Product.price <= price_max)
+    if rating_min is not None:
+        query = query.filter(Product.rating >= rating_min)
+    if source:
+        query = query.filter(Product.source.ilike(f"%{source}%"))
+    return query
+
+
+def _fuzzy_products(db: Session, query, q: str) -> tuple[List[Product], bool]:
+    """Filtered products similar to ``q``, best first, and whether more than ``FUZZY_LIMIT`` matched."""
+    scores = dict(fuzzy_match(db, Product, ("name", "brand"), q, query=query, limit=FUZZY_LIMIT + 1))
+    if not scores:
+        return [], False
+    products = query.filter(Product.id.in_(scores)).all()
+    products.sort(key=lambda product: (-scores[product.id], -product.id))
+    return products[:FUZZY_LIMIT], len(products) > FUZZY_LIMIT
+
+
+def _discard(task: Optional[asyncio.Task]) -> None:
+    """Cancel a speculative live search whose result is no longer needed."""
+    if task is None:
+        return
+    if task.done():
+        if not task.cancelled():
+            task.exception()  # Mark a failure as retrieved; nobody is waiting for it.
+        return
+    task.cancel()
 
 
 @router.get("", response_model=PaginatedProductsResponse)
-def list_products(
+async def list_products(
     *,
     db: Session = Depends(get_db),
+    redis=Depends(get_redis_client),
     name: Optional[str] = Query(None, description="Filter by product name"),
     min_price: Optional[float] = Query(None, description="Filter by minimum price"),
     max_price: Optional[float] = Query(None, description="Filter by maximum price"),
     page: int = Query(1, ge=1, description="Page number for pagination"),
     page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    cursor_id: Optional[int] = Depends(cursor_param),
+    count_mode: Optional[CountMode] = Query(None, description="Stratégie de calcul de `total`"),
 ) -> dict:
-    """List products with optional filters and pagination."""
-    query = db.query(Product)
+    """List products with optional filters and offset or cursor pagination."""
+    query = canonical_only(db.query(Product))
 
     if name:
         query = query.filter(Product.name.ilike(f"%{name}%"))
@@ -58,19 +145,24 @@ def list_products(
     if max_price is not None:
         query = query.filter(Product.price <= max_price)
 
-    total = query.count()
-    products = (
-        query.order_by(Product.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    total, total_mode = await count_query(query, count_mode, redis=redis)
+    products, next_cursor = await run_in_threadpool(
+        lambda: paginate(
+            query,
+            key_column=Product.id,
+            page=page,
+            page_size=page_size,
+            cursor_id=cursor_id,
+        )
     )
 
     return {
         "items": [ProductRead.from_orm(product) for product in products],
         "total": total,
+        "total_mode": total_mode,
         "page": page,
         "page_size": page_size,
+        "next_cursor": next_cursor,
     }
 
 
@@ -78,34 +170,70 @@ def list_products(
 async def scrape_and_save_product(
     url: str = Body(..., embed=True),
     source: str = Body(..., embed=True),
+    refresh: bool = Body(False, embed=True),
     db: Session = Depends(get_db),
     redis=Depends(get_redis_client),
 ):
-    product = await ingest_product(url, source, db, redis)
+    product = await ingest_product(url, source, db, redis, refresh=refresh)
     return ProductRead.from_orm(product)
 
 
-@router.post("/scrape-bulk", response_model=List[ProductRead])
+async def _stream_bulk_scrape(
+    items: List[dict], session_factory, redis, parallelism: Optional[int]
+) -> AsyncIterator[str]:
+    # The body is streamed after the request's dependencies are released: use a session of its own.
+    db = session_factory()
+    try:
+        async for result in ingest_products(items, db, redis, parallelism=parallelism, eager=True):
+            yield _bulk_item(result).model_dump_json() + "\n"
+    finally:
+        db.close()
+
+
+@router.post(
+    "/scrape-bulk",
+    response_model=JobAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}, "description": "Avec `stream=true` : une ligne `BulkScrapeItem` par URL"}},
+)
 async def bulk_scrape_products(
     items: List[dict] = Body(...),
-    db: Session = Depends(get_db),
+    parallelism: Optional[int] = Query(
+        None, ge=1, le=32, description="Pages scrapées en parallèle (défaut `BULK_SCRAPE_PARALLELISM`)"
+    ),
+    stream: bool = Query(
+        False,
+        description="Renvoyer une ligne NDJSON par produit dès qu'il est enregistré (ordre de fin)",
+    ),
     redis=Depends(get_redis_client),
+    session_factory=Depends(get_session_factory),
 ):
-    results: List[Product] = []
-    for item in items:
-        url = item.get("url")
-        source = item.get("source")
-        if not url or not source:
-            continue
-        product = await ingest_product(url, source, db, redis)
-        results.append(product)
-    return [ProductRead.from_orm(product) for product in results]
+    """Scrape and save many products in a background job; failing items are reported, not fatal.
+
+    Progress, per-URL errors and the ids of the saved products are available on
+    ``/jobs/{id}``. ``stream=true`` instead streams the results in the response.
+    """
+    if stream:
+        return StreamingResponse(_stream_bulk_scrape(items, session_factory, redis, parallelism), media_type=NDJSON_MEDIA_TYPE)
+
+    async def work(job_db: Session, progress: ProgressReporter) -> dict:
+        await progress.add_total(len(items))
+        product_ids: List[int] = []
+        async for result in ingest_products(items, job_db, redis, parallelism=parallelism):
+            if result["product"] is not None:
+                product_ids.append(result["product"].id)
+            await progress.advance(item=result["url"], error=result["error"])
+        return {"succeeded": len(product_ids), "failed": len(items) - len(product_ids), "product_ids": product_ids}
+
+    job = await start_job(redis, "products.scrape_bulk", work, session_factory)
+    return job_accepted(job)
 
 
 @router.get("/search", response_model=PaginatedProductsResponse)
 async def search_products(
     *,
     db: Session = Depends(get_db),
+    redis=Depends(get_redis_client),
     q: Optional[str] = Query(None, description="Recherche texte"),
     category: Optional[str] = Query(None),
     brand: Optional[str] = Query(None),
@@ -119,49 +247,64 @@ async def search_products(
         False,
         description="Forcer l'utilisation de SerpAPI pour une recherche temps-réel",
     ),
+    sort: Literal["recent", "relevance"] = Query(
+        "recent",
+        description="Tri des résultats : plus récents d'abord ou pertinence du texte (requiert `q`)",
+    ),
+    cursor_id: Optional[int] = Depends(cursor_param),
+    count_mode: Optional[CountMode] = Query(None, description="Stratégie de calcul de `total`"),
+    fuzzy: bool = Query(
+        True,
+        description="Rechercher par similarité de trigrammes (nom, marque) quand `q` ne donne aucun résultat exact",
+    ),
+    hybrid: bool = Query(
+        False,
+        description="Interroger la base et SerpAPI en parallèle et fusionner les résultats (dédoublonnés par URL)",
+    ),
 ):
-    query = db.query(Product)
-
-    if q:
-        like_pattern = f"%{q}%"
-        query = query.filter(or_(Product.name.ilike(like_pattern), Product.description.ilike(like_pattern)))
-    if category:
-        query = query.filter(Product.category.ilike(f"%{category}%"))
-    if brand:
-        query = query.filter(Product.brand.ilike(f"%{brand}%"))
-    if price_min is not None:
-        query = query.filter(Product.price >= price_min)
-    if price_max is not None:
-        query = query.filter(Product.price <= price_max)
-    if rating_min is not None:
-        query = query.filter(Product.rating >= rating_min)
-    if source:
-        query = query.filter(Product.source.ilike(f"%{source}%"))
-
-    total = query.count()
-    products = (
-        query.order_by(Product.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    filters = {
+        "q": q,
+        "category": category,
+        "brand": brand,
+        "price_min": price_min,
+        "price_max": price_max,
+        "rating_min": rating_min,
+        "source": source,
+    }
+    filtered = _filter_products(
+        db.query(Product),
+        category=category,
+        brand=brand,
+        price_min=price_min,
+        price_max=price_max,
+        rating_min=rating_min,
+        source=source,
     )
 
-    has_db_results = total > 0
-    should_use_live = use_live or (not has_db_results and (q or category or brand))
+    query, relevance_order = filtered, None
+    if q:
+        query, relevance_order = apply_full_text_search(filtered, q)
 
-    logger.info(
-        "Product search", extra={"query": q, "filters": {"category": category, "brand": brand}}
-    )
+    rank_by_relevance = sort == "relevance" and relevance_order is not None
+    if rank_by_relevance and cursor_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La pagination par curseur n'est disponible qu'avec sort=recent",
+        )
 
-    if use_live and not settings.serpapi_key:
+    if (use_live or hybrid) and not settings.serpapi_key:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="SerpAPI non configuré",
         )
 
-    if should_use_live and settings.serpapi_key:
-        try:
-            return await serpapi_service.search_supplements(
+    logger.info(
+        "Product search", extra={"query": q, "filters": {"category": category, "brand": brand}}
+    )
+
+    def start_live_search() -> asyncio.Task:
+        return asyncio.create_task(
+            serpapi_service.search_supplements(
                 q or "complément fitness",
                 category=category,
                 brand=brand,
@@ -170,37 +313,183 @@ async def search_products(
                 source=source,
                 page=page,
                 page_size=page_size,
+                redis=redis,
             )
-        except serpapi_service.SerpApiError as exc:
-            logger.warning("SerpAPI search failed: %s", exc)
-            if use_live:
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail="SerpAPI temporairement indisponible",
-                ) from exc
+        )
 
-    return {
+    wants_live = bool(q or category or brand)
+    live_task: Optional[asyncio.Task] = None
+    if settings.serpapi_key and (
+        use_live or hybrid or (wants_live and cursor_id is None and await is_known_miss(redis, filters))
+    ):
+        # Start the live search now so its latency overlaps the database work;
+        # it is cancelled below if the catalog answers on its own.
+        live_task = start_live_search()
+
+    try:
+        total, total_mode = await count_query(query, count_mode, redis=redis)
+        if q and fuzzy and total == 0 and cursor_id is None:
+            # Nothing matched the full-text index: answer near-misses ("whei proteine")
+            # from the trigram index before considering a live SerpAPI call.
+            products, capped = await run_in_threadpool(_fuzzy_products, db, filtered, q)
+            total, total_mode = len(products), "capped" if capped else "exact"
+            products = products[(page - 1) * page_size : page * page_size]
+            next_cursor = None
+        elif rank_by_relevance:
+            products = await run_in_threadpool(
+                query.order_by(relevance_order, Product.id.desc())
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+                .all
+            )
+            next_cursor = None
+        else:
+            products, next_cursor = await run_in_threadpool(
+                lambda: paginate(
+                    query,
+                    key_column=Product.id,
+                    page=page,
+                    page_size=page_size,
+                    cursor_id=cursor_id,
+                )
+            )
+    except BaseException:
+        _discard(live_task)
+        raise
+
+    has_db_results = total > 0
+    if not has_db_results and wants_live:
+        await remember_miss(redis, filters)
+
+    db_response = {
         "items": [ProductRead.from_orm(product) for product in products],
         "total": total,
+        "total_mode": total_mode,
         "page": page,
         "page_size": page_size,
+        "next_cursor": next_cursor,
+    }
+
+    should_use_live = use_live or hybrid or (not has_db_results and wants_live)
+    if not should_use_live or not settings.serpapi_key:
+        _discard(live_task)
+        return db_response
+
+    try:
+        if live_task is None:
+            live_task = start_live_search()
+        live_response = await live_task
+    except serpapi_service.SerpApiError as exc:
+        logger.warning("SerpAPI search failed: %s", exc)
+        if use_live:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="SerpAPI temporairement indisponible",
+            ) from exc
+        return db_response
+
+    if not hybrid:
+        return live_response
+
+    items, duplicates = merge_items(
+        [item.model_dump() for item in db_response["items"]], live_response["items"], page_size
+    )
+    return {
+        "items": items,
+        "total": total + live_response["total"] - duplicates,
+        # The live total is SerpAPI's own estimate.
+        "total_mode": "estimated",
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": None,
+    }
+
+
+@router.get("/facets", response_model=ProductFacets)
+async def get_product_facets(
+    *,
+    db: Session = Depends(get_db),
+    redis=Depends(get_redis_client),
+    q: Optional[str] = Query(None, description="Recherche texte"),
+    category: Optional[str] = Query(None),
+    brand: Optional[str] = Query(None),
+    price_min: Optional[float] = Query(None),
+    price_max: Optional[float] = Query(None),
+    rating_min: Optional[float] = Query(None),
+    source: Optional[str] = Query(None),
+) -> dict:
+    """Count products per brand, category, source and price range for the current filters."""
+    filters = {
+        "category": category,
+        "brand": brand,
+        "price_min": price_min,
+        "price_max": price_max,
+        "rating_min": rating_min,
+        "source": source,
     }
 
+    def compute() -> dict:
+        query = _filter_products(db.query(Product), **filters)
+        if q:
+            query, _ = apply_full_text_search(query, q)
+        return product_facets(query)
+
+    return await cached_facets(redis, "products", {"q": q, **filters}, compute)
+
+
+def _product_with_offers(db: Session, product_id: int) -> Optional[ProductWithOffers]:
+    product = db.query(Product).options(selectinload(Product.offers)).filter(Product.id == product_id).first()
+    return ProductWithOffers.from_orm(product) if product else None
+
 
 @router.get("/{product_id}", response_model=ProductWithOffers)
-def get_product(product_id: int, db: Session = Depends(get_db)) -> ProductWithOffers:
+async def get_product(
+    product_id: int,
+    db: Session = Depends(get_db),
+    cache: CachedRoute = Depends(product_cache),
+) -> ProductWithOffers:
     """Retrieve a single product with its offers."""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+
+    response = await run_in_threadpool(_product_with_offers, db, product_id)
+    if response is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+    return await cache.set(response)
+
+
+def _product_price_history(db: Session, product_id: int, bucket: str, days: int) -> Optional[List[dict]]:
+    if db.query(Product.id).filter(Product.id == product_id).first() is None:
+        return None
+    return price_history(db, product_id, bucket, days)
+
+
+@router.get("/{product_id}/price-history", response_model=PriceHistory)
+async def get_product_price_history(
+    product_id: int,
+    bucket: Literal["day", "week"] = Query("day", description="Granularité des points : jour ou semaine"),
+    days: int = Query(365, ge=1, le=3650, description="Profondeur de l'historique en jours"),
+    db: Session = Depends(get_db),
+    cache: CachedRoute = Depends(product_cache),
+) -> PriceHistory:
+    """Return the product's price trend as min/max/last points per day or week."""
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+
+    points = await run_in_threadpool(_product_price_history, db, product_id, bucket, days)
+    if points is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
-    return ProductWithOffers.from_orm(product)
+    return await cache.set(PriceHistory(product_id=product_id, bucket=bucket, points=points))
 
 
 @router.get("/{product_id}/offers", response_model=List[OfferRead])
 def get_product_offers(product_id: int, db: Session = Depends(get_db)) -> List[OfferRead]:
     """Return offers associated with a product."""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = db.query(Product).options(selectinload(Product.offers)).filter(Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
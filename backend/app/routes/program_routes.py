@@ -1,14 +1,20 @@
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models.program import Program
 from app.schemas.program import ProgramRead, ProgramReadWithExercises
+from app.services.pagination import cursor_param, paginate
+from app.services.response_cache import CachedRoute, RouteCache
 
-router = APIRouter(prefix="/programs", tags=["programs"])
+# Gym-owned programs; /programs belongs to the coached workout programs (training_routes).
+router = APIRouter(prefix="/gym-programs", tags=["programs"])
+
+program_cache = RouteCache("programs", expire_seconds=3600)
 
 
 class PaginatedProgramsResponse(BaseModel):
@@ -16,6 +22,7 @@ class PaginatedProgramsResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 def _program_to_response(program: Program) -> ProgramReadWithExercises:
@@ -30,17 +37,16 @@ def _program_to_response(program: Program) -> ProgramReadWithExercises:
     )
 
 
-@router.get("", response_model=PaginatedProgramsResponse)
-def list_programs(
+def _programs_page(
+    db: Session,
     *,
-    db: Session = Depends(get_db),
-    name: Optional[str] = Query(None, description="Filter programs by name"),
-    user_id: Optional[int] = Query(None, description="Filter by owner id"),
-    gym_id: Optional[int] = Query(None, description="Filter by gym id"),
-    page: int = Query(1, ge=1, description="Page number for pagination"),
-    page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    name: Optional[str],
+    user_id: Optional[int],
+    gym_id: Optional[int],
+    page: int,
+    page_size: int,
+    cursor_id: Optional[int],
 ) -> dict:
-    """List programs with optional filters and pagination."""
     query = db.query(Program)
 
     if name:
@@ -51,11 +57,12 @@ def list_programs(
         query = query.filter(Program.gym_id == gym_id)
 
     total = query.count()
-    programs = (
-        query.order_by(Program.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    programs, next_cursor = paginate(
+        query,
+        key_column=Program.id,
+        page=page,
+        page_size=page_size,
+        cursor_id=cursor_id,
     )
 
     return {
@@ -63,14 +70,60 @@ def list_programs(
         "total": total,
         "page": page,
         "page_size": page_size,
+        "next_cursor": next_cursor,
     }
 
 
+@router.get("", response_model=PaginatedProgramsResponse)
+async def list_programs(
+    *,
+    db: Session = Depends(get_db),
+    cache: CachedRoute = Depends(program_cache),
+    name: Optional[str] = Query(None, description="Filter programs by name"),
+    user_id: Optional[int] = Query(None, description="Filter by owner id"),
+    gym_id: Optional[int] = Query(None, description="Filter by gym id"),
+    page: int = Query(1, ge=1, description="Page number for pagination"),
+    page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    cursor_id: Optional[int] = Depends(cursor_param),
+) -> dict:
+    """List programs with optional filters and offset or cursor pagination."""
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+
+    return await cache.set(
+        await run_in_threadpool(
+            lambda: _programs_page(
+                db,
+                name=name,
+                user_id=user_id,
+                gym_id=gym_id,
+                page=page,
+                page_size=page_size,
+                cursor_id=cursor_id,
+            )
+        )
+    )
+
+
+def _program_with_exercises(db: Session, program_id: int) -> Optional[ProgramReadWithExercises]:
+    program = db.query(Program).filter(Program.id == program_id).first()
+    return _program_to_response(program) if program else None
+
+
 @router.get("/{program_id}", response_model=ProgramReadWithExercises)
-def get_program(program_id: int, db: Session = Depends(get_db)) -> ProgramReadWithExercises:
+async def get_program(
+    program_id: int,
+    db: Session = Depends(get_db),
+    cache: CachedRoute = Depends(program_cache),
+) -> ProgramReadWithExercises:
     """Retrieve a single program with its exercises."""
-    program = db.query(Program).filter(Program.id == program_id).first()
-    if not program:
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+
+    response = await run_in_threadpool(_program_with_exercises, db, program_id)
+    if response is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Program not found")
 
-    return _program_to_response(program)
+    return await cache.set(response)
@@ -1,12 +1,14 @@
 from typing import List, Optional
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, contains_eager, selectinload
 
 from app.db.session import get_db
 from app.models.training import Coach, FavoriteProgram, WorkoutProgram, WorkoutSession, WorkoutWeek
 from app.schemas.training import (
+    AlsoSavedProgramRead,
     CoachRead,
     FavoriteProgramRead,
     WorkoutProgramDetail,
@@ -16,15 +18,23 @@ from app.schemas.training import (
 )
 from app.auth.auth import get_current_user
 from app.models.user import User
+from app.services.pagination import cursor_param, paginate
+from app.services.program_co_save_service import also_saved
+from app.services.program_document_service import PROGRAM_TREE, get_program_document
+from app.services.program_recommendation_service import recommend_programs
+from app.services.response_cache import CachedRoute, RouteCache
 
 router = APIRouter(prefix="/programs", tags=["training"])
 logger = logging.getLogger(__name__)
 
+program_cache = RouteCache("programs", expire_seconds=3600)
+
 
 @router.get("", response_model=dict)
-def list_programs(
+async def list_programs(
     *,
     db: Session = Depends(get_db),
+    cache: CachedRoute = Depends(program_cache),
     page: int = Query(1, ge=1),
     page_size: int = Query(12, ge=1, le=100),
     goal: Optional[str] = None,
@@ -33,8 +43,13 @@ def list_programs(
     coach_id: Optional[int] = None,
     program_type: Optional[str] = Query(None, alias="type"),
     search: Optional[str] = None,
+    cursor_id: Optional[int] = Depends(cursor_param),
 ) -> dict:
-    query = db.query(WorkoutProgram).join(Coach, isouter=True)
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+
+    query = db.query(WorkoutProgram).join(Coach, isouter=True).options(contains_eager(WorkoutProgram.coach))
 
     if goal:
         query = query.filter(WorkoutProgram.goal == goal)
@@ -49,12 +64,9 @@ def list_programs(
     if search:
         query = query.filter(WorkoutProgram.title.ilike(f"%{search}%"))
 
-    total = query.count()
-    items = (
-        query.order_by(WorkoutProgram.id.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    total = await run_in_threadpool(query.count)
+    items, next_cursor = await run_in_threadpool(
+        lambda: paginate(query, key_column=WorkoutProgram.id, page=page, page_size=page_size, cursor_id=cursor_id)
     )
 
     logger.info(
@@ -62,12 +74,15 @@ def list_programs(
         extra={"goal": goal, "level": level, "coach_id": coach_id, "results": total},
     )
 
-    return {
-        "items": [WorkoutProgramRead.from_orm(p) for p in items],
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-    }
+    return await cache.set(
+        {
+            "items": [WorkoutProgramRead.from_orm(p) for p in items],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @router.get("/recommended", response_model=List[WorkoutProgramRead])
@@ -78,36 +93,22 @@ def recommended_programs(
     goal: Optional[str] = None,
     user_id: Optional[int] = None,
 ):
-    query = db.query(WorkoutProgram)
-    if level:
-        query = query.filter(WorkoutProgram.level == level)
-    if goal:
-        query = query.filter(WorkoutProgram.goal == goal)
+    return recommend_programs(db, user_id=user_id, level=level, goal=goal, limit=12)
 
-    favorites_subquery = None
-    if user_id:
-        favorites_subquery = (
-            db.query(FavoriteProgram.program_id)
-            .filter(FavoriteProgram.user_id == user_id)
-            .subquery()
-        )
-    if favorites_subquery is not None:
-        query = query.union(db.query(WorkoutProgram).filter(WorkoutProgram.id.in_(favorites_subquery)))
 
-    return query.limit(12).all()
-
-
-@router.get("/{program_id}", response_model=WorkoutProgramDetail)
-def get_program(program_id: int, db: Session = Depends(get_db)):
-    program = db.query(WorkoutProgram).filter(WorkoutProgram.id == program_id).first()
-    if not program:
+# Numeric ids only, so /programs/coaches reaches list_coaches.
+@router.get("/{program_id:int}", response_model=WorkoutProgramDetail)
+def get_program(program_id: int, db: Session = Depends(get_db)) -> Response:
+    # Served from the pre-encoded document: no ORM loading nor validation on a hit.
+    document = get_program_document(db, program_id)
+    if document is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Program not found")
-    return program
+    return Response(content=document, media_type="application/json")
 
 
 @router.get("/{program_id}/weeks", response_model=List[WorkoutWeekRead])
 def get_weeks(program_id: int, db: Session = Depends(get_db)):
-    program = db.query(WorkoutProgram).filter(WorkoutProgram.id == program_id).first()
+    program = db.query(WorkoutProgram).options(PROGRAM_TREE).filter(WorkoutProgram.id == program_id).first()
     if not program:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Program not found")
     return program.weeks
@@ -117,6 +118,7 @@ def get_weeks(program_id: int, db: Session = Depends(get_db)):
 def get_sessions(program_id: int, db: Session = Depends(get_db)):
     sessions = (
         db.query(WorkoutSession)
+        .options(selectinload(WorkoutSession.exercises))
         .join(WorkoutWeek)
         .filter(WorkoutWeek.program_id == program_id)
         .all()
@@ -124,6 +126,16 @@ def get_sessions(program_id: int, db: Session = Depends(get_db)):
     return sessions
 
 
+@router.get("/{program_id}/also-saved", response_model=List[AlsoSavedProgramRead])
+def get_also_saved(program_id: int, db: Session = Depends(get_db), limit: int = Query(10, ge=1, le=50)):
+    return [
+        AlsoSavedProgramRead(
+            **WorkoutProgramRead.from_orm(program).model_dump(), saved_together=pair.count, score=pair.score
+        )
+        for program, pair in also_saved(db, program_id, limit)
+    ]
+
+
 @router.post("/{program_id}/favorite", response_model=FavoriteProgramRead)
 def add_favorite(
     program_id: int,
@@ -168,8 +180,12 @@ def remove_favorite(
 
 
 @router.get("/coaches", response_model=List[CoachRead], tags=["coaches"])
-def list_coaches(db: Session = Depends(get_db)):
-    return db.query(Coach).all()
+async def list_coaches(db: Session = Depends(get_db), cache: CachedRoute = Depends(program_cache)):
+    cached = await cache.get()
+    if cached is not None:
+        return cached
+    coaches = await run_in_threadpool(db.query(Coach).all)
+    return await cache.set([CoachRead.from_orm(coach) for coach in coaches])
 
 
 @router.get("/coaches/{coach_id}", response_model=CoachRead, tags=["coaches"])
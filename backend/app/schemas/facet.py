@@ -0,0 +1,26 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class FacetCount(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+
+class PriceBucket(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+    count: int
+
+
+class ProductFacets(BaseModel):
+    brand: List[FacetCount] = Field(default_factory=list)
+    category: List[FacetCount] = Field(default_factory=list)
+    source: List[FacetCount] = Field(default_factory=list)
+    price: List[PriceBucket] = Field(default_factory=list)
+
+
+class GymFacets(BaseModel):
+    brand: List[FacetCount] = Field(default_factory=list)
+    city: List[FacetCount] = Field(default_factory=list)
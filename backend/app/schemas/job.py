@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Any, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class JobProgress(BaseModel):
+    total: Optional[int] = None
+    done: int = 0
+    failed: int = 0
+
+
+class JobError(BaseModel):
+    item: Optional[str] = None
+    error: str
+
+
+class JobRead(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    progress: JobProgress = Field(default_factory=JobProgress)
+    errors: List[JobError] = Field(default_factory=list)
+    result: Optional[Any] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: JobStatus
+    status_url: str
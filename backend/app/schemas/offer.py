@@ -9,6 +9,7 @@ class OfferBase(BaseModel):
     title: str
     description: Optional[str] = None
     price: Decimal = Field(..., max_digits=10, decimal_places=2)
+    url: Optional[str] = None
     product_id: int
     gym_id: Optional[int] = None
     user_id: Optional[int] = None
@@ -22,6 +23,7 @@ class OfferUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     price: Optional[Decimal] = Field(None, max_digits=10, decimal_places=2)
+    url: Optional[str] = None
     product_id: Optional[int] = None
     gym_id: Optional[int] = None
     user_id: Optional[int] = None
@@ -0,0 +1,18 @@
+from datetime import date
+from typing import List, Literal
+
+from pydantic import BaseModel, Field
+
+
+class PricePoint(BaseModel):
+    start: date
+    min: float
+    max: float
+    last: float
+    count: int
+
+
+class PriceHistory(BaseModel):
+    product_id: int
+    bucket: Literal["day", "week"]
+    points: List[PricePoint] = Field(default_factory=list)
@@ -3,6 +3,8 @@ from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from app.schemas.product_summary import ProductSummaryRead
+
 
 class ProductBase(BaseModel):
     name: str
@@ -36,6 +38,8 @@ class ProductUpdate(BaseModel):
 
 class ProductRead(ProductBase):
     id: int
+    canonical_id: Optional[int] = None
+    summary: Optional[ProductSummaryRead] = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,15 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ProductSummaryRead(BaseModel):
+    min_offer_price: Optional[Decimal] = None
+    min_offer_id: Optional[int] = None
+    offer_count: int = 0
+    favorite_count: int = 0
+    last_price_change_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
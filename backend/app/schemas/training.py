@@ -72,6 +72,11 @@ class WorkoutProgramDetail(WorkoutProgramRead):
     weeks: List[WorkoutWeekRead] = []
 
 
+class AlsoSavedProgramRead(WorkoutProgramRead):
+    saved_together: int
+    score: float
+
+
 class FavoriteProgramRead(BaseModel):
     user_id: int
     program_id: int
@@ -1,10 +1,105 @@
-"""Utility helpers for interacting with Redis cache."""
+"""Utility helpers for interacting with Redis cache.
+
+The cache is an optimisation: when Redis is missing or unreachable every helper
+degrades to a cache miss (reads return ``None``, writes are skipped) instead of
+failing the request.
+
+Reads go through an optional in-process LRU tier (``LOCAL_CACHE_*`` settings)
+so hot keys are served without a Redis round trip or a ``json.loads``. Values
+returned from that tier are shared between callers and must be treated as
+read-only. Writes publish the key on ``INVALIDATION_CHANNEL``; every worker runs
+``listen_for_invalidations`` to drop its local copy, and local entries also
+expire after ``LOCAL_CACHE_TTL_SECONDS`` as a safety net.
+"""
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
 from typing import Any, Optional
 
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+WORKER_ID = uuid.uuid4().hex
+_MISSING = object()
+
+
+class LocalCache:
+    """Bounded LRU with per-entry expiry, sized by entry count and payload bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size_bytes = 0
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, _size, value = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, size: int, ttl_seconds: Optional[float] = None) -> None:
+        if size > self.max_bytes:
+            self.delete(key)
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        self.delete(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            _key, (_expires, evicted_size, _value) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
+
+
+local_cache: Optional[LocalCache] = (
+    LocalCache(settings.local_cache_max_entries, settings.local_cache_max_bytes, settings.local_cache_ttl_seconds)
+    if settings.local_cache_max_entries > 0
+    else None
+)
+
+
+def _decode(value: Any) -> Any:
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return value
+
+
+async def _publish_invalidation(redis: Redis, key: str) -> None:
+    if local_cache is None:
+        return
+    try:
+        await redis.publish(INVALIDATION_CHANNEL, f"{WORKER_ID}:{key}")
+    except (RedisError, OSError) as exc:
+        logger.warning("Cache invalidation broadcast failed for %s: %s", key, exc)
 
 
 async def get_cache(redis: Optional[Redis], key: str) -> Any:
@@ -16,14 +111,23 @@ async def get_cache(redis: Optional[Redis], key: str) -> Any:
     if redis is None:
         return None
 
-    value = await redis.get(key)
-    if value is None:
-        return None
+    if local_cache is not None:
+        value = local_cache.get(key)
+        if value is not _MISSING:
+            return value
 
     try:
-        return json.loads(value)
-    except json.JSONDecodeError:
-        return value
+        raw = await redis.get(key)
+    except (RedisError, OSError) as exc:
+        logger.warning("Cache read failed for %s: %s", key, exc)
+        return None
+    if raw is None:
+        return None
+
+    value = _decode(raw)
+    if local_cache is not None:
+        local_cache.set(key, value, len(raw))
+    return value
 
 
 async def set_cache(redis: Optional[Redis], key: str, value: Any, expire_seconds: int | None = None) -> None:
@@ -32,7 +136,17 @@ async def set_cache(redis: Optional[Redis], key: str, value: Any, expire_seconds
         return
 
     serialized = json.dumps(value) if not isinstance(value, str) else value
-    await redis.set(key, serialized, ex=expire_seconds)
+    try:
+        await redis.set(key, serialized, ex=expire_seconds)
+    except (RedisError, OSError) as exc:
+        logger.warning("Cache write failed for %s: %s", key, exc)
+        if local_cache is not None:
+            local_cache.delete(key)
+        return
+
+    if local_cache is not None:
+        local_cache.set(key, _decode(serialized), len(serialized), expire_seconds)
+    await _publish_invalidation(redis, key)
 
 
 async def expire_cache(redis: Optional[Redis], key: str, expire_seconds: int) -> None:
@@ -40,4 +154,92 @@ async def expire_cache(redis: Optional[Redis], key: str, expire_seconds: int) ->
     if redis is None:
         return
 
-    await redis.expire(key, expire_seconds)
+    try:
+        await redis.expire(key, expire_seconds)
+    except (RedisError, OSError) as exc:
+        logger.warning("Cache expire failed for %s: %s", key, exc)
+
+
+async def acquire_lock(redis: Optional[Redis], key: str, expire_seconds: int) -> bool:
+    """Take a short cross-worker lock (``SET NX``); ``False`` when someone else holds it.
+
+    Without Redis there is nobody to coordinate with, so the lock is granted.
+    """
+    if redis is None:
+        return True
+
+    try:
+        return bool(await redis.set(key, WORKER_ID, ex=expire_seconds, nx=True))
+    except (RedisError, OSError) as exc:
+        logger.warning("Cache lock failed for %s: %s", key, exc)
+        return True
+
+
+async def release_lock(redis: Optional[Redis], key: str) -> None:
+    if redis is None:
+        return
+
+    try:
+        await redis.delete(key)
+    except (RedisError, OSError) as exc:
+        logger.warning("Cache unlock failed for %s: %s", key, exc)
+
+
+def _version_key(namespace: str) -> str:
+    return f"cache_version:{namespace}"
+
+
+async def get_cache_version(redis: Optional[Redis], namespace: str) -> int:
+    """Return the current version of a cache namespace (``0`` when never bumped)."""
+    value = await get_cache(redis, _version_key(namespace))
+    try:
+        return int(value) if value is not None else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+async def bump_cache_version(redis: Optional[Redis], namespace: str) -> None:
+    """Invalidate every key built on a namespace version in one round trip."""
+    if redis is None:
+        return
+
+    key = _version_key(namespace)
+    if local_cache is not None:
+        local_cache.delete(key)
+    try:
+        await redis.incr(key)
+    except (RedisError, OSError) as exc:
+        logger.warning("Cache invalidation failed for %s: %s", namespace, exc)
+        return
+    await _publish_invalidation(redis, key)
+
+
+async def listen_for_invalidations(redis: Redis) -> None:
+    """Drop local copies of keys written by other workers (runs until cancelled)."""
+    if local_cache is None:
+        return
+
+    while True:
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Anything cached before the subscription may have missed a message.
+            local_cache.clear()
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                worker_id, _, key = str(message["data"]).partition(":")
+                if worker_id != WORKER_ID:
+                    local_cache.delete(key)
+        except asyncio.CancelledError:
+            raise
+        except (RedisError, OSError) as exc:
+            logger.warning("Cache invalidation listener disconnected: %s", exc)
+            # The local tier cannot be trusted without the channel.
+            local_cache.clear()
+            await asyncio.sleep(5)
+        finally:
+            try:
+                await pubsub.aclose()
+            except (RedisError, OSError):
+                pass
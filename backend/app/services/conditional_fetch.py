@@ -0,0 +1,59 @@
+"""Conditional page downloads for cached scrapes (``ETag`` / ``Last-Modified``).
+
+The validators of the last full download are stored next to the cached scrape
+(``validators:<cache key>``). When a scrape is refreshed while its cached result
+still exists, the request carries ``If-None-Match`` / ``If-Modified-Since``; a
+``304`` answer extends the TTL of the cached result instead of downloading and
+parsing the page again.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from redis.asyncio import Redis
+
+from app.services.cache_service import expire_cache, get_cache, set_cache
+from app.services.crawl_scheduler import polite_fetch
+
+VALIDATORS_PREFIX = "validators:"
+
+
+async def fetch_page(
+    url: str,
+    redis: Optional[Redis],
+    cache_key: str,
+    *,
+    expire_seconds: int,
+    revalidate: bool,
+    **kwargs: Any,
+) -> Optional[str]:
+    """Download ``url`` and return its body, or ``None`` when it did not change.
+
+    ``revalidate`` must only be set when the result cached under ``cache_key``
+    exists, since ``None`` tells the caller to keep using it.
+    """
+    validators_key = f"{VALIDATORS_PREFIX}{cache_key}"
+    headers = dict(kwargs.pop("headers", None) or {})
+    if revalidate:
+        validators = await get_cache(redis, validators_key)
+        if isinstance(validators, dict):
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = await polite_fetch(url, redis=redis, headers=headers, **kwargs)
+    if response.status_code == 304 and revalidate:
+        await expire_cache(redis, cache_key, expire_seconds)
+        await expire_cache(redis, validators_key, expire_seconds)
+        return None
+    response.raise_for_status()
+
+    validators = {
+        name: value
+        for name, value in (("etag", response.headers.get("ETag")), ("last_modified", response.headers.get("Last-Modified")))
+        if value
+    }
+    if validators:
+        await set_cache(redis, validators_key, validators, expire_seconds=expire_seconds)
+    return response.text
@@ -0,0 +1,131 @@
+"""Strategies to compute the ``total`` of paginated responses.
+
+``query.count()`` re-runs the whole filtered query, which doubles the cost of
+broad listings. The strategies below trade precision for speed:
+
+- ``exact``: plain ``COUNT(*)``.
+- ``capped``: counts at most ``cap + 1`` rows; totals above the cap are reported
+  as ``cap`` with mode ``capped`` so clients can display "10 000+".
+- ``estimated``: the planner's row estimate on PostgreSQL (``pg_class.reltuples``
+  when unfiltered, ``EXPLAIN`` otherwise). Small estimates are confirmed with a
+  capped count; other databases fall back to ``capped``.
+- ``cached``: exact count stored in Redis per filter signature.
+
+Every helper returns ``(total, mode)`` where ``mode`` is the strategy that
+actually produced ``total``. ``count_query`` runs the database work in the
+threadpool so concurrent tasks (such as a speculative SerpAPI call) keep running.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import Literal, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from redis.asyncio import Redis
+from sqlalchemy import func, text
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+from app.services.cache_service import get_cache, set_cache
+
+logger = logging.getLogger(__name__)
+
+CountMode = Literal["exact", "estimated", "capped", "cached"]
+CACHE_PREFIX = "count:"
+
+
+def exact_count(query: Query) -> int:
+    return query.order_by(None).count()
+
+
+def capped_count(query: Query, cap: int) -> tuple[int, CountMode]:
+    limited = query.order_by(None).limit(cap + 1).subquery()
+    total = query.session.query(func.count()).select_from(limited).scalar() or 0
+    if total > cap:
+        return cap, "capped"
+    return total, "exact"
+
+
+def _planner_estimate(query: Query) -> Optional[int]:
+    session = query.session
+    if session.get_bind().dialect.name != "postgresql":
+        return None
+
+    if query.whereclause is None and len(query.column_descriptions) == 1:
+        entity = query.column_descriptions[0].get("entity")
+        table_name = getattr(entity, "__tablename__", None)
+        if table_name:
+            estimate = session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": table_name},
+            ).scalar()
+            # reltuples is -1 until the table has been vacuumed/analyzed.
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+
+    compiled = query.order_by(None).statement.compile(dialect=session.get_bind().dialect)
+    plan = (
+        session.connection()
+        .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+        .scalar()
+    )
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimated_count(query: Query, cap: int) -> tuple[int, CountMode]:
+    try:
+        estimate = _planner_estimate(query)
+    except Exception as exc:  # pragma: no cover - depends on the database
+        logger.warning("Planner row estimate failed: %s", exc)
+        estimate = None
+
+    if estimate is None or estimate <= cap:
+        # Estimates are unreliable for small results and a capped count is cheap there.
+        return capped_count(query, cap)
+    return estimate, "estimated"
+
+
+def _signature(query: Query) -> str:
+    compiled = query.order_by(None).statement.compile(dialect=query.session.get_bind().dialect)
+    raw = f"{compiled}|{json.dumps(compiled.params, sort_keys=True, default=str)}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def count_rows(query: Query, mode: CountMode) -> tuple[int, CountMode]:
+    """Synchronous counterpart of ``count_query`` for the database-only strategies."""
+    if mode == "capped":
+        return capped_count(query, settings.count_cap)
+    if mode == "estimated":
+        return estimated_count(query, settings.count_cap)
+    return exact_count(query), "exact"
+
+
+async def cached_count(query: Query, redis: Optional[Redis], expire_seconds: int) -> tuple[int, CountMode]:
+    if redis is None:
+        return await run_in_threadpool(exact_count, query), "exact"
+
+    cache_key = f"{CACHE_PREFIX}{_signature(query)}"
+    cached = await get_cache(redis, cache_key)
+    if isinstance(cached, int):
+        return cached, "cached"
+
+    total = await run_in_threadpool(exact_count, query)
+    await set_cache(redis, cache_key, total, expire_seconds=expire_seconds)
+    return total, "exact"
+
+
+async def count_query(
+    query: Query,
+    mode: Optional[CountMode] = None,
+    *,
+    redis: Optional[Redis] = None,
+) -> tuple[int, CountMode]:
+    """Count the rows of ``query`` with the requested (or configured) strategy."""
+    mode = mode or settings.count_mode
+    if mode == "cached":
+        return await cached_count(query, redis, settings.count_cache_seconds)
+    return await run_in_threadpool(count_rows, query, mode)
@@ -0,0 +1,161 @@
+"""Per-host politeness for scrapers: token-bucket rate, concurrency and back-off.
+
+Every scraped host gets its own bucket (``SCRAPE_RATE_PER_HOST`` requests per
+second, bursts of ``SCRAPE_BURST_PER_HOST``, overridable per host with
+``SCRAPE_HOST_RATES``) and its own concurrency limit, so a run over several
+brands keeps its overall throughput while no single site is hammered. The
+``Crawl-delay`` of the host's robots.txt lowers its rate (cached in Redis for a
+day), and ``429``/``503`` answers pause the host for their ``Retry-After`` before
+the request is retried.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.services.cache_service import get_cache, set_cache
+from app.services.http_client import USER_AGENT, fetch
+
+logger = logging.getLogger(__name__)
+
+ROBOTS_PREFIX = "robots_delay:"
+ROBOTS_CACHE_SECONDS = 86_400
+ROBOTS_TIMEOUT = httpx.Timeout(5.0)
+RETRY_STATUSES = (429, 503)
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+
+
+class HostScheduler:
+    """Token bucket, concurrency limit and pause state of one host."""
+
+    def __init__(self, rate: float, burst: int, concurrency: int):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.slots = asyncio.Semaphore(concurrency)
+        self._turns = asyncio.Lock()
+        self.robots: Optional[asyncio.Task] = None
+
+    def apply_crawl_delay(self, delay: Optional[float]) -> None:
+        if delay and delay > 0 and 1 / delay < self.rate:
+            self.rate = 1 / delay
+            self.capacity = 1
+            self.tokens = min(self.tokens, 1.0)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def wait_turn(self) -> None:
+        """Wait until the host may receive one more request (FIFO between waiters)."""
+        async with self._turns:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_hosts: dict[str, HostScheduler] = {}
+
+
+def reset_hosts() -> None:
+    """Forget every host state (tests, settings changes)."""
+    _hosts.clear()
+
+
+async def _crawl_delay(scheme: str, host: str, redis: Optional[Redis]) -> Optional[float]:
+    cache_key = f"{ROBOTS_PREFIX}{host}"
+    cached = await get_cache(redis, cache_key)
+    if isinstance(cached, (int, float)):
+        return cached or None
+
+    delay: Optional[float] = None
+    try:
+        response = await fetch(f"{scheme}://{host}/robots.txt", timeout=ROBOTS_TIMEOUT, follow_redirects=True)
+        if response.status_code == 200:
+            parser = RobotFileParser()
+            parser.parse(response.text.splitlines())
+            value = parser.crawl_delay(USER_AGENT.split("/")[0])
+            delay = float(value) if value is not None else None
+    except (httpx.HTTPError, ValueError) as exc:
+        logger.info("robots.txt unavailable for %s: %s", host, exc)
+    await set_cache(redis, cache_key, delay or 0, expire_seconds=ROBOTS_CACHE_SECONDS)
+    return delay
+
+
+async def _host_scheduler(url: str, redis: Optional[Redis]) -> HostScheduler:
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    scheduler = _hosts.get(host)
+    if scheduler is None:
+        scheduler = _hosts[host] = HostScheduler(
+            settings.scrape_host_rates.get(host, settings.scrape_rate_per_host),
+            settings.scrape_burst_per_host,
+            settings.scrape_concurrency_per_host,
+        )
+    if scheduler.robots is None:
+
+        async def load_robots() -> None:
+            scheduler.apply_crawl_delay(await _crawl_delay(parts.scheme or "https", host, redis))
+
+        scheduler.robots = asyncio.create_task(load_robots())
+    robots = scheduler.robots
+    try:
+        await asyncio.shield(robots)
+    except Exception:
+        # Never keep a failed robots.txt load: the next fetch to this host retries it.
+        logger.warning("robots.txt check failed for %s", host, exc_info=True)
+        if scheduler.robots is robots:
+            scheduler.robots = None
+    return scheduler
+
+
+def _retry_after_seconds(response: httpx.Response) -> float:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return DEFAULT_RETRY_AFTER_SECONDS
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            seconds = DEFAULT_RETRY_AFTER_SECONDS
+    return min(max(seconds, 0.0), settings.scrape_max_retry_after_seconds)
+
+
+async def polite_fetch(url: str, *, redis: Optional[Redis] = None, **kwargs: Any) -> httpx.Response:
+    """``GET`` a page to scrape while respecting the host's rate, concurrency and back-off.
+
+    Keyword arguments are passed to :func:`app.services.http_client.fetch`.
+    """
+    scheduler = await _host_scheduler(url, redis)
+    attempt = 0
+    while True:
+        async with scheduler.slots:
+            await scheduler.wait_turn()
+            response = await fetch(url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt >= settings.scrape_max_retries:
+            return response
+        delay = _retry_after_seconds(response)
+        logger.info("%s answered %s, pausing the host for %.1fs", url, response.status_code, delay)
+        scheduler.pause(delay)
+        attempt += 1
@@ -0,0 +1,100 @@
+"""Facet aggregation for product and gym filters.
+
+Each facet is computed with a single grouped query over the current filter set
+and the whole result is cached in Redis per filter signature. Writers bump the
+namespace version (``invalidate_facets``) instead of deleting keys one by one.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from redis.asyncio import Redis
+from sqlalchemy import case, func
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+from app.models.gym import Gym
+from app.models.product import Product
+from app.services.cache_service import bump_cache_version, get_cache, get_cache_version, set_cache
+
+CACHE_PREFIX = "facets:"
+# Upper bounds (exclusive) of the price buckets; the last bucket is open-ended.
+PRICE_BOUNDARIES = (10, 20, 50, 100)
+FACET_LIMIT = 50
+
+
+def _value_counts(query: Query, column: Any) -> list[dict[str, Any]]:
+    count = func.count()
+    rows = (
+        query.order_by(None)
+        .with_entities(column, count)
+        .group_by(column)
+        .order_by(count.desc(), column)
+        .limit(FACET_LIMIT)
+        .all()
+    )
+    return [{"value": value, "count": total} for value, total in rows]
+
+
+def _price_buckets(query: Query) -> list[dict[str, Any]]:
+    bucket = case(
+        *[(Product.price < bound, idx) for idx, bound in enumerate(PRICE_BOUNDARIES)],
+        else_=len(PRICE_BOUNDARIES),
+    )
+    rows = dict(
+        query.order_by(None)
+        .filter(Product.price.isnot(None))
+        .with_entities(bucket, func.count())
+        .group_by(bucket)
+        .all()
+    )
+    bounds = (None, *PRICE_BOUNDARIES, None)
+    return [
+        {"min": bounds[idx], "max": bounds[idx + 1], "count": rows.get(idx, 0)}
+        for idx in range(len(PRICE_BOUNDARIES) + 1)
+    ]
+
+
+def product_facets(query: Query) -> dict[str, Any]:
+    return {
+        "brand": _value_counts(query, Product.brand),
+        "category": _value_counts(query, Product.category),
+        "source": _value_counts(query, Product.source),
+        "price": _price_buckets(query),
+    }
+
+
+def gym_facets(query: Query) -> dict[str, Any]:
+    return {
+        "brand": _value_counts(query, Gym.brand),
+        "city": _value_counts(query, Gym.city),
+    }
+
+
+async def cached_facets(
+    redis: Optional[Redis],
+    namespace: str,
+    filters: dict[str, Any],
+    compute: Callable[[], dict[str, Any]],
+) -> dict[str, Any]:
+    """Return the facets for ``filters``, computing them on a cache miss."""
+    signature = hashlib.sha1(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()
+    version = await get_cache_version(redis, f"{CACHE_PREFIX}{namespace}")
+    cache_key = f"{CACHE_PREFIX}{namespace}:v{version}:{signature}"
+
+    cached = await get_cache(redis, cache_key)
+    if isinstance(cached, dict):
+        return cached
+
+    # The GROUP BY queries scan the whole catalog: keep them off the event loop.
+    facets = await run_in_threadpool(compute)
+    await set_cache(redis, cache_key, facets, expire_seconds=settings.facet_cache_seconds)
+    return facets
+
+
+async def invalidate_facets(redis: Optional[Redis], namespace: str) -> None:
+    """Drop every cached facet set of ``namespace`` (``products`` or ``gyms``)."""
+    await bump_cache_version(redis, f"{CACHE_PREFIX}{namespace}")
@@ -5,14 +5,17 @@ import re
 from typing import Optional
 from urllib.parse import urljoin, urlparse, urlunparse
 
-import redis
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from redis.asyncio import Redis
 
-from app.core.config import settings
+from app.services.cache_service import get_cache, set_cache
+from app.services.crawl_scheduler import polite_fetch
+from app.services.html_parser import parse_html
+from app.services.parse_pool import run_parser
 
 CACHE_PREFIX = "gym_logo:"
 CACHE_EXPIRATION = 2_592_000  # 30 days in seconds
+FETCH_TIMEOUT = httpx.Timeout(10.0)
 PLACEHOLDER_LOGO = "https://via.placeholder.com/150?text=Fitidea"
 GYM_SITES: dict[str, str] = {
     "basicfit": "https://www.basic-fit.com/fr-fr/",
@@ -23,13 +26,6 @@ GYM_SITES: dict[str, str] = {
 }
 
 
-def _get_redis_client() -> Optional[redis.Redis]:
-    try:
-        return redis.from_url(settings.redis_url, decode_responses=True)
-    except Exception:
-        return None
-
-
 def _clean_logo_url(src: Optional[str], base_url: str) -> Optional[str]:
     if not src:
         return None
@@ -40,10 +36,10 @@ def _clean_logo_url(src: Optional[str], base_url: str) -> Optional[str]:
     return urlunparse(sanitized)
 
 
-def _extract_logo(soup: BeautifulSoup, base_url: str) -> Optional[str]:
+def _extract_logo(html: str, base_url: str) -> Optional[str]:
     logo_patterns = re.compile(r"logo|header-logo|site-logo|navbar-logo", re.IGNORECASE)
 
-    for img in soup.find_all("img"):
+    for img in parse_html(html, ("img",)).find_all("img"):
         attributes = " ".join(
             filter(
                 None,
@@ -67,7 +63,7 @@ def _extract_logo(soup: BeautifulSoup, base_url: str) -> Optional[str]:
     return None
 
 
-def get_gym_logo(gym_type: str) -> str:
+async def get_gym_logo(gym_type: str, redis: Optional[Redis] = None) -> str:
     """
     Return the official logo URL for a gym brand.
 
@@ -81,11 +77,9 @@ def get_gym_logo(gym_type: str) -> str:
     normalized_type = gym_type.lower()
     cache_key = f"{CACHE_PREFIX}{normalized_type}"
 
-    redis_client = _get_redis_client()
-    if redis_client:
-        cached = redis_client.get(cache_key)
-        if cached:
-            return cached
+    cached = await get_cache(redis, cache_key)
+    if cached:
+        return cached
 
     site_url = GYM_SITES.get(normalized_type)
     if not site_url:
@@ -93,19 +87,14 @@ def get_gym_logo(gym_type: str) -> str:
 
     logo_url = None
     try:
-        response = requests.get(site_url, timeout=10)
+        response = await polite_fetch(site_url, redis=redis, timeout=FETCH_TIMEOUT, follow_redirects=True)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        logo_url = _extract_logo(soup, site_url)
+        logo_url = await run_parser(_extract_logo, response.text, site_url)
     except Exception:
         logo_url = None
 
     final_logo = logo_url or PLACEHOLDER_LOGO
 
-    if redis_client:
-        try:
-            redis_client.setex(cache_key, CACHE_EXPIRATION, final_logo)
-        except Exception:
-            pass
+    await set_cache(redis, cache_key, final_logo, expire_seconds=CACHE_EXPIRATION)
 
     return final_logo
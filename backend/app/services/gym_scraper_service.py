@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
 from datetime import datetime
 from typing import Any, List, Optional
 from urllib.parse import urljoin
@@ -12,9 +13,21 @@ from bs4 import BeautifulSoup
 from redis.asyncio import Redis
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.gym import Gym
+from app.scrapers import sync_all
 from app.services.cache_service import get_cache, set_cache
+from app.services.conditional_fetch import fetch_page
+from app.services.crawl_scheduler import polite_fetch
+from app.services.facet_service import invalidate_facets
 from app.services.gym_logo_service import get_gym_logo
+from app.services.html_parser import parse_html
+from app.services.job_service import ProgressReporter
+from app.services.parse_pool import run_parser
+from app.services.response_cache import invalidate_route_cache
+from app.services.single_flight import single_flight
+
+logger = logging.getLogger(__name__)
 
 LISTING_URLS: dict[str, str] = {
     "basicfit": "https://www.basic-fit.com/fr-fr/salles-de-sport",
@@ -25,13 +38,13 @@ LISTING_URLS: dict[str, str] = {
 }
 
 CACHE_EXPIRE_SECONDS = 86_400
+FETCH_TIMEOUT = httpx.Timeout(20.0, connect=10.0)
 
 
-async def _fetch_html(url: str) -> str:
-    async with httpx.AsyncClient(timeout=httpx.Timeout(20.0, connect=10.0)) as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        return response.text
+async def _fetch_html(url: str, redis: Optional[Redis] = None) -> str:
+    response = await polite_fetch(url, redis=redis, timeout=FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.text
 
 
 def _clean_text(value: Optional[str]) -> Optional[str]:
@@ -87,7 +100,7 @@ def _extract_images(soup: BeautifulSoup, base_url: str) -> List[str]:
     return list(dict.fromkeys(images))
 
 
-async def _scrape_basicfit(soup: BeautifulSoup, url: str) -> dict:
+def _scrape_basicfit(soup: BeautifulSoup, url: str) -> dict:
     data = _parse_json_ld(soup)
     address = data.get("address", {}) if isinstance(data, dict) else {}
     photos = _extract_images(soup, url)
@@ -122,7 +135,7 @@ async def _scrape_basicfit(soup: BeautifulSoup, url: str) -> dict:
     }
 
 
-async def _scrape_fitnesspark(soup: BeautifulSoup, url: str) -> dict:
+def _scrape_fitnesspark(soup: BeautifulSoup, url: str) -> dict:
     name = _clean_text(soup.select_one("h1") and soup.select_one("h1").get_text())
     address = _clean_text(soup.select_one(".club__infos__adresse") and soup.select_one(".club__infos__adresse").get_text())
     city = None
@@ -152,7 +165,7 @@ async def _scrape_fitnesspark(soup: BeautifulSoup, url: str) -> dict:
     }
 
 
-async def _scrape_neoness(soup: BeautifulSoup, url: str) -> dict:
+def _scrape_neoness(soup: BeautifulSoup, url: str) -> dict:
     data = _parse_json_ld(soup)
     name = _clean_text(data.get("name")) or _clean_text(soup.select_one("h1") and soup.select_one("h1").get_text())
     address = data.get("address", {}) if isinstance(data, dict) else {}
@@ -179,7 +192,7 @@ async def _scrape_neoness(soup: BeautifulSoup, url: str) -> dict:
     }
 
 
-async def _scrape_onair(soup: BeautifulSoup, url: str) -> dict:
+def _scrape_onair(soup: BeautifulSoup, url: str) -> dict:
     name = _clean_text(soup.select_one("h1") and soup.select_one("h1").get_text())
     address_block = soup.select_one(".club-info, .club__infos")
     address = _clean_text(address_block.get_text(" ") if address_block else None)
@@ -206,7 +219,7 @@ async def _scrape_onair(soup: BeautifulSoup, url: str) -> dict:
     }
 
 
-async def _scrape_keepcool(soup: BeautifulSoup, url: str) -> dict:
+def _scrape_keepcool(soup: BeautifulSoup, url: str) -> dict:
     data = _parse_json_ld(soup)
     name = _clean_text(data.get("name")) or _clean_text(soup.select_one("h1") and soup.select_one("h1").get_text())
     address_block = data.get("address", {}) if isinstance(data, dict) else {}
@@ -243,50 +256,76 @@ SCRAPERS = {
     "keepcool": _scrape_keepcool,
 }
 
+# Elements read by scrapers that only use JSON-LD and tag-level lookups; the
+# others match descendant selectors (``.horaires li``) and need the full tree.
+SCRAPER_TAGS: dict[str, tuple[str, ...]] = {
+    "basicfit": ("script", "img", "h1"),
+}
+
+
+def _extract_gym_details(html: str, url: str, gym_type: str) -> dict:
+    """Run the scraper of ``gym_type`` on a club page (runs in the parse pool)."""
+    gym_type = gym_type.lower()
+    return SCRAPERS[gym_type](parse_html(html, SCRAPER_TAGS.get(gym_type)), url)
+
 
-async def scrape_gym_details(url: str, gym_type: str, redis: Optional[Redis] = None) -> dict:
+async def scrape_gym_details(
+    url: str, gym_type: str, redis: Optional[Redis] = None, *, refresh: bool = False
+) -> dict:
     """
     Scrape toutes les infos utiles depuis l'URL d’un gym.
-    Le résultat est mis en cache Redis.
+    Le résultat est mis en cache Redis ; avec ``refresh`` la page est
+    revalidée (``If-None-Match`` / ``If-Modified-Since``) et un ``304`` prolonge
+    simplement le cache.
     Retour : dict avec toutes les informations normalisées.
     """
 
     cache_key = f"gym_details:{gym_type}:{url}"
     cached = await get_cache(redis, cache_key)
-    if cached:
+    if cached and not refresh:
         return cached
 
-    html = await _fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
-    scraper = SCRAPERS.get(gym_type.lower())
-    if not scraper:
+    if gym_type.lower() not in SCRAPERS:
         raise ValueError(f"Unsupported gym type: {gym_type}")
 
-    details = await scraper(soup, url)
-    details["logo_url"] = get_gym_logo(gym_type)
-    details["brand"] = gym_type
+    async def scrape_and_store() -> dict:
+        html = await fetch_page(
+            url,
+            redis,
+            cache_key,
+            expire_seconds=CACHE_EXPIRE_SECONDS,
+            revalidate=bool(cached),
+            timeout=FETCH_TIMEOUT,
+        )
+        if html is None:
+            return cached
+        details = await run_parser(_extract_gym_details, html, url, gym_type)
+        details["logo_url"] = await get_gym_logo(gym_type, redis)
+        details["brand"] = gym_type
 
-    await set_cache(redis, cache_key, details, expire_seconds=CACHE_EXPIRE_SECONDS)
-    return details
+        await set_cache(redis, cache_key, details, expire_seconds=CACHE_EXPIRE_SECONDS)
+        return details
 
+    return await single_flight(cache_key, scrape_and_store, redis=redis, fresh=refresh)
 
-async def _scrape_listing_basicfit(soup: BeautifulSoup, url: str) -> List[str]:
+
+def _scrape_listing_basicfit(soup: BeautifulSoup, url: str) -> List[str]:
     return [urljoin(url, link.get("href")) for link in soup.select("a[href*='basic-fit-']") if link.get("href")]
 
 
-async def _scrape_listing_fitnesspark(soup: BeautifulSoup, url: str) -> List[str]:
+def _scrape_listing_fitnesspark(soup: BeautifulSoup, url: str) -> List[str]:
     return [urljoin(url, link.get("href")) for link in soup.select("a.card-club__link") if link.get("href")]
 
 
-async def _scrape_listing_neoness(soup: BeautifulSoup, url: str) -> List[str]:
+def _scrape_listing_neoness(soup: BeautifulSoup, url: str) -> List[str]:
     return [urljoin(url, link.get("href")) for link in soup.select("a[href*='/clubs/']") if link.get("href")]
 
 
-async def _scrape_listing_onair(soup: BeautifulSoup, url: str) -> List[str]:
+def _scrape_listing_onair(soup: BeautifulSoup, url: str) -> List[str]:
     return [urljoin(url, link.get("href")) for link in soup.select("a.card-club") if link.get("href")]
 
 
-async def _scrape_listing_keepcool(soup: BeautifulSoup, url: str) -> List[str]:
+def _scrape_listing_keepcool(soup: BeautifulSoup, url: str) -> List[str]:
     return [urljoin(url, link.get("href")) for link in soup.select("a[href*='/s/salle']") if link.get("href")]
 
 
@@ -299,25 +338,40 @@ LISTING_SCRAPERS = {
 }
 
 
-async def scrape_listing_urls(gym_type: str) -> List[str]:
+def _extract_listing_urls(html: str, url: str, gym_type: str) -> List[str]:
+    # Listing scrapers only select links.
+    return LISTING_SCRAPERS[gym_type](parse_html(html, ("a",)), url)
+
+
+async def scrape_listing_urls(gym_type: str, redis: Optional[Redis] = None) -> List[str]:
     listing_url = LISTING_URLS.get(gym_type)
     if not listing_url:
         return []
 
-    html = await _fetch_html(listing_url)
-    soup = BeautifulSoup(html, "html.parser")
-    scraper = LISTING_SCRAPERS.get(gym_type)
-    if not scraper:
+    if gym_type not in LISTING_SCRAPERS:
         return []
 
-    urls = await scraper(soup, listing_url)
+    html = await _fetch_html(listing_url, redis)
+    urls = await run_parser(_extract_listing_urls, html, listing_url, gym_type)
     return list(dict.fromkeys(urls))
 
 
+async def _invalidate_gym_caches(redis: Optional[Redis]) -> None:
+    await invalidate_facets(redis, "gyms")
+    await invalidate_route_cache(redis, "gyms")
+
+
 async def update_or_create_gym_from_scraping(
-    db: Session, url: str, gym_type: str, redis: Optional[Redis] = None
+    db: Session,
+    url: str,
+    gym_type: str,
+    redis: Optional[Redis] = None,
+    *,
+    refresh: bool = False,
+    invalidate: bool = True,
 ) -> Gym:
-    details = await scrape_gym_details(url, gym_type, redis)
+    """Scrape ``url`` and upsert its gym; ``invalidate=False`` leaves the cache invalidation to a batch caller."""
+    details = await scrape_gym_details(url, gym_type, redis, refresh=refresh)
 
     gym = db.query(Gym).filter(Gym.url == url).first()
     if not gym:
@@ -332,35 +386,105 @@ async def update_or_create_gym_from_scraping(
     gym.last_synced = datetime.utcnow()
     db.commit()
     db.refresh(gym)
+    if invalidate:
+        await _invalidate_gym_caches(redis)
     return gym
 
 
-async def scrape_and_persist_all_gyms(db: Session, redis: Optional[Redis] = None) -> dict[str, Any]:
+async def scrape_and_persist_all_gyms(
+    db: Session,
+    redis: Optional[Redis] = None,
+    *,
+    refresh: bool = False,
+    progress: Optional[ProgressReporter] = None,
+) -> dict[str, Any]:
     created = 0
     updated = 0
     total = 0
+    failed = 0
 
-    semaphore = asyncio.Semaphore(10)
+    # Per-host politeness is enforced by the crawl scheduler; this only bounds the run.
+    semaphore = asyncio.Semaphore(settings.scrape_max_concurrency)
 
     async def process_gym(url: str, gym_type: str):
-        nonlocal created, updated, total
+        nonlocal created, updated, total, failed
         async with semaphore:
             existing = db.query(Gym).filter(Gym.url == url).first()
-            gym = await update_or_create_gym_from_scraping(db, url, gym_type, redis)
+            try:
+                gym = await update_or_create_gym_from_scraping(
+                    db, url, gym_type, redis, refresh=refresh, invalidate=False
+                )
+            except Exception as exc:
+                # One broken page must not abort the whole network sync.
+                db.rollback()
+                failed += 1
+                logger.warning("Gym scrape failed for %s: %s", url, exc)
+                if progress is not None:
+                    await progress.advance(item=url, error=str(exc) or exc.__class__.__name__)
+                return None
             total += 1
             if existing:
                 updated += 1
             else:
                 created += 1
+            if progress is not None:
+                await progress.advance(item=url)
             return gym
 
     tasks = []
     for gym_type in LISTING_URLS.keys():
-        urls = await scrape_listing_urls(gym_type)
+        urls = await scrape_listing_urls(gym_type, redis)
+        if progress is not None:
+            await progress.add_total(len(urls))
         for url in urls:
             tasks.append(process_gym(url, gym_type))
 
     if tasks:
         await asyncio.gather(*tasks)
+    if total:
+        # Once for the whole batch rather than once per gym.
+        await _invalidate_gym_caches(redis)
+
+    return {"total": total, "created": created, "updated": updated, "failed": failed}
+
+
+async def sync_all_gyms(
+    db: Session, redis: Optional[Redis] = None, *, progress: Optional[ProgressReporter] = None
+) -> dict[str, int]:
+    """Import the gyms returned by ``app.scrapers`` (matched on name, brand and city)."""
+    gyms_payload = sync_all.sync_all_sources()
+    if progress is not None:
+        await progress.add_total(len(gyms_payload))
+    created = 0
+    updated = 0
 
-    return {"total": total, "created": created, "updated": updated}
+    for gym_data in gyms_payload:
+        brand = gym_data.get("brand")
+        gym_data["logo_url"] = await get_gym_logo(brand or "", redis)
+        gym_data["last_synced"] = datetime.utcnow()
+
+        existing = (
+            db.query(Gym)
+            .filter(Gym.name == gym_data.get("name"))
+            .filter(Gym.brand == gym_data.get("brand"))
+            .filter(Gym.city == gym_data.get("city"))
+            .first()
+        )
+
+        if existing:
+            for field, value in gym_data.items():
+                setattr(existing, field, value)
+            updated += 1
+        else:
+            db.add(
+                Gym(
+                    **gym_data,
+                )
+            )
+            created += 1
+        if progress is not None:
+            await progress.advance(item=gym_data.get("name"))
+
+    db.commit()
+    await _invalidate_gym_caches(redis)
+    return {"created": created, "updated": updated}
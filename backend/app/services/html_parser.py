@@ -0,0 +1,76 @@
+"""HTML parsing for the scrapers, with a configurable backend.
+
+``HTML_PARSER`` selects how pages are turned into BeautifulSoup trees:
+
+* ``lxml`` (default): BeautifulSoup on the lxml tree builder, several times
+  faster than the pure-Python ``html.parser``;
+* ``selectolax``: the Lexbor engine of ``selectolax`` cuts the requested tags out
+  of the page, and only that fragment is handed to BeautifulSoup;
+* ``html.parser``: the standard library parser, always available.
+
+A backend whose package is not installed falls back to ``html.parser``. Callers
+pass the tag names they read (``tags=("meta", "img")``) so the tree only holds
+those elements; leave ``tags`` unset when the scraper relies on ancestors, e.g.
+descendant CSS selectors such as ``.horaires li``.
+"""
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _available(backend: str) -> bool:
+    try:
+        if backend == "lxml":
+            import lxml  # noqa: F401
+        elif backend == "selectolax":
+            import selectolax  # noqa: F401
+    except ImportError:
+        logger.warning("HTML parser backend %s is not installed, using html.parser", backend)
+        return False
+    return True
+
+
+def get_backend() -> str:
+    backend = settings.html_parser
+    return backend if _available(backend) else "html.parser"
+
+
+def _tree_builder() -> str:
+    return "lxml" if _available("lxml") else "html.parser"
+
+
+def _selectolax_fragment(html: str, tags: frozenset[str]) -> str:
+    from selectolax.lexbor import LexborHTMLParser
+
+    parts = []
+    for node in LexborHTMLParser(html).css(", ".join(sorted(tags))):
+        parent = node.parent
+        while parent is not None and parent.tag not in tags:
+            parent = parent.parent
+        # A matched ancestor already carries this node in its own markup.
+        if parent is None:
+            parts.append(node.html or "")
+    return "".join(parts)
+
+
+def parse_html(html: str, tags: Optional[Iterable[str]] = None) -> BeautifulSoup:
+    """Parse ``html``, keeping only the elements named in ``tags`` when given."""
+    backend = get_backend()
+    wanted = frozenset(tags) if tags else None
+
+    if backend == "selectolax":
+        if wanted is None:
+            return BeautifulSoup(html, _tree_builder())
+        return BeautifulSoup(_selectolax_fragment(html, wanted), "html.parser")
+
+    parse_only = SoupStrainer(list(wanted)) if wanted else None
+    return BeautifulSoup(html, backend, parse_only=parse_only)
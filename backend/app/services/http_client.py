@@ -0,0 +1,86 @@
+"""Application-wide pooled HTTP client for outbound calls (scrapers, SerpAPI).
+
+``start_http_client`` runs in the startup event and ``close_http_client`` on
+shutdown, so connections (and their TLS sessions) are kept alive and reused
+across requests. ``fetch`` additionally caps concurrent requests per host
+(``HTTP_MAX_CONNECTIONS_PER_HOST``) so one slow site cannot take the whole pool.
+HTTP/2 is used when ``HTTP2=true`` and the ``h2`` package is installed.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "FitideaBot/1.0"
+
+_client: Optional[httpx.AsyncClient] = None
+_host_slots: dict[str, asyncio.Semaphore] = {}
+
+
+def _http2_enabled() -> bool:
+    if not settings.http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2 is enabled but the 'h2' package is missing; falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def _create_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_seconds,
+    )
+    return httpx.AsyncClient(limits=limits, http2=_http2_enabled(), headers={"User-Agent": USER_AGENT})
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_slots.clear()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it when used outside the app lifecycle (scripts)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+def _host_slot(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc.lower()
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = _host_slots[host] = asyncio.Semaphore(settings.http_max_connections_per_host)
+    return slot
+
+
+async def fetch(url: str, **kwargs: Any) -> httpx.Response:
+    """``GET`` ``url`` through the shared pool, at most N concurrent requests per host.
+
+    Keyword arguments are passed to ``httpx.AsyncClient.get`` (``params``,
+    ``headers``, ``timeout``, ``follow_redirects``...).
+    """
+    async with _host_slot(url):
+        return await get_http_client().get(url, **kwargs)
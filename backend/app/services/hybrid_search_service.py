@@ -0,0 +1,78 @@
+"""Helpers for searches answered by both the catalog and SerpAPI.
+
+A live SerpAPI call costs hundreds of milliseconds, so the product search starts
+it speculatively, next to the database query, when the same filters found
+nothing in the catalog recently (``is_known_miss``). Misses are remembered per
+filter signature under a namespace version that ingestion bumps, so a product
+added to the catalog stops the speculation immediately.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Iterable, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.services.cache_service import bump_cache_version, get_cache, get_cache_version, set_cache
+from app.services.product_dedup_service import canonicalize_url
+
+CACHE_PREFIX = "search_miss:"
+
+
+async def _miss_key(redis: Optional[Redis], filters: dict[str, Any]) -> str:
+    signature = hashlib.sha1(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()
+    version = await get_cache_version(redis, CACHE_PREFIX.rstrip(":"))
+    return f"{CACHE_PREFIX}v{version}:{signature}"
+
+
+async def is_known_miss(redis: Optional[Redis], filters: dict[str, Any]) -> bool:
+    """Return whether the catalog recently had no match for ``filters``."""
+    if redis is None:
+        return False
+    return bool(await get_cache(redis, await _miss_key(redis, filters)))
+
+
+async def remember_miss(redis: Optional[Redis], filters: dict[str, Any]) -> None:
+    if redis is None:
+        return
+    await set_cache(redis, await _miss_key(redis, filters), 1, expire_seconds=settings.search_miss_cache_seconds)
+
+
+async def invalidate_search_misses(redis: Optional[Redis]) -> None:
+    """Forget every remembered miss; call after adding products to the catalog."""
+    await bump_cache_version(redis, CACHE_PREFIX.rstrip(":"))
+
+
+def _merge_key(url: Optional[str]) -> Optional[str]:
+    """Canonical URL of an item, ignoring its scheme and a ``www.`` host prefix."""
+    if not url or not url.strip():
+        return None
+    parts = urlsplit(canonicalize_url(url))
+    return urlunsplit(("", parts.netloc.removeprefix("www."), parts.path, parts.query, ""))
+
+
+def merge_items(
+    db_items: Iterable[dict[str, Any]],
+    live_items: Iterable[dict[str, Any]],
+    limit: int,
+) -> tuple[list[dict[str, Any]], int]:
+    """Merge catalog and live items into one page, catalog first, de-duplicated by canonical URL.
+
+    Returns the page and the number of live items dropped as duplicates.
+    """
+    merged: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    duplicates = 0
+    for source_items, is_live in ((db_items, False), (live_items, True)):
+        for item in source_items:
+            key = _merge_key(item.get("url"))
+            if key is not None and key in seen:
+                duplicates += is_live
+                continue
+            if key is not None:
+                seen.add(key)
+            merged.append(item)
+    return merged[:limit], duplicates
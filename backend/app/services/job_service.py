@@ -0,0 +1,154 @@
+"""Background jobs for long scraping and sync work, with state in Redis.
+
+Routes enqueue the work with ``start_job`` and answer ``202`` with the job id
+right away; the work runs as a task of the worker that accepted it, with its
+own database session. Its state (status, progress counts, errors, result) is
+saved under ``job:<id>`` so ``GET /jobs/{id}`` can be answered by any worker.
+Without Redis the state only lives in the accepting worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from redis.asyncio import Redis
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.schemas.job import JobAccepted
+from app.services.cache_service import get_cache, set_cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "job:"
+MAX_ERRORS = 100
+SAVE_INTERVAL_SECONDS = 0.5
+LOCAL_JOBS_LIMIT = 1000
+
+# Last known state of the jobs started by this worker, used when Redis is unavailable.
+_local_jobs: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_running: set[asyncio.Task] = set()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def _save(redis: Optional[Redis], job: dict[str, Any]) -> None:
+    _local_jobs[job["id"]] = job
+    _local_jobs.move_to_end(job["id"])
+    while len(_local_jobs) > LOCAL_JOBS_LIMIT:
+        _local_jobs.popitem(last=False)
+    await set_cache(redis, f"{CACHE_PREFIX}{job['id']}", job, expire_seconds=settings.job_ttl_seconds)
+
+
+async def get_job(redis: Optional[Redis], job_id: str) -> Optional[dict[str, Any]]:
+    job = await get_cache(redis, f"{CACHE_PREFIX}{job_id}")
+    if isinstance(job, dict):
+        return job
+    return _local_jobs.get(job_id)
+
+
+class ProgressReporter:
+    """Progress reporter handed to the job's work function."""
+
+    def __init__(self, redis: Optional[Redis], job: dict[str, Any]):
+        self.redis = redis
+        self.job = job
+        self._saved_at = 0.0
+
+    async def _maybe_save(self) -> None:
+        # Progress is persisted at most every SAVE_INTERVAL_SECONDS; terminal states always are.
+        if time.monotonic() - self._saved_at >= SAVE_INTERVAL_SECONDS:
+            self._saved_at = time.monotonic()
+            await _save(self.redis, self.job)
+
+    async def add_total(self, count: int) -> None:
+        self.job["progress"]["total"] = (self.job["progress"]["total"] or 0) + count
+        await self._maybe_save()
+
+    async def advance(self, *, item: Optional[str] = None, error: Optional[str] = None) -> None:
+        """Count one processed item, as failed when ``error`` is given."""
+        progress = self.job["progress"]
+        progress["done"] += 1
+        if error is not None:
+            progress["failed"] += 1
+            if len(self.job["errors"]) < MAX_ERRORS:
+                self.job["errors"].append({"item": item, "error": error})
+        await self._maybe_save()
+
+
+JobWork = Callable[[Session, ProgressReporter], Awaitable[Any]]
+
+
+async def _run(
+    redis: Optional[Redis],
+    job: dict[str, Any],
+    work: JobWork,
+    session_factory: sessionmaker,
+) -> None:
+    job.update(status="running", started_at=_now())
+    await _save(redis, job)
+    progress = ProgressReporter(redis, job)
+    db = session_factory()
+    try:
+        result = await work(db, progress)
+    except asyncio.CancelledError:
+        job.update(status="failed", finished_at=_now())
+        job["errors"].append({"item": None, "error": "Job interrompu (arrêt du serveur)"})
+        await _save(redis, job)
+        raise
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job["id"], job["kind"])
+        job.update(status="failed", finished_at=_now())
+        job["errors"].append({"item": None, "error": str(exc) or exc.__class__.__name__})
+    else:
+        job.update(status="succeeded", finished_at=_now(), result=jsonable_encoder(result))
+    finally:
+        db.close()
+    await _save(redis, job)
+
+
+async def start_job(
+    redis: Optional[Redis],
+    kind: str,
+    work: JobWork,
+    session_factory: sessionmaker,
+) -> dict[str, Any]:
+    """Register a job, start ``work(db, progress)`` in the background and return the job."""
+    job = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": "queued",
+        "progress": {"total": None, "done": 0, "failed": 0},
+        "errors": [],
+        "result": None,
+        "created_at": _now(),
+        "started_at": None,
+        "finished_at": None,
+    }
+    await _save(redis, job)
+    task = asyncio.create_task(_run(redis, job, work, session_factory))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return job
+
+
+def job_accepted(job: dict[str, Any]) -> JobAccepted:
+    """Body of the ``202`` answer of an endpoint that enqueued ``job``."""
+    return JobAccepted(
+        job_id=job["id"], status=job["status"], status_url=f"{settings.api_prefix}/jobs/{job['id']}"
+    )
+
+
+async def cancel_jobs() -> None:
+    """Interrupt the jobs of this worker (application shutdown)."""
+    for task in list(_running):
+        task.cancel()
+    await asyncio.gather(*_running, return_exceptions=True)
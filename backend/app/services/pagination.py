@@ -0,0 +1,79 @@
+"""Offset and keyset (cursor) pagination helpers shared by list endpoints.
+
+Cursors are opaque, URL-safe tokens wrapping the primary key of the last row a
+client has seen. Both modes order rows by that key, newest first (ids are
+assigned in insertion order), so a client can switch from ``page`` to the
+``next_cursor`` of any page without skipping or repeating rows, and the
+primary-key index seeks straight to the next page.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy.orm import Query as OrmQuery
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(last_id: int) -> str:
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(payload["id"])
+    except (binascii.Error, ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursorError(cursor) from exc
+
+
+def cursor_param(
+    cursor: Optional[str] = Query(
+        None,
+        description="Curseur opaque renvoyé dans `next_cursor` ; remplace `page` quand il est fourni",
+    ),
+) -> Optional[int]:
+    """FastAPI dependency decoding the ``cursor`` query parameter."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def paginate(
+    query: OrmQuery,
+    *,
+    key_column: Any,
+    page_size: int,
+    page: int = 1,
+    cursor_id: Optional[int] = None,
+) -> tuple[list[Any], Optional[str]]:
+    """Fetch one page of ``query`` and the cursor of the page that follows.
+
+    Rows are ordered by ``key_column`` descending. With ``cursor_id`` the page is
+    read by keyset (``key_column < cursor_id``), which costs the same at any
+    depth; without it, the classic ``OFFSET`` page is returned. Both modes fetch
+    one extra row to know whether a ``next_cursor`` should be emitted.
+    """
+    query = query.order_by(key_column.desc())
+    if cursor_id is not None:
+        query = query.filter(key_column < cursor_id)
+    else:
+        query = query.offset((page - 1) * page_size)
+
+    rows = query.limit(page_size + 1).all()
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    return rows, encode_cursor(getattr(rows[-1], key_column.key))
@@ -0,0 +1,63 @@
+"""Run CPU-bound HTML extraction off the event loop.
+
+Parsing a multi-megabyte page takes long enough to stall every other request
+of the worker, so scrapers hand their extraction function to ``run_parser``:
+
+* pages up to ``PARSE_INLINE_MAX_BYTES`` are parsed inline, where a pool round
+  trip would cost more than the parse itself;
+* larger pages go to a ``ProcessPoolExecutor`` of ``PARSE_WORKERS`` processes
+  (``PARSE_EXECUTOR=process``, default) or to a thread pool
+  (``PARSE_EXECUTOR=thread``, enough when the C parsers release the GIL).
+  ``PARSE_EXECUTOR=inline`` disables offloading.
+
+Functions sent to a process pool are pickled by reference: they must be
+module-level and take and return plain data (the HTML string, URLs, dicts).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[Executor] = None
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if settings.parse_executor == "thread":
+            _executor = ThreadPoolExecutor(max_workers=settings.parse_workers, thread_name_prefix="parse")
+        else:
+            _executor = ProcessPoolExecutor(max_workers=settings.parse_workers)
+    return _executor
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the pool workers; the next offloaded parse starts a new pool."""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_parser(func: Callable[..., T], html: str, *args: Any) -> T:
+    """Return ``func(html, *args)``, computed in the parse pool for large pages."""
+    if settings.parse_executor == "inline" or len(html) <= settings.parse_inline_max_bytes:
+        return func(html, *args)
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_executor(), partial(func, html, *args))
+    except BrokenProcessPool:
+        logger.warning("Parse pool crashed, restarting it and parsing %s inline", func.__name__)
+        shutdown_parse_pool()
+        return func(html, *args)
@@ -0,0 +1,107 @@
+"""Append-only price history of products.
+
+Ingestion calls ``record_prices`` for every scraped product; a row is only
+written when the price differs from the last one observed for that product and
+source, so a stable price costs nothing. ``price_history`` reads the series back
+downsampled to one ``min``/``max``/``last`` point per day or week; a bucket
+without any observation means the price did not change since the previous one.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable, Literal, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.price_observation import PriceObservation
+
+Bucket = Literal["day", "week"]
+
+
+def record_prices(db: Session, observations: Iterable[tuple[int, Optional[str], Optional[float]]]) -> int:
+    """Append ``(product_id, source, price)`` observations whose price changed.
+
+    The caller commits. Returns the number of rows added.
+    """
+    latest_price: dict[tuple[int, Optional[str]], Optional[float]] = {}
+    for product_id, source, price in observations:
+        if price is not None:
+            latest_price[(product_id, source)] = float(price)
+    if not latest_price:
+        return 0
+
+    product_ids = {product_id for product_id, _source in latest_price}
+    last_ids = (
+        db.query(func.max(PriceObservation.id))
+        .filter(PriceObservation.product_id.in_(product_ids))
+        .group_by(PriceObservation.product_id, PriceObservation.source)
+    )
+    previous = {
+        (product_id, source): price
+        for product_id, source, price in db.query(
+            PriceObservation.product_id, PriceObservation.source, PriceObservation.price
+        ).filter(PriceObservation.id.in_(last_ids.scalar_subquery()))
+    }
+
+    added = [
+        PriceObservation(product_id=product_id, source=source, price=price)
+        for (product_id, source), price in latest_price.items()
+        if previous.get((product_id, source)) != price
+    ]
+    db.add_all(added)
+    return len(added)
+
+
+def _bucket_start(db: Session, bucket: Bucket) -> Any:
+    column = PriceObservation.observed_at
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date(func.date_trunc(bucket, column))
+    if bucket == "week":
+        # SQLite: back to the Monday of the week ("weekday 0" is the next Sunday).
+        return func.date(column, "weekday 0", "-6 days")
+    return func.date(column)
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def price_history(db: Session, product_id: int, bucket: Bucket = "day", days: int = 365) -> list[dict[str, Any]]:
+    """Return the downsampled price points of a product over the last ``days`` days."""
+    start = _bucket_start(db, bucket).label("start")
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    rows = (
+        db.query(
+            start,
+            func.min(PriceObservation.price),
+            func.max(PriceObservation.price),
+            func.max(PriceObservation.id),
+            func.count(),
+        )
+        .filter(PriceObservation.product_id == product_id, PriceObservation.observed_at >= since)
+        .group_by(start)
+        .order_by(start)
+        .all()
+    )
+    if not rows:
+        return []
+
+    last_ids = [last_id for _start, _min, _max, last_id, _count in rows]
+    last_prices = dict(
+        db.query(PriceObservation.id, PriceObservation.price).filter(PriceObservation.id.in_(last_ids))
+    )
+    return [
+        {
+            "start": _as_date(bucket_start),
+            "min": low,
+            "max": high,
+            "last": last_prices[last_id],
+            "count": count,
+        }
+        for bucket_start, low, high, last_id, count in rows
+    ]
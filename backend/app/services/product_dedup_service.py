@@ -0,0 +1,183 @@
+"""Cross-source de-duplication of scraped products.
+
+Two layers keep the catalog small:
+
+* ``canonicalize_url`` gives every page one spelling (lower-case host, no
+  default port, no fragment, tracking parameters removed, sorted query, Amazon
+  pages reduced to ``/dp/<ASIN>`` without their affiliate parameters), so
+  re-ingesting a link shared with ``?utm_source=...`` updates the existing
+  product;
+* ``blocking_key`` groups listings of the same item across shops: normalized
+  brand, the remaining name tokens (sorted, without stop words, brand or size)
+  and the pack size converted to grams or millilitres. ``link_duplicates``
+  points every product of a group at the oldest one (``canonical_id``) and
+  turns the duplicates into offers of that canonical product.
+
+Listings, search, facets, comparison and favorites only work on canonical
+products (``canonical_id IS NULL``).
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from decimal import Decimal
+from typing import Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.models.offer import Offer
+from app.models.product import Product
+
+TRACKING_PARAMS = {
+    "_ga",
+    "affid",
+    "dclid",
+    "fbclid",
+    "gclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "msclkid",
+    "srsltid",
+    "yclid",
+}
+TRACKING_PREFIXES = ("utm_",)
+# Only stripped on Amazon hosts: other shops may use these names for real variants.
+AMAZON_TRACKING_PARAMS = {"psc", "ref", "ref_", "tag", "th"}
+AMAZON_TRACKING_PREFIXES = ("pd_rd_", "pf_rd_")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+AMAZON_PRODUCT_PATH = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})(?:[/?]|$)", re.IGNORECASE)
+
+STOP_WORDS = {"a", "and", "avec", "de", "des", "du", "en", "et", "for", "la", "le", "les", "of", "pour", "the", "with"}
+SIZE_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)\s*(kg|gr|g|lbs|lb|ml|cl|l)\b")
+# Unit -> (base unit, factor to the base unit)
+SIZE_UNITS = {
+    "kg": ("g", 1000.0),
+    "g": ("g", 1.0),
+    "gr": ("g", 1.0),
+    "lb": ("g", 453.6),
+    "lbs": ("g", 453.6),
+    "l": ("ml", 1000.0),
+    "cl": ("ml", 10.0),
+    "ml": ("ml", 1.0),
+}
+WORD_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def canonicalize_url(url: str) -> str:
+    """Return the canonical spelling of a product page URL."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower().rstrip(".")
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    amazon = "amazon." in host
+    asin = AMAZON_PRODUCT_PATH.search(path) if amazon else None
+    if asin:
+        path = f"/dp/{asin.group(1).upper()}"
+    elif len(path) > 1:
+        path = path.rstrip("/")
+
+    dropped, dropped_prefixes = TRACKING_PARAMS, TRACKING_PREFIXES
+    if amazon:
+        dropped, dropped_prefixes = dropped | AMAZON_TRACKING_PARAMS, dropped_prefixes + AMAZON_TRACKING_PREFIXES
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in dropped and not key.lower().startswith(dropped_prefixes)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def _normalize(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _size(name: str) -> Optional[str]:
+    match = SIZE_PATTERN.search(name)
+    if not match:
+        return None
+    base, factor = SIZE_UNITS[match.group(2)]
+    return f"{round(float(match.group(1).replace(',', '.')) * factor)}{base}"
+
+
+def blocking_key(name: Optional[str], brand: Optional[str]) -> Optional[str]:
+    """Return ``brand|tokens|size`` for a product, ``None`` when it cannot be grouped safely."""
+    if not name or not brand:
+        return None
+    normalized_brand = " ".join(WORD_PATTERN.findall(_normalize(brand)))
+    normalized_name = _normalize(name)
+    brand_tokens = set(normalized_brand.split())
+    tokens = sorted(
+        {
+            token
+            for token in WORD_PATTERN.findall(SIZE_PATTERN.sub(" ", normalized_name))
+            if token not in STOP_WORDS and token not in brand_tokens and not token.isdigit()
+        }
+    )
+    if not normalized_brand or not tokens:
+        return None
+    return f"{normalized_brand}|{' '.join(tokens)}|{_size(normalized_name) or ''}"
+
+
+def canonical_only(query: Query) -> Query:
+    """Restrict a product query to canonical products."""
+    return query.filter(Product.canonical_id.is_(None))
+
+
+def resolve_canonical_ids(db: Session, product_ids: Iterable[int]) -> dict[int, int]:
+    """Map product ids to the id of their canonical product (unknown ids are left out)."""
+    rows = db.query(Product.id, Product.canonical_id).filter(Product.id.in_(set(product_ids)))
+    return {product_id: canonical_id or product_id for product_id, canonical_id in rows}
+
+
+def _offer_price(price: float) -> Decimal:
+    return Decimal(str(round(price, 2)))
+
+
+def link_duplicates(db: Session, products: Iterable[Product]) -> None:
+    """Compute blocking keys of freshly ingested products and link them to their canonical product.
+
+    Products must be flushed (have an id). A duplicate becomes an offer of its
+    canonical product, keyed on its URL. The caller commits.
+    """
+    products = list(products)
+    for product in products:
+        product.blocking_key = blocking_key(product.name, product.brand)
+    db.flush()
+
+    keys = {product.blocking_key for product in products if product.blocking_key}
+    first_ids = dict(
+        db.query(Product.blocking_key, func.min(Product.id))
+        .filter(Product.blocking_key.in_(keys), Product.canonical_id.is_(None))
+        .group_by(Product.blocking_key)
+    )
+    urls = [product.url for product in products if product.url]
+    offers = {offer.url: offer for offer in db.query(Offer).filter(Offer.url.in_(urls))} if urls else {}
+
+    for product in products:
+        first_id = first_ids.get(product.blocking_key)
+        product.canonical_id = first_id if first_id is not None and first_id < product.id else None
+
+        offer = offers.get(product.url)
+        if product.canonical_id is None:
+            if offer is not None and offer.favorites:
+                # Users saved this listing: it becomes an offer of its own, now canonical, product.
+                offer.product_id = product.id
+            elif offer is not None:
+                db.delete(offer)
+            continue
+        if product.price is None or not product.url:
+            continue
+        if offer is None:
+            offer = Offer(url=product.url)
+            db.add(offer)
+        offer.product_id = product.canonical_id
+        offer.title = product.source or urlsplit(product.url).hostname or product.name
+        offer.description = product.name
+        offer.price = _offer_price(product.price)
@@ -1,38 +1,224 @@
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Iterable, Optional
 
+from fastapi.concurrency import run_in_threadpool
 from redis.asyncio import Redis
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.db.upsert import upsert_insert
 from app.models.product import Product
+from app.services.facet_service import invalidate_facets
+from app.services.hybrid_search_service import invalidate_search_misses
+from app.services.price_history_service import record_prices
+from app.services.product_dedup_service import canonicalize_url, link_duplicates
+from app.services.response_cache import invalidate_route_cache
 from app.services.product_scraper_service import scrape_product
+from app.services.trigram_service import invalidate_trigram_indexes
 
+logger = logging.getLogger(__name__)
 
-async def ingest_product(url: str, source: str, db: Session, redis: Optional[Redis] = None) -> Product:
+# Columns kept from the existing row when a scrape did not find a value.
+COALESCED_COLUMNS = ("name", "description")
+UPSERT_COLUMNS = (
+    "name",
+    "description",
+    "price",
+    "brand",
+    "category",
+    "rating",
+    "reviews_count",
+    "images",
+    "source",
+)
+
+
+def _product_values(url: str, source: str, scraped: dict[str, Any]) -> dict[str, Any]:
+    values = {column: scraped.get(column) for column in UPSERT_COLUMNS}
+    values["source"] = scraped.get("source") or source
+    values["url"] = url
+    return values
+
+
+async def _invalidate_product_caches(redis: Optional[Redis]) -> None:
+    await invalidate_facets(redis, "products")
+    await invalidate_route_cache(redis, "products")
+    await invalidate_search_misses(redis)
+
+
+async def ingest_product(
+    url: str, source: str, db: Session, redis: Optional[Redis] = None, *, refresh: bool = False
+) -> Product:
     """
+    - Canonicalise l'URL (paramètres de tracking, hôte)
     - Scrape le produit
     - Normalise les données
     - Update ou create en base
+    - Rattache les doublons d'autres sources à leur produit canonique
+    - Historise le prix s'il a changé
     - Retourne le produit
     """
-    scraped = await scrape_product(url, source, redis)
+    url = canonicalize_url(url)
+    scraped = await scrape_product(url, source, redis, refresh=refresh)
 
     product = db.query(Product).filter(Product.url == url).first()
     if not product:
         product = Product(url=url)
         db.add(product)
 
-    product.name = scraped.get("name") or product.name
-    product.description = scraped.get("description") or product.description
-    product.price = scraped.get("price")
-    product.brand = scraped.get("brand")
-    product.category = scraped.get("category")
-    product.rating = scraped.get("rating")
-    product.reviews_count = scraped.get("reviews_count")
-    product.images = scraped.get("images")
-    product.source = scraped.get("source") or source
+    for column, value in _product_values(url, source, scraped).items():
+        if column in COALESCED_COLUMNS:
+            value = value or getattr(product, column)
+        setattr(product, column, value)
 
+    db.flush()
+    link_duplicates(db, [product])
+    record_prices(db, [(product.id, product.source, product.price)])
     db.commit()
     db.refresh(product)
+    await _invalidate_product_caches(redis)
     return product
+
+
+def upsert_products(db: Session, rows: list[dict[str, Any]]) -> dict[str, int]:
+    """Insert or update ``rows`` (keyed on ``Product.url``) in one statement; return ``{url: id}``.
+
+    The caller commits. Rows must have distinct URLs.
+    """
+    statement = upsert_insert(db.connection())(Product).values(rows)
+    updates = {
+        column: (
+            func.coalesce(statement.excluded[column], Product.__table__.c[column])
+            if column in COALESCED_COLUMNS
+            else statement.excluded[column]
+        )
+        for column in UPSERT_COLUMNS
+    }
+    statement = statement.on_conflict_do_update(index_elements=[Product.url], set_=updates).returning(
+        Product.id, Product.url
+    )
+    return {url: product_id for product_id, url in db.execute(statement)}
+
+
+def _flush_chunk(db: Session, chunk: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Persist scraped items of one chunk and return their results (one commit)."""
+    rows: dict[str, dict[str, Any]] = {}
+    for item in chunk:
+        rows[item["url"]] = _product_values(item["url"], item["source"], item["scraped"])
+
+    # ``name`` is required: a page without one can only refresh an existing product.
+    nameless = [url for url, row in rows.items() if not row["name"]]
+    if nameless:
+        for url, name in db.query(Product.url, Product.name).filter(Product.url.in_(nameless)):
+            rows[url]["name"] = name
+    missing = {url for url in nameless if not rows[url]["name"]}
+
+    results = [
+        {"url": item["url"], "source": item["source"], "product": None, "error": "Nom du produit introuvable"}
+        for item in chunk
+        if item["url"] in missing
+    ]
+    valid = [row for url, row in rows.items() if url not in missing]
+    if not valid:
+        return results
+
+    try:
+        ids = upsert_products(db, valid)
+        # The upsert bypassed the session: reload rows it may hold with stale values.
+        products = {
+            product.id: product
+            for product in db.query(Product).filter(Product.id.in_(ids.values())).populate_existing()
+        }
+        link_duplicates(db, products.values())
+        record_prices(db, [(ids[row["url"]], row["source"], row["price"]) for row in valid])
+        db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        logger.warning("Bulk product upsert failed: %s", exc)
+        return results + [
+            {"url": item["url"], "source": item["source"], "product": None, "error": "Échec de l'enregistrement"}
+            for item in chunk
+            if item["url"] not in missing
+        ]
+
+    return results + [
+        {"url": item["url"], "source": item["source"], "product": products[ids[item["url"]]], "error": None}
+        for item in chunk
+        if item["url"] not in missing
+    ]
+
+
+async def ingest_products(
+    items: Iterable[dict[str, Any]],
+    db: Session,
+    redis: Optional[Redis] = None,
+    *,
+    parallelism: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    refresh: bool = False,
+    eager: bool = False,
+) -> AsyncIterator[dict[str, Any]]:
+    """Scrape and persist many products, yielding one result per item in completion order.
+
+    At most ``parallelism`` pages are scraped at once. Scraped items are upserted
+    in chunks of ``chunk_size`` (one statement and one commit per chunk). Each
+    result is ``{"url", "source", "product", "error"}``; a failing item only
+    produces an ``error`` result and never stops the batch. ``eager`` persists
+    whatever finished after each wait instead of waiting for a full chunk, so
+    streaming clients see results as soon as they are saved.
+    """
+    parallelism = parallelism or settings.bulk_scrape_parallelism
+    chunk_size = chunk_size or settings.bulk_upsert_chunk_size
+
+    async def scrape(item: dict[str, Any]) -> dict[str, Any]:
+        return {**item, "scraped": await scrape_product(item["url"], item["source"], redis, refresh=refresh)}
+
+    queue = iter(items)
+    exhausted = False
+    pending: dict[asyncio.Task, dict[str, Any]] = {}
+    buffer: list[dict[str, Any]] = []
+    written = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) < parallelism:
+                raw = next(queue, None)
+                if raw is None:
+                    exhausted = True
+                    break
+                item = {"url": raw.get("url") and canonicalize_url(raw["url"]), "source": raw.get("source")}
+                if not item["url"] or not item["source"]:
+                    yield {**item, "product": None, "error": "`url` et `source` sont requis"}
+                    continue
+                pending[asyncio.create_task(scrape(item))] = item
+
+            if pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    item = pending.pop(task)
+                    try:
+                        buffer.append(task.result())
+                    except Exception as exc:  # A scraper failure only fails its own item.
+                        logger.warning("Bulk scrape failed for %s: %s", item["url"], exc)
+                        yield {**item, "product": None, "error": str(exc) or exc.__class__.__name__}
+
+            while len(buffer) >= chunk_size or (buffer and (eager or not pending)):
+                chunk, buffer = buffer[:chunk_size], buffer[chunk_size:]
+                # The ORM work of a chunk would otherwise block the event loop.
+                for result in await run_in_threadpool(_flush_chunk, db, chunk):
+                    written = written or result["product"] is not None
+                    yield result
+
+            if exhausted and not pending:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        if written:
+            invalidate_trigram_indexes()
+            await _invalidate_product_caches(redis)
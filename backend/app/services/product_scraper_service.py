@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 import httpx
 from bs4 import BeautifulSoup
@@ -9,6 +9,12 @@ from redis.asyncio import Redis
 
 from app.core.config import settings
 from app.services.cache_service import get_cache, set_cache
+from app.services.conditional_fetch import fetch_page
+from app.services.crawl_scheduler import polite_fetch
+from app.services.html_parser import parse_html
+from app.services.parse_pool import run_parser
+from app.services.http_client import fetch
+from app.services.single_flight import single_flight
 
 DEFAULT_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
 CACHE_EXPIRE_SECONDS = 60 * 60 * 24
@@ -18,11 +24,10 @@ class ProductScraperError(Exception):
     """Raised when scraping fails."""
 
 
-async def _fetch_html(url: str) -> str:
-    async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, follow_redirects=True) as client:
-        response = await client.get(url, headers={"User-Agent": "FitideaBot/1.0"})
-        response.raise_for_status()
-        return response.text
+async def _fetch_html(url: str, redis: Optional[Redis] = None) -> str:
+    response = await polite_fetch(url, redis=redis, timeout=DEFAULT_TIMEOUT, follow_redirects=True)
+    response.raise_for_status()
+    return response.text
 
 
 def _to_float(value: Any) -> Optional[float]:
@@ -66,17 +71,13 @@ def _parse_common_fields(soup: BeautifulSoup) -> Dict[str, Any]:
     }
 
 
-async def _scrape_generic(url: str, source: str) -> Dict[str, Any]:
-    html = await _fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_generic(soup: BeautifulSoup, url: str, source: str) -> Dict[str, Any]:
     payload = _parse_common_fields(soup)
     payload.update({"url": url, "source": source})
     return payload
 
 
-async def _scrape_decathlon(url: str) -> Dict[str, Any]:
-    html = await _fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_decathlon(soup: BeautifulSoup, url: str, source: str) -> Dict[str, Any]:
     payload = _parse_common_fields(soup)
     brand_tag = soup.find("meta", property="product:brand")
     category_tag = soup.find("meta", property="product:category")
@@ -91,9 +92,7 @@ async def _scrape_decathlon(url: str) -> Dict[str, Any]:
     return payload
 
 
-async def _scrape_myprotein(url: str) -> Dict[str, Any]:
-    html = await _fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_myprotein(soup: BeautifulSoup, url: str, source: str) -> Dict[str, Any]:
     payload = _parse_common_fields(soup)
     brand = soup.find("meta", property="product:brand")
     nutrition_block = soup.find("div", class_=re.compile("nutrition|macros", re.IGNORECASE))
@@ -109,22 +108,45 @@ async def _scrape_myprotein(url: str) -> Dict[str, Any]:
     return payload
 
 
-async def _scrape_prozis(url: str) -> Dict[str, Any]:
-    html = await _fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_prozis(soup: BeautifulSoup, url: str, source: str) -> Dict[str, Any]:
     payload = _parse_common_fields(soup)
     payload.update({"brand": "Prozis", "source": "Prozis", "url": url})
     return payload
 
 
-async def _scrape_gymshark(url: str) -> Dict[str, Any]:
-    html = await _fetch_html(url)
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_gymshark(soup: BeautifulSoup, url: str, source: str) -> Dict[str, Any]:
     payload = _parse_common_fields(soup)
     payload.update({"brand": "Gymshark", "source": "Gymshark", "url": url, "category": "vêtements"})
     return payload
 
 
+PARSERS: Dict[str, Callable[[BeautifulSoup, str, str], Dict[str, Any]]] = {
+    "decathlon": _parse_decathlon,
+    "myprotein": _parse_myprotein,
+    "prozis": _parse_prozis,
+    "gymshark": _parse_gymshark,
+}
+
+# Elements each parser reads; everything else is left out of the tree.
+COMMON_TAGS = ("meta", "img")
+PARSER_TAGS: Dict[Callable[[BeautifulSoup, str, str], Dict[str, Any]], tuple[str, ...]] = {
+    _parse_myprotein: (*COMMON_TAGS, "div"),
+}
+
+
+def _extract_product(html: str, url: str, source: str) -> Dict[str, Any]:
+    """Parse a shop page with the parser of ``source`` (runs in the parse pool)."""
+    normalized_source = (source or "").lower()
+    parser = next((parser for name, parser in PARSERS.items() if name in normalized_source), _parse_generic)
+    return parser(parse_html(html, PARSER_TAGS.get(parser, COMMON_TAGS)), url, source)
+
+
+def _extract_amazon(html: str, url: str) -> Dict[str, Any]:
+    payload = _parse_common_fields(parse_html(html, COMMON_TAGS))
+    payload.update({"source": "Amazon", "url": url})
+    return payload
+
+
 async def _scrape_amazon_with_serpapi(url: str) -> Dict[str, Any]:
     if not settings.serpapi_key:
         raise ProductScraperError("SERPAPI_KEY is not configured")
@@ -134,10 +156,9 @@ async def _scrape_amazon_with_serpapi(url: str) -> Dict[str, Any]:
         "engine": "amazon_product",
         "product_url": url,
     }
-    async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-        response = await client.get("https://serpapi.com/search.json", params=params)
-        response.raise_for_status()
-        data = response.json()
+    response = await fetch("https://serpapi.com/search.json", params=params, timeout=DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
 
     return {
         "name": data.get("title"),
@@ -153,37 +174,44 @@ async def _scrape_amazon_with_serpapi(url: str) -> Dict[str, Any]:
     }
 
 
-async def _scrape_amazon(url: str) -> Dict[str, Any]:
+async def _scrape_amazon(url: str, redis: Optional[Redis] = None) -> Dict[str, Any]:
     try:
         return await _scrape_amazon_with_serpapi(url)
     except Exception:
-        html = await _fetch_html(url)
-        soup = BeautifulSoup(html, "html.parser")
-        payload = _parse_common_fields(soup)
-        payload.update({"source": "Amazon", "url": url})
-        return payload
+        html = await _fetch_html(url, redis)
+        return await run_parser(_extract_amazon, html, url)
 
 
-async def scrape_product(url: str, source: str, redis: Optional[Redis] = None) -> Dict[str, Any]:
+async def scrape_product(
+    url: str, source: str, redis: Optional[Redis] = None, *, refresh: bool = False
+) -> Dict[str, Any]:
+    """Scrape a product page, served from the cache unless ``refresh`` is set.
+
+    Refreshing a cached page is a conditional request: when the shop answers
+    ``304 Not Modified`` the cached result is kept and its TTL extended.
+    """
     cache_key = f"product:{source}:{url}"
     cached = await get_cache(redis, cache_key)
-    if cached:
+    if cached and not refresh:
         return cached
 
-    normalized_source = (source or "").lower()
-    if "decathlon" in normalized_source:
-        scraper = _scrape_decathlon
-    elif "myprotein" in normalized_source:
-        scraper = _scrape_myprotein
-    elif "prozis" in normalized_source:
-        scraper = _scrape_prozis
-    elif "amazon" in normalized_source:
-        scraper = _scrape_amazon
-    elif "gymshark" in normalized_source:
-        scraper = _scrape_gymshark
-    else:
-        scraper = _scrape_generic
-
-    result = await scraper(url)
-    await set_cache(redis, cache_key, result, expire_seconds=CACHE_EXPIRE_SECONDS)
-    return result
+    async def scrape_and_store() -> Dict[str, Any]:
+        if "amazon" in (source or "").lower():
+            result = await _scrape_amazon(url, redis)
+        else:
+            html = await fetch_page(
+                url,
+                redis,
+                cache_key,
+                expire_seconds=CACHE_EXPIRE_SECONDS,
+                revalidate=bool(cached),
+                timeout=DEFAULT_TIMEOUT,
+                follow_redirects=True,
+            )
+            if html is None:
+                return cached
+            result = await run_parser(_extract_product, html, url, source)
+        await set_cache(redis, cache_key, result, expire_seconds=CACHE_EXPIRE_SECONDS)
+        return result
+
+    return await single_flight(cache_key, scrape_and_store, redis=redis, fresh=refresh)
@@ -0,0 +1,77 @@
+"""Full-text search helpers for the product catalog.
+
+The index itself is maintained by the database (see ``app.db.search_index``);
+this module only translates a user query into the dialect-specific filter and
+relevance expression.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Optional
+
+from sqlalchemy import Float, Integer, func, literal_column, or_, text
+from sqlalchemy.orm import Query
+
+from app.db.search_index import FTS_TABLE, TEXT_SEARCH_CONFIG
+from app.models.product import Product
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# bm25 column weights, in FTS table column order: name, brand, description
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+
+# Both dialects match every token of the query as a prefix ("whe" finds "Whey");
+# operators typed by users are treated as text.
+def _fts5_match_expression(q: str) -> Optional[str]:
+    tokens = TOKEN_PATTERN.findall(q)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _tsquery_expression(q: str) -> Optional[str]:
+    tokens = TOKEN_PATTERN.findall(q)
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def apply_full_text_search(query: Query, q: str) -> tuple[Query, Optional[Any]]:
+    """Restrict ``query`` to products matching ``q``.
+
+    Returns the filtered query and an ``ORDER BY`` clause ranking the matches by
+    relevance (``ts_rank_cd`` on PostgreSQL, ``bm25`` on SQLite). Dialects without
+    a full-text index fall back to ``ILIKE`` and no relevance clause.
+    """
+    dialect = query.session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        expression = _tsquery_expression(q)
+        if expression is None:
+            return query, None
+        ts_query = func.to_tsquery(TEXT_SEARCH_CONFIG, expression)
+        search_vector = literal_column("products.search_vector")
+        query = query.filter(search_vector.op("@@")(ts_query))
+        return query, func.ts_rank_cd(search_vector, ts_query).desc()
+
+    if dialect == "sqlite":
+        match = _fts5_match_expression(q)
+        if match is None:
+            return query, None
+        weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+        matches = (
+            text(
+                f"SELECT rowid AS product_id, bm25({FTS_TABLE}, {weights}) AS rank "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+            )
+            .bindparams(match=match)
+            .columns(product_id=Integer, rank=Float)
+            .subquery("fts_matches")
+        )
+        query = query.join(matches, matches.c.product_id == Product.id)
+        # bm25() returns lower (more negative) scores for better matches.
+        return query, matches.c.rank.asc()
+
+    like_pattern = f"%{q}%"
+    query = query.filter(or_(Product.name.ilike(like_pattern), Product.description.ilike(like_pattern)))
+    return query, None
@@ -0,0 +1,114 @@
+"""Product summary projection: offer and favorite aggregates stored per product.
+
+``product_summaries`` holds, for each product, its cheapest offer (price and
+id), its offer and favorite counts and the time of its last price change. Read
+paths (listings, comparison, favorites) use it instead of loading and sorting
+offers on every request.
+
+The projection is maintained inside the writing transaction: after each flush
+the summaries of the products whose offers, favorites or price observations
+changed are recomputed in SQL, so every writer (routes, ingestion, seeds) keeps
+it current without extra calls.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.history import history_values
+from app.db.upsert import upsert_insert
+from app.models.favorite import Favorite
+from app.models.offer import Offer
+from app.models.price_observation import PriceObservation
+from app.models.product import Product
+from app.models.product_summary import ProductSummary
+
+products = Product.__table__
+offers = Offer.__table__
+favorites = Favorite.__table__
+observations = PriceObservation.__table__
+summaries = ProductSummary.__table__
+
+
+def refresh_product_summaries(connection: Connection, product_ids: Iterable[int]) -> None:
+    """Recompute the summaries of ``product_ids`` from offers, favorites and price observations."""
+    ids = sorted(set(product_ids))
+    if not ids:
+        return
+
+    for_product = offers.c.product_id == products.c.id
+    computed = select(
+        products.c.id,
+        select(func.min(offers.c.price)).where(for_product).scalar_subquery(),
+        select(offers.c.id).where(for_product).order_by(offers.c.price, offers.c.id).limit(1).scalar_subquery(),
+        select(func.count()).select_from(offers).where(for_product).scalar_subquery(),
+        select(func.count())
+        .select_from(favorites.join(offers, favorites.c.offer_id == offers.c.id))
+        .where(for_product)
+        .scalar_subquery(),
+        select(func.max(observations.c.observed_at))
+        .where(observations.c.product_id == products.c.id)
+        .scalar_subquery(),
+    ).where(products.c.id.in_(ids))
+
+    columns = [
+        summaries.c.product_id,
+        summaries.c.min_offer_price,
+        summaries.c.min_offer_id,
+        summaries.c.offer_count,
+        summaries.c.favorite_count,
+        summaries.c.last_price_change_at,
+    ]
+    # Upsert rather than delete + insert: concurrent writers of the same product
+    # would otherwise both insert its row and one would hit the primary key.
+    statement = upsert_insert(connection)(summaries).from_select(columns, computed)
+    statement = statement.on_conflict_do_update(
+        index_elements=[summaries.c.product_id],
+        set_={
+            **{column.name: statement.excluded[column.name] for column in columns[1:]},
+            "updated_at": func.now(),
+        },
+    )
+    connection.execute(statement)
+    # Summaries of deleted products (when the database does not cascade).
+    connection.execute(
+        delete(summaries).where(
+            summaries.c.product_id.in_(ids),
+            summaries.c.product_id.not_in(select(products.c.id).where(products.c.id.in_(ids))),
+        )
+    )
+
+
+def _touched_products(session: Session) -> set[int]:
+    product_ids: set[int] = set()
+    offer_ids: set[int] = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Offer):
+            # Both the old and the new product when an offer moves.
+            product_ids |= history_values(instance, "product_id")
+        elif isinstance(instance, Favorite):
+            offer_ids |= history_values(instance, "offer_id")
+        elif isinstance(instance, PriceObservation) and instance.product_id is not None:
+            product_ids.add(instance.product_id)
+    if offer_ids:
+        product_ids.update(
+            session.connection().execute(select(offers.c.product_id).where(offers.c.id.in_(offer_ids))).scalars()
+        )
+    return product_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_on_write(session: Session, flush_context) -> None:
+    product_ids = _touched_products(session)
+    if not product_ids:
+        return
+    refresh_product_summaries(session.connection(), product_ids)
+    # Drop stale copies loaded earlier in this session.
+    for instance in list(session.identity_map.values()):
+        if isinstance(instance, ProductSummary) and instance.product_id in product_ids:
+            session.expire(instance)
+        elif isinstance(instance, Product) and instance.id in product_ids:
+            session.expire(instance, ["summary"])
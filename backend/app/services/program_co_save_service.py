@@ -0,0 +1,164 @@
+"""Item-to-item collaborative filtering over saved workout programs.
+
+``favorite_programs`` is the sparse user x program matrix. ``program_co_saves``
+stores its co-occurrence, for each pair of programs saved by at least one
+common user: ``count`` users saved both and ``score`` is their cosine
+similarity, ``count / sqrt(saves(a) * saves(b))``. Pairs are stored in both
+directions so "users who saved this also saved" is a single index range scan
+on ``(program_id, score)``.
+
+Counts are updated incrementally inside the writing transaction: after each
+flush that adds or removes favorites, only the pairs of the affected users
+change, by a delta applied in SQL (``count = count + delta``), and only the
+scores of the programs whose save count moved are recomputed.
+"""
+from __future__ import annotations
+
+import math
+from itertools import permutations
+from typing import Iterable
+
+from sqlalchemy import and_, bindparam, delete, event, func, insert, select, tuple_, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, contains_eager
+
+from app.db.upsert import upsert_insert
+from app.models.program_co_save import ProgramCoSave
+from app.models.training import Coach, FavoriteProgram, WorkoutProgram
+
+favorites = FavoriteProgram.__table__
+co_saves = ProgramCoSave.__table__
+
+
+def _save_counts(connection: Connection, program_ids: Iterable[int]) -> dict[int, int]:
+    return dict(
+        connection.execute(
+            select(favorites.c.program_id, func.count())
+            .where(favorites.c.program_id.in_(set(program_ids)))
+            .group_by(favorites.c.program_id)
+        ).all()
+    )
+
+
+def rescore_programs(connection: Connection, program_ids: Iterable[int]) -> None:
+    """Recompute the cosine score of every pair involving ``program_ids``."""
+    program_ids = set(program_ids)
+    if not program_ids:
+        return
+    rows = connection.execute(
+        select(co_saves.c.program_id, co_saves.c.other_id, co_saves.c.count).where(
+            co_saves.c.program_id.in_(program_ids) | co_saves.c.other_id.in_(program_ids)
+        )
+    ).all()
+    if not rows:
+        return
+    saves = _save_counts(connection, {program_id for row in rows for program_id in row[:2]})
+    connection.execute(
+        update(co_saves)
+        .where(co_saves.c.program_id == bindparam("a"), co_saves.c.other_id == bindparam("b"))
+        .values(score=bindparam("new_score")),
+        [
+            {"a": a, "b": b, "new_score": count / math.sqrt(saves.get(a, 0) * saves.get(b, 0) or 1)}
+            for a, b, count in rows
+        ],
+    )
+
+
+def rebuild_co_saves(connection: Connection) -> None:
+    """Recompute the whole co-occurrence table from ``favorite_programs``."""
+    first, second = favorites.alias("first"), favorites.alias("second")
+    pairs = connection.execute(
+        select(first.c.program_id, second.c.program_id, func.count())
+        .select_from(
+            first.join(
+                second,
+                and_(first.c.user_id == second.c.user_id, first.c.program_id != second.c.program_id),
+            )
+        )
+        .group_by(first.c.program_id, second.c.program_id)
+    ).all()
+    connection.execute(delete(co_saves))
+    if not pairs:
+        return
+    saves = _save_counts(connection, {program_id for a, b, _count in pairs for program_id in (a, b)})
+    connection.execute(
+        insert(co_saves),
+        [
+            {"program_id": a, "other_id": b, "count": count, "score": count / math.sqrt(saves[a] * saves[b])}
+            for a, b, count in pairs
+        ],
+    )
+
+
+def apply_favorite_changes(
+    connection: Connection, added: Iterable[tuple[int, int]], removed: Iterable[tuple[int, int]]
+) -> None:
+    """Update co-occurrences after flushed ``(user_id, program_id)`` favorites were added or removed."""
+    added_by_user: dict[int, set[int]] = {}
+    removed_by_user: dict[int, set[int]] = {}
+    for user_id, program_id in added:
+        added_by_user.setdefault(user_id, set()).add(program_id)
+    for user_id, program_id in removed:
+        removed_by_user.setdefault(user_id, set()).add(program_id)
+    user_ids = set(added_by_user) | set(removed_by_user)
+    if not user_ids:
+        return
+
+    saved: dict[int, set[int]] = {user_id: set() for user_id in user_ids}
+    for user_id, program_id in connection.execute(
+        select(favorites.c.user_id, favorites.c.program_id).where(favorites.c.user_id.in_(user_ids))
+    ):
+        saved[user_id].add(program_id)
+
+    deltas: dict[tuple[int, int], int] = {}
+    for user_id, after in saved.items():
+        before = (after - added_by_user.get(user_id, set())) | removed_by_user.get(user_id, set())
+        for pair in set(permutations(after, 2)) - set(permutations(before, 2)):
+            deltas[pair] = deltas.get(pair, 0) + 1
+        for pair in set(permutations(before, 2)) - set(permutations(after, 2)):
+            deltas[pair] = deltas.get(pair, 0) - 1
+    deltas = {pair: delta for pair, delta in deltas.items() if delta}
+
+    if deltas:
+        # Applied in SQL so concurrent saves add up instead of overwriting each other.
+        upsert = upsert_insert(connection)(co_saves)
+        connection.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[co_saves.c.program_id, co_saves.c.other_id],
+                set_={"count": co_saves.c.count + upsert.excluded.count},
+            ),
+            [{"program_id": a, "other_id": b, "count": delta, "score": 0.0} for (a, b), delta in deltas.items()],
+        )
+        connection.execute(
+            delete(co_saves).where(
+                tuple_(co_saves.c.program_id, co_saves.c.other_id).in_(list(deltas)), co_saves.c.count <= 0
+            )
+        )
+
+    # Save counts moved for these programs, which changes every score they take part in.
+    rescore_programs(
+        connection,
+        {program_id for programs in (*added_by_user.values(), *removed_by_user.values()) for program_id in programs},
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _update_on_write(session: Session, flush_context) -> None:
+    added = [(item.user_id, item.program_id) for item in session.new if isinstance(item, FavoriteProgram)]
+    removed = [(item.user_id, item.program_id) for item in session.deleted if isinstance(item, FavoriteProgram)]
+    if added or removed:
+        apply_favorite_changes(session.connection(), added, removed)
+
+
+def also_saved(db: Session, program_id: int, limit: int = 10) -> list[tuple[WorkoutProgram, ProgramCoSave]]:
+    """Programs most often saved together with ``program_id``, best cosine score first."""
+    return (
+        db.query(WorkoutProgram, ProgramCoSave)
+        .join(ProgramCoSave, ProgramCoSave.other_id == WorkoutProgram.id)
+        .outerjoin(Coach, WorkoutProgram.coach_id == Coach.id)
+        .options(contains_eager(WorkoutProgram.coach))
+        .filter(ProgramCoSave.program_id == program_id)
+        .order_by(ProgramCoSave.score.desc(), ProgramCoSave.count.desc(), WorkoutProgram.id)
+        .limit(limit)
+        .all()
+    )
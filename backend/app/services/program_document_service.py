@@ -0,0 +1,134 @@
+"""Pre-encoded JSON documents of workout program details.
+
+``GET /programs/{id}`` returns a deep ``WorkoutProgramDetail`` (coach, weeks,
+sessions, exercises) that only changes when programs are seeded or edited.
+``program_documents`` stores it already serialized, so the read path is one
+primary-key lookup whose bytes are sent as is, without ORM loading or Pydantic
+validation.
+
+Documents are built on the first read and dropped inside the writing
+transaction: after each flush the documents of the programs whose coach,
+weeks, sessions or exercises changed are deleted, and the next read rebuilds
+them. ``DOCUMENT_VERSION`` is stored with each document; bump it when the
+shape of ``WorkoutProgramDetail`` changes so older documents are rebuilt.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.db.history import history_values
+from app.db.upsert import upsert_insert
+from app.models.program_document import ProgramDocument
+from app.models.training import Coach, WorkoutExercise, WorkoutProgram, WorkoutSession, WorkoutWeek
+from app.schemas.training import WorkoutProgramDetail
+
+DOCUMENT_VERSION = 1
+
+documents = ProgramDocument.__table__
+programs = WorkoutProgram.__table__
+weeks = WorkoutWeek.__table__
+sessions = WorkoutSession.__table__
+
+# Load a program's weeks, sessions and exercises in one query per level.
+PROGRAM_TREE = selectinload(WorkoutProgram.weeks).selectinload(WorkoutWeek.sessions).selectinload(
+    WorkoutSession.exercises
+)
+
+
+def build_program_document(db: Session, program_id: int) -> Optional[bytes]:
+    """Serialize a program detail and store it; ``None`` when the program does not exist.
+
+    The caller commits.
+    """
+    program = (
+        db.query(WorkoutProgram)
+        .options(joinedload(WorkoutProgram.coach), PROGRAM_TREE)
+        .filter(WorkoutProgram.id == program_id)
+        .first()
+    )
+    if program is None:
+        return None
+
+    body = WorkoutProgramDetail.model_validate(program).model_dump_json().encode()
+    # Concurrent first reads build the same document; the last one wins.
+    insert = upsert_insert(db.connection())(documents).values(
+        program_id=program_id, version=DOCUMENT_VERSION, body=body
+    )
+    db.execute(
+        insert.on_conflict_do_update(
+            index_elements=[documents.c.program_id],
+            set_={"version": insert.excluded.version, "body": insert.excluded.body, "built_at": func.now()},
+        )
+    )
+    return body
+
+
+def get_program_document(db: Session, program_id: int) -> Optional[bytes]:
+    """Return the encoded detail of a program, building it on a miss."""
+    body = db.execute(
+        select(documents.c.body).where(
+            documents.c.program_id == program_id, documents.c.version == DOCUMENT_VERSION
+        )
+    ).scalar()
+    if body is not None:
+        return body
+
+    body = build_program_document(db, program_id)
+    if body is not None:
+        db.commit()
+    return body
+
+
+def touched_program_ids(session: Session, flush_context) -> frozenset[int]:
+    """Ids of the programs whose own row, coach, weeks, sessions or exercises are being flushed.
+
+    Computed once per flush and shared by the ``after_flush`` listeners.
+    """
+    cached = flush_context.attributes.get("touched_program_ids")
+    if cached is not None:
+        return cached
+
+    program_ids: set[int] = set()
+    coach_ids: set[int] = set()
+    week_ids: set[int] = set()
+    session_ids: set[int] = set()
+    for instance in (*session.dirty, *session.deleted, *session.new):
+        if isinstance(instance, WorkoutProgram):
+            if instance.id is not None:
+                program_ids.add(instance.id)
+        elif isinstance(instance, Coach):
+            if instance.id is not None:
+                coach_ids.add(instance.id)
+        elif isinstance(instance, WorkoutWeek):
+            # Both the old and the new program when a week moves.
+            program_ids |= history_values(instance, "program_id")
+        elif isinstance(instance, WorkoutSession):
+            week_ids |= history_values(instance, "week_id")
+        elif isinstance(instance, WorkoutExercise):
+            session_ids |= history_values(instance, "session_id")
+
+    connection = session.connection()
+    if session_ids:
+        week_ids.update(connection.execute(select(sessions.c.week_id).where(sessions.c.id.in_(session_ids))).scalars())
+    if week_ids:
+        program_ids.update(connection.execute(select(weeks.c.program_id).where(weeks.c.id.in_(week_ids))).scalars())
+    if coach_ids:
+        program_ids.update(connection.execute(select(programs.c.id).where(programs.c.coach_id.in_(coach_ids))).scalars())
+    program_ids.discard(None)
+    touched = flush_context.attributes["touched_program_ids"] = frozenset(program_ids)
+    return touched
+
+
+@event.listens_for(Session, "after_flush")
+def _drop_on_write(session: Session, flush_context) -> None:
+    program_ids = touched_program_ids(session, flush_context)
+    if not program_ids:
+        return
+    session.connection().execute(delete(documents).where(documents.c.program_id.in_(program_ids)))
+    # Forget documents loaded earlier in this session.
+    for instance in list(session.identity_map.values()):
+        if isinstance(instance, ProgramDocument) and instance.program_id in program_ids:
+            session.expunge(instance)
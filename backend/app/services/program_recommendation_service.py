@@ -0,0 +1,263 @@
+"""Content-based recommendations of workout programs.
+
+Each program is described by a feature vector built with NumPy from its goal,
+level, duration bucket, coach specialty and exercise mix (word counts of its
+exercise names). Every group is scaled to unit length and weighted by
+``FEATURE_WEIGHTS`` before the whole vector is normalized, so the dot product
+of two vectors is their weighted cosine similarity. The vectors are stored
+sparse in ``program_terms``; similarities are computed in SQL by joining them
+on their terms, so only programs sharing a term with a program are read.
+
+``program_neighbors`` keeps the ``PROGRAM_NEIGHBORS`` most similar programs of
+each program. A vector only depends on its own program, so after a flush that
+touches programs (or their coach, weeks, sessions, exercises) only the vectors
+of these programs are rebuilt, and only they, the programs listing them and
+those whose neighbour list they now enter are re-ranked.
+
+``recommend_programs`` sums, for each candidate, its similarity to the
+programs a user saved; without favorites it falls back to the most saved
+programs.
+"""
+from __future__ import annotations
+
+import heapq
+import re
+import unicodedata
+from collections import Counter
+from operator import itemgetter
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.models.program_neighbor import ProgramNeighbor
+from app.models.program_term import ProgramTerm
+from app.models.training import (
+    Coach,
+    FavoriteProgram,
+    WorkoutExercise,
+    WorkoutProgram,
+    WorkoutSession,
+    WorkoutWeek,
+)
+from app.services.program_document_service import touched_program_ids
+
+FEATURE_WEIGHTS = {"goal": 3.0, "level": 2.0, "duration": 1.0, "specialty": 1.0, "exercises": 2.0}
+# Upper bounds (in weeks) of the duration buckets; longer programs share the last one.
+DURATION_BUCKETS = (4, 8, 12)
+WORD_PATTERN = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+TERM_LENGTH = ProgramTerm.__table__.c.term.type.length
+
+programs = WorkoutProgram.__table__
+coaches = Coach.__table__
+weeks = WorkoutWeek.__table__
+sessions = WorkoutSession.__table__
+exercises = WorkoutExercise.__table__
+neighbors = ProgramNeighbor.__table__
+program_terms = ProgramTerm.__table__
+
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value.strip().lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char)) or None
+
+
+def _duration_bucket(duration_weeks: Optional[int]) -> Optional[str]:
+    if not duration_weeks:
+        return None
+    for bound in DURATION_BUCKETS:
+        if duration_weeks <= bound:
+            return f"<={bound}"
+    return f">{DURATION_BUCKETS[-1]}"
+
+
+def _program_terms(connection: Connection, program_ids: Optional[set[int]] = None) -> dict[int, dict[str, Counter]]:
+    """Weighted terms of ``program_ids`` (every program when ``None``), per feature group."""
+    terms: dict[int, dict[str, Counter]] = {}
+    query = select(
+        programs.c.id, programs.c.goal, programs.c.level, programs.c.duration_weeks, coaches.c.specialty
+    ).select_from(programs.outerjoin(coaches, programs.c.coach_id == coaches.c.id))
+    if program_ids is not None:
+        query = query.where(programs.c.id.in_(program_ids))
+    for program_id, goal, level, duration_weeks, specialty in connection.execute(query):
+        groups = {name: Counter() for name in FEATURE_WEIGHTS}
+        for name, value in (
+            ("goal", _normalize(goal)),
+            ("level", _normalize(level)),
+            ("duration", _duration_bucket(duration_weeks)),
+            ("specialty", _normalize(specialty)),
+        ):
+            if value:
+                groups[name][value[:TERM_LENGTH]] = 1
+        terms[program_id] = groups
+    if not terms:
+        return terms
+
+    exercise_names = select(weeks.c.program_id, exercises.c.name).select_from(
+        exercises.join(sessions, exercises.c.session_id == sessions.c.id).join(weeks, sessions.c.week_id == weeks.c.id)
+    )
+    if program_ids is not None:
+        exercise_names = exercise_names.where(weeks.c.program_id.in_(terms))
+    for program_id, name in connection.execute(exercise_names):
+        if program_id in terms and name:
+            words = WORD_PATTERN.findall(_normalize(name) or "")
+            terms[program_id]["exercises"].update(word[:TERM_LENGTH] for word in words)
+    return terms
+
+
+def program_vectors(connection: Connection, program_ids: Optional[set[int]] = None) -> list[dict]:
+    """Return the ``program_terms`` rows of ``program_ids``: their unit-length feature vectors, one row per term."""
+    rows: list[dict] = []
+    for program_id, groups in _program_terms(connection, program_ids).items():
+        keys: list[tuple[str, str]] = []
+        parts: list[np.ndarray] = []
+        for group, counts in groups.items():
+            if counts:
+                values = np.array(list(counts.values()), dtype=float)
+                keys.extend((group, term) for term in counts)
+                parts.append(values / np.linalg.norm(values) * np.sqrt(FEATURE_WEIGHTS[group]))
+        if not parts:
+            continue
+        vector = np.concatenate(parts)
+        vector /= np.linalg.norm(vector)
+        rows.extend(
+            {"program_id": program_id, "feature": group, "term": term, "weight": weight}
+            for (group, term), weight in zip(keys, vector.tolist())
+        )
+    return rows
+
+
+def _similarities(connection: Connection, program_ids: Optional[set[int]] = None) -> dict[int, dict[int, float]]:
+    """Positive cosine similarities of ``program_ids`` (all programs when ``None``) to the other programs.
+
+    Joined on ``(feature, term)``, so only programs sharing a term are read.
+    """
+    own = program_terms.alias("own")
+    other = program_terms.alias("other")
+    query = (
+        select(own.c.program_id, other.c.program_id, func.sum(own.c.weight * other.c.weight))
+        .join_from(own, other, (own.c.feature == other.c.feature) & (own.c.term == other.c.term))
+        .where(own.c.program_id != other.c.program_id)
+        .group_by(own.c.program_id, other.c.program_id)
+    )
+    if program_ids is not None:
+        query = query.where(own.c.program_id.in_(program_ids))
+    similarities: dict[int, dict[int, float]] = {}
+    for program_id, other_id, score in connection.execute(query):
+        if score > 0:
+            similarities.setdefault(program_id, {})[other_id] = score
+    return similarities
+
+
+def refresh_program_neighbors(connection: Connection, program_ids: Optional[Iterable[int]] = None) -> None:
+    """Rebuild the vectors of ``program_ids`` (all programs when ``None``) and re-rank the neighbours they affect."""
+    k = settings.program_neighbors
+    if program_ids is None:
+        connection.execute(delete(program_terms))
+        connection.execute(delete(neighbors))
+        changed = None
+    else:
+        changed = set(program_ids)
+        if not changed:
+            return
+        connection.execute(delete(program_terms).where(program_terms.c.program_id.in_(changed)))
+    vectors = program_vectors(connection, changed)
+    if vectors:
+        connection.execute(insert(program_terms), vectors)
+    similarities = _similarities(connection, changed)
+
+    if changed is not None:
+        # Programs listing a changed program must be re-ranked (its score moved or it is gone) ...
+        affected = changed | set(
+            connection.execute(select(neighbors.c.program_id).where(neighbors.c.neighbor_id.in_(changed))).scalars()
+        )
+        # ... and so must those a changed program may now enter: their list is short or it beats the last neighbour.
+        best: dict[int, float] = {}
+        for scores in similarities.values():
+            for other_id, score in scores.items():
+                best[other_id] = max(best.get(other_id, 0.0), score)
+        candidates = set(best) - affected
+        floors: dict[int, tuple[int, float]] = {}
+        if candidates:
+            for program_id, listed, lowest in connection.execute(
+                select(neighbors.c.program_id, func.count(), func.min(neighbors.c.score))
+                .where(neighbors.c.program_id.in_(candidates))
+                .group_by(neighbors.c.program_id)
+            ):
+                floors[program_id] = (listed, lowest)
+        for program_id in candidates:
+            listed, lowest = floors.get(program_id, (0, 0.0))
+            if listed < k or best[program_id] > lowest:
+                affected.add(program_id)
+
+        connection.execute(delete(neighbors).where(neighbors.c.program_id.in_(affected)))
+        if affected - changed:
+            similarities.update(_similarities(connection, affected - changed))
+
+    rows = [
+        {"program_id": program_id, "neighbor_id": neighbor_id, "score": score}
+        for program_id, scores in similarities.items()
+        for neighbor_id, score in heapq.nlargest(k, scores.items(), key=itemgetter(1))
+    ]
+    if rows:
+        connection.execute(insert(neighbors), rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_on_write(session: Session, flush_context) -> None:
+    program_ids = touched_program_ids(session, flush_context)
+    if program_ids:
+        refresh_program_neighbors(session.connection(), program_ids)
+
+
+def recommend_programs(
+    db: Session,
+    *,
+    user_id: Optional[int] = None,
+    level: Optional[str] = None,
+    goal: Optional[str] = None,
+    limit: int = 12,
+) -> list[WorkoutProgram]:
+    """Rank programs for a user: closest to their favorites first, then the most saved ones."""
+
+    def filtered(query):
+        if level:
+            query = query.filter(WorkoutProgram.level == level)
+        if goal:
+            query = query.filter(WorkoutProgram.goal == goal)
+        return query.options(selectinload(WorkoutProgram.coach))
+
+    saved = select(FavoriteProgram.program_id).where(FavoriteProgram.user_id == user_id)
+    ranked: list[WorkoutProgram] = []
+    if user_id is not None:
+        ranked = (
+            filtered(db.query(WorkoutProgram))
+            .join(ProgramNeighbor, ProgramNeighbor.neighbor_id == WorkoutProgram.id)
+            .filter(ProgramNeighbor.program_id.in_(saved), WorkoutProgram.id.not_in(saved))
+            .group_by(WorkoutProgram.id)
+            .order_by(func.sum(ProgramNeighbor.score).desc(), WorkoutProgram.id)
+            .limit(limit)
+            .all()
+        )
+    if len(ranked) >= limit:
+        return ranked
+
+    saves = (
+        select(FavoriteProgram.program_id, func.count().label("saves"))
+        .group_by(FavoriteProgram.program_id)
+        .subquery()
+    )
+    excluded = [program.id for program in ranked]
+    popular = filtered(db.query(WorkoutProgram)).outerjoin(saves, saves.c.program_id == WorkoutProgram.id)
+    if user_id is not None:
+        popular = popular.filter(WorkoutProgram.id.not_in(saved))
+    if excluded:
+        popular = popular.filter(WorkoutProgram.id.not_in(excluded))
+    return ranked + popular.order_by(func.coalesce(saves.c.saves, 0).desc(), WorkoutProgram.id).limit(
+        limit - len(ranked)
+    ).all()
@@ -0,0 +1,77 @@
+"""Route-level response cache for read endpoints.
+
+Usage::
+
+    product_cache = RouteCache("products", expire_seconds=300)
+
+    @router.get("/{product_id}")
+    async def get_product(..., cache: CachedRoute = Depends(product_cache)):
+        cached = await cache.get()
+        if cached is not None:
+            return cached
+        ...
+        return await cache.set(response)
+
+Keys are derived from the request path and its normalized query parameters and
+live under a namespace version. Writers call ``invalidate_route_cache`` to bump
+that version, which retires every cached response of the namespace at once.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+from urllib.parse import urlencode
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from redis.asyncio import Redis
+
+from app.services.cache_service import bump_cache_version, get_cache, get_cache_version, set_cache
+
+CACHE_PREFIX = "route:"
+
+
+def normalize_query(request: Request) -> str:
+    """Sort query parameters and drop empty ones so equivalent URLs share a key."""
+    items = sorted((key, value) for key, value in request.query_params.multi_items() if value != "")
+    return urlencode(items)
+
+
+class CachedRoute:
+    """Cache handle bound to one request."""
+
+    def __init__(self, redis: Optional[Redis], key: str, expire_seconds: int):
+        self.redis = redis
+        self.key = key
+        self.expire_seconds = expire_seconds
+
+    async def get(self) -> Optional[JSONResponse]:
+        """Return the cached response, already encoded, or ``None`` on a miss."""
+        cached = await get_cache(self.redis, self.key)
+        if cached is None:
+            return None
+        return JSONResponse(cached, headers={"X-Cache": "HIT"})
+
+    async def set(self, payload: Any) -> Any:
+        """Store ``payload`` as JSON and hand it back to the route unchanged."""
+        await set_cache(self.redis, self.key, jsonable_encoder(payload), expire_seconds=self.expire_seconds)
+        return payload
+
+
+class RouteCache:
+    """FastAPI dependency building a :class:`CachedRoute` for the current request."""
+
+    def __init__(self, namespace: str, expire_seconds: int):
+        self.namespace = namespace
+        self.expire_seconds = expire_seconds
+
+    async def __call__(self, request: Request) -> CachedRoute:
+        redis = getattr(request.app.state, "redis", None)
+        version = await get_cache_version(redis, f"{CACHE_PREFIX}{self.namespace}")
+        key = f"{CACHE_PREFIX}{self.namespace}:v{version}:{request.url.path}?{normalize_query(request)}"
+        return CachedRoute(redis, key, self.expire_seconds)
+
+
+async def invalidate_route_cache(redis: Optional[Redis], namespace: str) -> None:
+    """Retire every cached response of ``namespace``; call after writing its data."""
+    await bump_cache_version(redis, f"{CACHE_PREFIX}{namespace}")
@@ -1,18 +1,38 @@
-"""Integration helpers for SerpAPI requests."""
+"""Integration helpers for SerpAPI requests.
+
+Responses are cached in Redis per normalized request (stale-while-revalidate):
+younger than ``SERPAPI_CACHE_SOFT_SECONDS`` they are served as is; older ones
+are still served immediately while a single background task refreshes them, and
+they disappear after ``SERPAPI_CACHE_HARD_SECONDS``.
+"""
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import time
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 import httpx
 import logging
+from redis.asyncio import Redis
 
 from app.core.config import settings
+from app.services.cache_service import acquire_lock, get_cache, release_lock, set_cache
+from app.services.http_client import fetch
+from app.services.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
 SERPAPI_URL = "https://serpapi.com/search.json"
 DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+CACHE_PREFIX = "serpapi:"
+CACHE_KEY_PARAMS = ("engine", "q", "hl", "gl", "start", "num")
+REFRESH_LOCK_SECONDS = 30
+
+# Strong references to in-flight refreshes (the event loop only keeps weak ones).
+_refresh_tasks: set[asyncio.Task] = set()
 
 
 class SerpApiError(Exception):
@@ -24,20 +44,69 @@ async def _perform_request(params: Dict[str, Any]) -> Dict[str, Any]:
         raise SerpApiError("SerpAPI key is not configured")
 
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
-            response = await client.get(
-                SERPAPI_URL, params={"api_key": settings.serpapi_key, **params}
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await fetch(
+            SERPAPI_URL, params={"api_key": settings.serpapi_key, **params}, timeout=DEFAULT_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
     except httpx.TimeoutException as exc:
         raise SerpApiError("SerpAPI request timed out") from exc
+    except httpx.HTTPStatusError as exc:
+        raise SerpApiError(f"SerpAPI responded with HTTP {exc.response.status_code}") from exc
     except httpx.RequestError as exc:
         raise SerpApiError(f"SerpAPI request failed: {exc}") from exc
     except ValueError as exc:
         raise SerpApiError("Failed to decode SerpAPI response") from exc
 
 
+def _cache_key(params: Dict[str, Any]) -> str:
+    normalized = {
+        name: " ".join(str(params[name]).lower().split())
+        for name in CACHE_KEY_PARAMS
+        if params.get(name) not in (None, "")
+    }
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f"{CACHE_PREFIX}{digest}"
+
+
+async def _fetch_and_store(redis: Optional[Redis], cache_key: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    entry = {"fetched_at": time.time(), "payload": await _perform_request(params)}
+    await set_cache(redis, cache_key, entry, expire_seconds=settings.serpapi_cache_hard_seconds)
+    return entry
+
+
+async def _refresh(redis: Redis, cache_key: str, params: Dict[str, Any]) -> None:
+    lock_key = f"{cache_key}:refresh"
+    if not await acquire_lock(redis, lock_key, REFRESH_LOCK_SECONDS):
+        return
+    try:
+        await _fetch_and_store(redis, cache_key, params)
+    except SerpApiError as exc:
+        logger.warning("SerpAPI background refresh failed: %s", exc)
+    finally:
+        await release_lock(redis, lock_key)
+
+
+async def _cached_request(params: Dict[str, Any], redis: Optional[Redis] = None) -> Dict[str, Any]:
+    """Run ``_perform_request`` through the stale-while-revalidate cache."""
+    cache_key = _cache_key(params)
+    if redis is None:
+        return await single_flight(cache_key, lambda: _perform_request(params))
+
+    cached = await get_cache(redis, cache_key)
+    if not isinstance(cached, dict) or "payload" not in cached:
+        # Identical concurrent misses share one upstream call and one cache write.
+        entry = await single_flight(cache_key, lambda: _fetch_and_store(redis, cache_key, params), redis=redis)
+        return entry["payload"]
+
+    age = time.time() - float(cached.get("fetched_at") or 0)
+    if age > settings.serpapi_cache_soft_seconds:
+        task = asyncio.create_task(_refresh(redis, cache_key, params))
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+    return cached["payload"]
+
+
 def _parse_price(raw_price: Optional[str]) -> tuple[Optional[float], Optional[str]]:
     if not raw_price:
         return None, None
@@ -107,6 +176,7 @@ async def search_supplements(
     source: Optional[str] = None,
     page: int = 1,
     page_size: int = 12,
+    redis: Optional[Redis] = None,
 ) -> Dict[str, Any]:
     """Search supplements/products on SerpAPI and return a paginated payload."""
 
@@ -126,7 +196,7 @@ async def search_supplements(
         "num": page_size,
     }
 
-    payload = await _perform_request(params)
+    payload = await _cached_request(params, redis)
     offers = _filter_offers(
         _parse_offers(payload), price_min=price_min, price_max=price_max, source=source
     )
@@ -169,13 +239,13 @@ async def search_supplements(
     }
 
 
-async def search_product(query: str) -> Dict[str, Any]:
+async def search_product(query: str, *, redis: Optional[Redis] = None) -> Dict[str, Any]:
     """Backward compatible helper used by comparison routes."""
-    payload = await _perform_request({"engine": "google_shopping", "q": query, "hl": "fr", "gl": "fr"})
+    payload = await _cached_request({"engine": "google_shopping", "q": query, "hl": "fr", "gl": "fr"}, redis)
     return {"query": query, "offers": _parse_offers(payload)}
 
 
-async def fetch_offers(product_name: str) -> List[Dict[str, Any]]:
+async def fetch_offers(product_name: str, *, redis: Optional[Redis] = None) -> List[Dict[str, Any]]:
     """Return offers for a product name using SerpAPI."""
-    payload = await _perform_request({"engine": "google_shopping", "q": product_name})
+    payload = await _cached_request({"engine": "google_shopping", "q": product_name}, redis)
     return _parse_offers(payload)
@@ -0,0 +1,87 @@
+"""Request coalescing for expensive upstream calls (scrapes, SerpAPI).
+
+Concurrent callers asking for the same ``key`` share one computation: inside a
+worker they await the same task, across workers a Redis lock elects one leader
+while the others poll the cache entry the leader writes. ``key`` must therefore
+be the cache key that ``compute`` stores its result under.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from redis.asyncio import Redis
+
+from app.services.cache_service import acquire_lock, get_cache, release_lock
+
+LOCK_PREFIX = "lock:"
+DEFAULT_LOCK_SECONDS = 30
+POLL_INTERVAL_SECONDS = 0.1
+
+_inflight: dict[str, asyncio.Task] = {}
+
+
+async def _lead(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    redis: Optional[Redis],
+    lock_seconds: int,
+    fresh: bool,
+) -> Any:
+    if redis is None:
+        return await compute()
+
+    lock_key = f"{LOCK_PREFIX}{key}"
+    deadline = time.monotonic() + lock_seconds
+    waited = False
+    while not await acquire_lock(redis, lock_key, lock_seconds):
+        # Another worker is computing; its result lands in the cache.
+        waited = True
+        if not fresh:
+            cached = await get_cache(redis, key)
+            if cached is not None:
+                return cached
+        if time.monotonic() > deadline:
+            # The leader is stuck or gone without releasing the lock.
+            return await compute()
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+    try:
+        if waited or not fresh:
+            cached = await get_cache(redis, key)
+            if cached is not None:
+                return cached
+        return await compute()
+    finally:
+        await release_lock(redis, lock_key)
+
+
+def _forget(key: str, task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # Retrieved here so a failure nobody awaited is not logged twice.
+
+
+async def single_flight(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    *,
+    redis: Optional[Redis] = None,
+    lock_seconds: int = DEFAULT_LOCK_SECONDS,
+    fresh: bool = False,
+) -> Any:
+    """Return ``await compute()``, running it at most once at a time per ``key``.
+
+    With ``fresh``, a value already cached under ``key`` does not count: the
+    caller recomputes it, or waits for the worker currently recomputing it.
+    The shared computation runs in its own task, so a caller that goes away
+    (client disconnect) does not cancel it for the others.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_lead(key, compute, redis, lock_seconds, fresh))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _forget(key, done))
+    return await asyncio.shield(task)
@@ -0,0 +1,194 @@
+"""Typo-tolerant trigram matching for product and gym names.
+
+PostgreSQL answers with ``pg_trgm`` (``%`` operator served by GIN indexes,
+ranked by ``similarity``), both sides passed through ``immutable_unaccent``.
+Other databases use an in-process inverted trigram index built from the same
+columns and following the ``pg_trgm`` conventions on unaccented text, so both
+backends score "whei proteine" against "Whey Protéine" the same way.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import event, func, or_, text
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.db.search_index import UNACCENT_FUNCTION
+
+WORD_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+INDEX_MAX_AGE_SECONDS = 300
+DEFAULT_LIMIT = 200
+
+
+def _normalize(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def trigrams(value: Optional[str]) -> frozenset[str]:
+    """Return the ``pg_trgm`` trigram set of ``value``."""
+    if not value:
+        return frozenset()
+    grams: set[str] = set()
+    for word in WORD_PATTERN.findall(_normalize(value)):
+        padded = f"  {word} "
+        grams.update(padded[idx : idx + 3] for idx in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(left: frozenset[str], right: frozenset[str]) -> float:
+    if not left or not right:
+        return 0.0
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared)
+
+
+class TrigramIndex:
+    """Inverted trigram index over a few text columns of a model.
+
+    The index is rebuilt lazily when this worker flushed changes to the model,
+    when rows were added or removed elsewhere (detected from ``count``/``max(id)``)
+    or when it is older than ``INDEX_MAX_AGE_SECONDS``.
+    """
+
+    def __init__(self, model: Any, columns: Sequence[str]):
+        self.model = model
+        self.columns = tuple(columns)
+        self._postings: dict[str, set[int]] = {}
+        self._documents: dict[int, tuple[frozenset[str], ...]] = {}
+        self._signature: Optional[tuple[int, Optional[int]]] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def _current_signature(self, db: Session) -> tuple[int, Optional[int]]:
+        count, max_id = db.query(func.count(self.model.id), func.max(self.model.id)).one()
+        return int(count or 0), max_id
+
+    def _rebuild(self, db: Session, signature: tuple[int, Optional[int]]) -> None:
+        postings: dict[str, set[int]] = {}
+        documents: dict[int, tuple[frozenset[str], ...]] = {}
+        columns = [getattr(self.model, column) for column in self.columns]
+        for row_id, *values in db.query(self.model.id, *columns).yield_per(1000):
+            grams = tuple(trigrams(value) for value in values)
+            documents[row_id] = grams
+            for gram in frozenset().union(*grams):
+                postings.setdefault(gram, set()).add(row_id)
+        self._postings = postings
+        self._documents = documents
+        self._signature = signature
+        self._built_at = time.monotonic()
+
+    def refresh(self, db: Session) -> None:
+        signature = self._current_signature(db)
+        expired = time.monotonic() - self._built_at > INDEX_MAX_AGE_SECONDS
+        if signature == self._signature and not expired:
+            return
+        with self._lock:
+            if signature != self._signature or time.monotonic() - self._built_at > INDEX_MAX_AGE_SECONDS:
+                self._rebuild(db, signature)
+
+    def invalidate(self) -> None:
+        self._signature = None
+
+    def search(self, db: Session, q: str, threshold: float, limit: Optional[int]) -> list[tuple[int, float]]:
+        self.refresh(db)
+        query_grams = trigrams(q)
+        candidates: set[int] = set()
+        for gram in query_grams:
+            candidates.update(self._postings.get(gram, ()))
+
+        scored = []
+        for row_id in candidates:
+            score = max(similarity(query_grams, grams) for grams in self._documents[row_id])
+            if score >= threshold:
+                scored.append((row_id, score))
+        scored.sort(key=lambda item: (-item[1], -item[0]))
+        return scored if limit is None else scored[:limit]
+
+
+_indexes: dict[tuple[str, tuple[str, ...]], TrigramIndex] = {}
+
+
+def _get_index(model: Any, columns: Sequence[str]) -> TrigramIndex:
+    key = (model.__tablename__, tuple(columns))
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = TrigramIndex(model, columns)
+    return index
+
+
+def invalidate_trigram_indexes() -> None:
+    """Force the in-process indexes to be rebuilt on their next lookup."""
+    for index in _indexes.values():
+        index.invalidate()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_write(session: Session, flush_context) -> None:
+    if not _indexes:
+        return
+    touched = {
+        instance.__tablename__
+        for instance in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(instance, "__tablename__")
+    }
+    for (table, _columns), index in _indexes.items():
+        if table in touched:
+            index.invalidate()
+
+
+def fuzzy_match(
+    db: Session,
+    model: Any,
+    columns: Sequence[str],
+    q: str,
+    *,
+    query: Optional[Query] = None,
+    threshold: Optional[float] = None,
+    limit: int = DEFAULT_LIMIT,
+) -> list[tuple[int, float]]:
+    """Return ``(id, score)`` pairs of rows similar to ``q``, best match first.
+
+    The score of a row is its best trigram similarity across ``columns``. When
+    ``query`` is given, only its rows are matched, so its filters apply before
+    ``limit``.
+    """
+    threshold = settings.trigram_similarity_threshold if threshold is None else threshold
+    if not q or not q.strip():
+        return []
+
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT set_limit(:threshold)"), {"threshold": threshold})
+        # Same expressions as the GIN indexes of app.db.search_index.
+        unaccent = getattr(func, UNACCENT_FUNCTION)
+        model_columns = [unaccent(getattr(model, column)) for column in columns]
+        unaccented_q = unaccent(q)
+        score = func.greatest(
+            *(func.similarity(func.coalesce(column, ""), unaccented_q) for column in model_columns)
+        )
+        rows = (
+            (query if query is not None else db.query(model))
+            .with_entities(model.id, score.label("score"))
+            .filter(or_(*(column.op("%")(unaccented_q) for column in model_columns)))
+            .order_by(score.desc(), model.id.desc())
+            .limit(limit)
+            .all()
+        )
+        return [(row_id, float(row_score)) for row_id, row_score in rows]
+
+    index = _get_index(model, columns)
+    if query is None:
+        return index.search(db, q, threshold, limit)
+    scored = index.search(db, q, threshold, None)
+    if not scored:
+        return []
+    allowed = {
+        row_id
+        for (row_id,) in query.with_entities(model.id).filter(model.id.in_([row_id for row_id, _score in scored]))
+    }
+    return [item for item in scored if item[0] in allowed][:limit]
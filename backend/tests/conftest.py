@@ -1,16 +1,19 @@
-from collections.abc import Generator
+import time
+from collections.abc import Generator, Iterator
+from contextlib import contextmanager
 from typing import Callable
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.main import app
 from app.auth.auth import get_current_user
 from app.auth.utils import create_access_token, hash_password
-from app.db.session import Base, get_db
+from app.db.session import Base, get_db, get_session_factory
 from app.models.user import User
+from app.services import cache_service, crawl_scheduler
 
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -51,13 +54,101 @@ def override_get_db(db_session: Session) -> Callable[[], Generator[Session, None
 
 
 @pytest.fixture()
-def client(override_get_db: Callable[[], Generator[Session, None, None]]) -> Generator[TestClient, None, None]:
+def client(
+    override_get_db: Callable[[], Generator[Session, None, None]], db_session: Session
+) -> Generator[TestClient, None, None]:
     app.dependency_overrides[get_db] = override_get_db
+    # Background jobs open their own session; point them at the test transaction too.
+    app.dependency_overrides[get_session_factory] = lambda: lambda: db_session
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+class FakeRedis:
+    """Minimal in-memory stand-in for ``redis.asyncio.Redis``."""
+
+    def __init__(self):
+        self.store: dict[str, str] = {}
+        self.published: list[tuple[str, str]] = []
+
+    async def get(self, key: str):
+        return self.store.get(key)
+
+    async def set(self, key: str, value: str, ex=None, nx=False, px=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def delete(self, *keys: str):
+        return sum(1 for key in keys if self.store.pop(key, None) is not None)
+
+    async def incr(self, key: str):
+        value = int(self.store.get(key, 0)) + 1
+        self.store[key] = str(value)
+        return value
+
+    async def expire(self, key: str, seconds: int):
+        return key in self.store
+
+    async def publish(self, channel: str, message: str):
+        self.published.append((channel, message))
+        return 0
+
+    async def ping(self):
+        return True
+
+    async def aclose(self):
+        return None
+
+
+@pytest.fixture(autouse=True)
+def clear_local_cache() -> Generator[None, None, None]:
+    yield
+    if cache_service.local_cache is not None:
+        cache_service.local_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_crawl_hosts() -> Generator[None, None, None]:
+    # Host schedulers hold asyncio primitives bound to the test's event loop.
+    yield
+    crawl_scheduler.reset_hosts()
+
+
+@pytest.fixture()
+def fake_redis(client: TestClient) -> FakeRedis:
+    redis = FakeRedis()
+    client.app.state.redis = redis
+    return redis
+
+
+def wait_for_job(client: TestClient, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+@contextmanager
+def count_queries(session: Session) -> Iterator[list[str]]:
+    """Collect the SQL statements sent through ``session``'s connection inside the block."""
+    statements: list[str] = []
+    connection = session.connection()
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+
+
 @pytest.fixture()
 def test_user(db_session: Session) -> User:
     user = User(email="user@example.com", full_name="Test User", hashed_password=hash_password("password"))
@@ -6,20 +6,7 @@ from fastapi import status
 from app.routes import compare_routes
 from app.models.offer import Offer
 from app.models.product import Product
-
-
-class FakeRedis:
-    def __init__(self):
-        self.store: dict[str, str] = {}
-
-    async def get(self, key: str):
-        return self.store.get(key)
-
-    async def set(self, key: str, value: str, ex=None):
-        self.store[key] = value
-
-    async def ping(self):
-        return True
+from app.services import cache_service
 
 
 def create_products(db_session):
@@ -40,13 +27,11 @@ def create_products(db_session):
     return first, second
 
 
-def test_compare_products_uses_cache(client, monkeypatch):
-    fake_redis = FakeRedis()
+def test_compare_products_uses_cache(client, fake_redis, monkeypatch):
     cached = {"query": "rope", "offers": ["cached"]}
     fake_redis.store["compare:rope"] = json.dumps(cached)
-    client.app.state.redis = fake_redis
 
-    def _should_not_run(query: str):
+    def _should_not_run(query: str, **kwargs):
         raise AssertionError("search_product should not be called when cache is hit")
 
     monkeypatch.setattr(compare_routes.serpapi_service, "search_product", _should_not_run)
@@ -57,11 +42,9 @@ def test_compare_products_uses_cache(client, monkeypatch):
     assert response.json() == cached
 
 
-def test_compare_products_calls_serpapi(client, monkeypatch):
-    fake_redis = FakeRedis()
-    client.app.state.redis = fake_redis
+def test_compare_products_calls_serpapi(client, fake_redis, monkeypatch):
 
-    async def fake_search(query: str):
+    async def fake_search(query: str, **kwargs):
         return {"query": query, "offers": []}
 
     monkeypatch.setattr(compare_routes.serpapi_service, "search_product", fake_search)
@@ -89,3 +72,30 @@ def test_get_comparison_handles_missing(client, db_session):
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert response.json()["detail"] == "No matching products found"
+
+
+def test_compare_cache_hit_is_served_from_local_tier(client, fake_redis, monkeypatch):
+    cached = {"query": "rope", "offers": ["cached"]}
+    fake_redis.store["compare:rope"] = json.dumps(cached)
+    async def _should_not_run(query: str, **kwargs):
+        raise AssertionError("search_product should not be called when cache is hit")
+
+    monkeypatch.setattr(compare_routes.serpapi_service, "search_product", _should_not_run)
+
+    assert client.post("/api/compare", json={"query": "rope"}).json() == cached
+
+    # A second read must not go back to Redis.
+    fake_redis.store.pop("compare:rope")
+    assert client.post("/api/compare", json={"query": "rope"}).json() == cached
+
+
+def test_compare_cache_write_broadcasts_invalidation(client, fake_redis, monkeypatch):
+    async def fake_search(query: str, **kwargs):
+        return {"query": query, "offers": []}
+
+    monkeypatch.setattr(compare_routes.serpapi_service, "search_product", fake_search)
+
+    client.post("/api/compare", json={"query": "mat"})
+
+    assert [channel for channel, _message in fake_redis.published] == [cache_service.INVALIDATION_CHANNEL]
+    assert fake_redis.published[0][1].endswith(":compare:mat")
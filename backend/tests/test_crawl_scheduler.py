@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.services import crawl_scheduler, http_client
+from app.services.crawl_scheduler import polite_fetch
+from tests.conftest import FakeRedis
+
+
+def _run_with_transport(monkeypatch, handler, scenario):
+    async def wrapper():
+        monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            return await scenario()
+        finally:
+            await http_client.close_http_client()
+
+    return asyncio.run(wrapper())
+
+
+def test_polite_fetch_spaces_requests_with_robots_crawl_delay(monkeypatch):
+    pages = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/robots.txt":
+            return httpx.Response(200, text="User-agent: FitideaBot\nCrawl-delay: 1\n")
+        pages.append(time.monotonic())
+        return httpx.Response(200, text="ok")
+
+    redis = FakeRedis()
+
+    async def scenario():
+        return await asyncio.gather(
+            *(polite_fetch(f"https://shop.example/p/{idx}", redis=redis) for idx in range(2))
+        )
+
+    responses = _run_with_transport(monkeypatch, handler, scenario)
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert pages[1] - pages[0] >= 0.9
+    assert redis.store[f"{crawl_scheduler.ROBOTS_PREFIX}shop.example"] == "1.0"
+
+
+def test_polite_fetch_pauses_host_on_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "scrape_max_retries", 1)
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.2"})
+        return httpx.Response(200, text="ok")
+
+    response = _run_with_transport(monkeypatch, handler, lambda: polite_fetch("https://gym.example/clubs"))
+
+    assert response.status_code == 200
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.19
+
+
+def test_failed_robots_check_is_retried_on_next_fetch(monkeypatch):
+    checks = []
+
+    async def flaky_crawl_delay(scheme, host, redis):
+        checks.append(host)
+        if len(checks) == 1:
+            raise RuntimeError("unexpected robots.txt failure")
+        return None
+
+    monkeypatch.setattr(crawl_scheduler, "_crawl_delay", flaky_crawl_delay)
+
+    async def scenario():
+        return [await polite_fetch(f"https://shop.example/p/{idx}") for idx in range(3)]
+
+    responses = _run_with_transport(monkeypatch, lambda request: httpx.Response(200, text="ok"), scenario)
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert checks == ["shop.example", "shop.example"]
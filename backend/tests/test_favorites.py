@@ -60,3 +60,33 @@ def test_remove_favorite_deletes_entry(authenticated_client, db_session, test_us
 
     assert response.status_code == status.HTTP_204_NO_CONTENT
     assert db_session.query(Favorite).filter_by(id=favorite.id).first() is None
+
+
+def test_list_favorites_paginates_with_cursor(authenticated_client, db_session, test_user):
+    favorites = []
+    for idx in range(3):
+        _, offer = create_product_and_offer(db_session)
+        favorite = Favorite(user_id=test_user.id, offer_id=offer.id)
+        db_session.add(favorite)
+        db_session.commit()
+        favorites.append(favorite.id)
+
+    first = authenticated_client.get("/api/favorites?limit=2")
+    cursor = first.headers["X-Next-Cursor"]
+    second = authenticated_client.get(f"/api/favorites?limit=2&cursor={cursor}")
+
+    assert [item["id"] for item in first.json()] == favorites[:0:-1]
+    assert [item["id"] for item in second.json()] == favorites[:1]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_favorite_writes_refresh_cached_product_counts(client, db_session, fake_redis, auth_headers):
+    product, _ = create_product_and_offer(db_session)
+    product_id = product.id
+    assert client.get(f"/api/products/{product_id}").json()["summary"]["favorite_count"] == 0
+
+    assert client.post(f"/api/favorites/{product_id}", headers=auth_headers).status_code == status.HTTP_201_CREATED
+    assert client.get(f"/api/products/{product_id}").json()["summary"]["favorite_count"] == 1
+
+    assert client.delete(f"/api/favorites/{product_id}", headers=auth_headers).status_code == status.HTTP_204_NO_CONTENT
+    assert client.get(f"/api/products/{product_id}").json()["summary"]["favorite_count"] == 0
@@ -0,0 +1,98 @@
+import asyncio
+
+from fastapi import status
+
+from app.models.gym import Gym
+from app.services import gym_scraper_service
+from tests.conftest import wait_for_job
+
+
+def create_gym(db_session, name, city, brand=None):
+    gym = Gym(name=name, city=city, brand=brand)
+    db_session.add(gym)
+    db_session.commit()
+    db_session.refresh(gym)
+    return gym.id
+
+
+def test_list_gyms_filters_by_search(client, db_session):
+    expected = create_gym(db_session, "Neoness Paris Montparnasse", "Paris", "neoness")
+    create_gym(db_session, "KeepCool Marseille Vieux-Port", "Marseille", "keepcool")
+
+    response = client.get("/api/gyms?search=Montparnasse")
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"][0]["id"] == expected
+
+
+def test_list_gyms_falls_back_to_trigram_similarity(client, db_session):
+    best = create_gym(db_session, "Basic-Fit Paris République", "Paris", "basicfit")
+    other = create_gym(db_session, "Neoness Paris Montparnasse", "Paris", "neoness")
+    create_gym(db_session, "KeepCool Marseille Vieux-Port", "Marseille", "keepcool")
+
+    response = client.get("/api/gyms?search=basicfit paris")
+
+    assert response.status_code == status.HTTP_200_OK
+    ids = [item["id"] for item in response.json()["items"]]
+    assert ids == [best, other]
+
+
+def test_gym_facets_group_by_brand_and_city(client, db_session, fake_redis):
+    create_gym(db_session, "Neoness Paris Montparnasse", "Paris", "neoness")
+    create_gym(db_session, "Neoness Paris Bastille", "Paris", "neoness")
+    create_gym(db_session, "KeepCool Marseille Vieux-Port", "Marseille", "keepcool")
+
+    response = client.get("/api/gyms/facets")
+
+    assert response.status_code == status.HTTP_200_OK
+    facets = response.json()
+    assert facets["brand"] == [{"value": "neoness", "count": 2}, {"value": "keepcool", "count": 1}]
+    assert facets["city"] == [{"value": "Paris", "count": 2}, {"value": "Marseille", "count": 1}]
+
+
+def test_gym_sync_runs_as_background_job(client, db_session, fake_redis, monkeypatch):
+    payload = [{"name": "Basic-Fit Lyon", "brand": "basicfit", "city": "Lyon"}]
+    monkeypatch.setattr(gym_scraper_service.sync_all, "sync_all_sources", lambda: [dict(item) for item in payload])
+
+    async def fake_logo(gym_type, redis=None):
+        return "https://logo.example/basicfit.svg"
+
+    monkeypatch.setattr(gym_scraper_service, "get_gym_logo", fake_logo)
+
+    response = client.post("/api/gyms/sync")
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job_id = response.json()["job_id"]
+    job = wait_for_job(client, job_id)
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {"total": 1, "done": 1, "failed": 0}
+    assert (job["result"]["created"], job["result"]["total"]) == (1, 1)
+    assert f"job:{job_id}" in fake_redis.store
+
+
+def test_scrape_all_invalidates_gym_caches_once(db_session, monkeypatch):
+    invalidations = []
+
+    async def fake_listing(gym_type, redis=None):
+        return [f"https://{gym_type}.example/club-{number}" for number in range(2)] if gym_type == "neoness" else []
+
+    async def fake_details(url, gym_type, redis=None, *, refresh=False):
+        return {"name": url.rsplit("/", 1)[-1], "brand": gym_type, "city": "Paris"}
+
+    async def record(redis):
+        invalidations.append(redis)
+
+    monkeypatch.setattr(gym_scraper_service, "scrape_listing_urls", fake_listing)
+    monkeypatch.setattr(gym_scraper_service, "scrape_gym_details", fake_details)
+    monkeypatch.setattr(gym_scraper_service, "_invalidate_gym_caches", record)
+
+    result = asyncio.run(gym_scraper_service.scrape_and_persist_all_gyms(db_session))
+
+    assert (result["created"], result["failed"]) == (2, 0)
+    assert len(invalidations) == 1
+
+
+def test_unknown_job_returns_404(client):
+    assert client.get("/api/jobs/unknown").status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,35 @@
+from app.core.config import settings
+from app.services import html_parser, product_scraper_service
+from app.services.gym_scraper_service import _parse_json_ld
+from app.services.html_parser import parse_html
+
+PAGE = """
+<html><head>
+<meta property="og:title" content="Whey Isolate">
+<meta property="product:price:amount" content="29,90">
+<script type="application/ld+json">{"@type": "LocalBusiness", "name": "Basic-Fit Lyon"}</script>
+</head><body>
+<nav><a href="/clubs">Clubs</a></nav>
+<div class="nutrition">Protéines 25 g <img src="/img/label.png"></div>
+</body></html>
+"""
+
+
+def test_parse_html_keeps_only_requested_tags(monkeypatch):
+    monkeypatch.setattr(settings, "html_parser", "html.parser")
+
+    soup = parse_html(PAGE, ("meta", "img"))
+
+    assert soup.find("a") is None
+    assert soup.find("div") is None
+    payload = product_scraper_service._parse_common_fields(soup)
+    assert (payload["name"], payload["price"], payload["images"]) == ("Whey Isolate", 29.9, ["/img/label.png"])
+    assert _parse_json_ld(parse_html(PAGE, ("script",))) == {"@type": "LocalBusiness", "name": "Basic-Fit Lyon"}
+
+
+def test_missing_backend_falls_back_to_html_parser(monkeypatch):
+    monkeypatch.setattr(settings, "html_parser", "selectolax")
+    monkeypatch.setattr(html_parser, "_available", lambda backend: False)
+
+    assert html_parser.get_backend() == "html.parser"
+    assert parse_html(PAGE, ("a",)).find("a")["href"] == "/clubs"
@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+
+from app.services import gym_logo_service, http_client, product_scraper_service
+from tests.conftest import FakeRedis
+
+
+def test_gym_logo_uses_shared_client_and_cache(monkeypatch):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        requests.append(request)
+        return httpx.Response(200, text='<img class="site-logo" src="/img/logo.svg?v=2">')
+
+    async def scenario():
+        monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        redis = FakeRedis()
+        try:
+            first = await gym_logo_service.get_gym_logo("Neoness", redis)
+            second = await gym_logo_service.get_gym_logo("neoness", redis)
+        finally:
+            await http_client.close_http_client()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first == second == "https://www.neoness.fr/img/logo.svg"
+    assert len(requests) == 1
+
+
+def test_fetch_limits_concurrent_requests_per_host(monkeypatch):
+    active = {"now": 0, "max": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return httpx.Response(200)
+
+    monkeypatch.setattr(http_client.settings, "http_max_connections_per_host", 2)
+
+    async def scenario():
+        monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            await asyncio.gather(*(http_client.fetch(f"https://shop.example/{idx}") for idx in range(6)))
+        finally:
+            await http_client.close_http_client()
+
+    asyncio.run(scenario())
+
+    assert active["max"] == 2
+
+
+def test_refresh_revalidates_cached_scrape_with_etag(monkeypatch):
+    seen_headers = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        seen_headers.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text='<meta property="og:title" content="Whey">', headers={"ETag": '"v1"'})
+
+    redis = FakeRedis()
+
+    async def scenario():
+        monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            first = await product_scraper_service.scrape_product("https://shop.example/whey", "shop", redis)
+            refreshed = await product_scraper_service.scrape_product(
+                "https://shop.example/whey", "shop", redis, refresh=True
+            )
+        finally:
+            await http_client.close_http_client()
+        return first, refreshed
+
+    first, refreshed = asyncio.run(scenario())
+
+    assert seen_headers == [None, '"v1"']
+    assert refreshed == first
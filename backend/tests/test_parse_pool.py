@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import parse_pool
+from app.services.gym_scraper_service import _extract_gym_details
+from app.services.parse_pool import run_parser
+from app.services.product_scraper_service import _extract_product
+
+PRODUCT_PAGE = '<meta property="og:title" content="Whey"><meta property="product:price:amount" content="19.90">'
+GYM_PAGE = '<script type="application/ld+json">{"@type": "LocalBusiness", "name": "Basic-Fit Lyon"}</script>'
+
+
+@pytest.fixture()
+def pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "parse_inline_max_bytes", 0)
+    yield monkeypatch
+    parse_pool.shutdown_parse_pool()
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_large_pages_are_parsed_in_the_pool(pool_settings, executor):
+    pool_settings.setattr(settings, "parse_executor", executor)
+
+    async def scenario():
+        return await asyncio.gather(
+            run_parser(_extract_product, PRODUCT_PAGE, "https://shop.example/whey", "shop"),
+            run_parser(_extract_gym_details, GYM_PAGE, "https://basic-fit.example/lyon", "basicfit"),
+        )
+
+    product, gym = asyncio.run(scenario())
+
+    assert parse_pool._executor is not None
+    assert (product["name"], product["price"]) == ("Whey", 19.9)
+    assert gym["name"] == "Basic-Fit Lyon"
+
+
+def test_small_pages_are_parsed_inline(monkeypatch):
+    monkeypatch.setattr(settings, "parse_executor", "process")
+
+    product = asyncio.run(run_parser(_extract_product, PRODUCT_PAGE, "https://shop.example/whey", "shop"))
+
+    assert product["name"] == "Whey"
+    assert parse_pool._executor is None
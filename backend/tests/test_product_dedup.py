@@ -0,0 +1,72 @@
+import asyncio
+
+from app.models.favorite import Favorite
+from app.models.offer import Offer
+from app.models.product import Product
+from app.services import product_ingest_service
+from app.services.product_dedup_service import blocking_key, canonicalize_url, link_duplicates
+
+
+def test_canonicalize_url_strips_tracking_and_normalizes_host():
+    assert (
+        canonicalize_url("HTTPS://Shop.Example:443/whey/?utm_source=ig&size=1kg&gclid=x#reviews")
+        == "https://shop.example/whey?size=1kg"
+    )
+    assert (
+        canonicalize_url("https://www.amazon.fr/Prozis-Whey/dp/b07abc1234/ref=sr_1_3?tag=aff-21")
+        == "https://www.amazon.fr/dp/B07ABC1234"
+    )
+    # Amazon affiliate parameter names are real variant parameters elsewhere.
+    assert canonicalize_url("https://shop.example/gourde?th=1&ref=bleu") == "https://shop.example/gourde?ref=bleu&th=1"
+
+
+def test_blocking_key_ignores_word_order_brand_and_units():
+    assert blocking_key("Prozis Whey Isolate 1kg", "Prozis") == blocking_key("Isolate de whey - 1000 g", "PROZIS")
+    assert blocking_key("Whey Isolate 1kg", "Prozis") != blocking_key("Whey Isolate 2kg", "Prozis")
+    assert blocking_key("Whey Isolate 1kg", None) is None
+
+
+def test_ingest_links_duplicates_to_canonical_product(client, db_session, monkeypatch):
+    pages = {
+        "https://prozis.example/whey": {"name": "Whey Isolate 1kg", "brand": "Prozis", "price": 25.0},
+        "https://amazon.example/whey": {"name": "Prozis Isolate Whey 1000g", "brand": "Prozis", "price": 22.5},
+    }
+
+    async def fake_scrape(url, source, redis=None, *, refresh=False):
+        return pages[url]
+
+    monkeypatch.setattr(product_ingest_service, "scrape_product", fake_scrape)
+    canonical = asyncio.run(
+        product_ingest_service.ingest_product("https://prozis.example/whey?utm_campaign=x", "Prozis", db_session)
+    )
+    duplicate = asyncio.run(product_ingest_service.ingest_product("https://amazon.example/whey", "Amazon", db_session))
+
+    assert canonical.url == "https://prozis.example/whey"
+    assert (canonical.canonical_id, duplicate.canonical_id) == (None, canonical.id)
+    assert [(offer.url, float(offer.price)) for offer in canonical.offers] == [("https://amazon.example/whey", 22.5)]
+
+    listed = client.get("/api/products").json()["items"]
+    assert [item["id"] for item in listed] == [canonical.id]
+    compared = client.get(f"/api/comparison?ids={duplicate.id},{canonical.id}").json()["products"]
+    assert [entry["product"]["id"] for entry in compared] == [canonical.id]
+    assert db_session.query(Product).count() == 2
+
+
+def test_favorited_offer_follows_a_product_that_stops_being_a_duplicate(db_session, test_user):
+    canonical = Product(name="Whey Isolate 1kg", brand="Prozis", price=25.0, url="https://prozis.example/whey")
+    duplicate = Product(name="Prozis Isolate Whey 1000g", brand="Prozis", price=22.5, url="https://amazon.example/whey")
+    db_session.add_all([canonical, duplicate])
+    db_session.flush()
+    link_duplicates(db_session, [canonical, duplicate])
+    db_session.flush()
+    offer = db_session.query(Offer).filter_by(url=duplicate.url).one()
+    db_session.add(Favorite(user_id=test_user.id, offer_id=offer.id))
+    db_session.commit()
+
+    duplicate.name = "Prozis Vegan Protein 1kg"
+    link_duplicates(db_session, [duplicate])
+    db_session.commit()
+
+    favorite = db_session.query(Favorite).filter_by(user_id=test_user.id).one()
+    assert duplicate.canonical_id is None
+    assert (favorite.offer_id, favorite.offer.product_id) == (offer.id, duplicate.id)
@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+from app.models.favorite import Favorite
+from app.models.offer import Offer
+from app.models.price_observation import PriceObservation
+from app.models.product import Product
+
+
+def test_summary_follows_offer_favorite_and_price_writes(client, db_session, test_user):
+    product = Product(name="Whey", price=30)
+    db_session.add(product)
+    db_session.flush()
+    cheap = Offer(title="Shop A", price=Decimal("24.90"), product_id=product.id)
+    expensive = Offer(title="Shop B", price=Decimal("27.50"), product_id=product.id)
+    db_session.add_all([cheap, expensive, PriceObservation(product_id=product.id, price=30)])
+    db_session.commit()
+
+    summary = product.summary
+    assert (summary.min_offer_id, summary.min_offer_price, summary.offer_count) == (cheap.id, Decimal("24.90"), 2)
+    assert summary.last_price_change_at is not None
+
+    db_session.add(Favorite(user_id=test_user.id, offer_id=expensive.id))
+    cheap.price = Decimal("29.00")
+    db_session.commit()
+
+    assert (product.summary.min_offer_id, product.summary.favorite_count) == (expensive.id, 1)
+
+    db_session.delete(expensive)
+    db_session.commit()
+
+    assert (product.summary.min_offer_id, product.summary.offer_count, product.summary.favorite_count) == (
+        cheap.id,
+        1,
+        0,
+    )
+    listed = client.get("/api/products").json()["items"][0]["summary"]
+    assert (listed["min_offer_price"], listed["offer_count"], listed["favorite_count"]) == ("29.00", 1, 0)
@@ -1,9 +1,17 @@
+import asyncio
+import json
+from datetime import datetime, time, timedelta, timezone
 from decimal import Decimal
 
 from fastapi import status
 
+from app.core.config import settings
 from app.models.offer import Offer
+from app.models.price_observation import PriceObservation
 from app.models.product import Product
+from app.routes import product_routes
+from app.services import product_ingest_service, product_search_service
+from tests.conftest import wait_for_job
 
 
 def create_product_with_offer(db_session, name="Protein", price=Decimal("19.99")):
@@ -55,3 +63,304 @@ def test_get_product_offers_endpoint(client, db_session):
     offers = response.json()
     assert len(offers) == 1
     assert offers[0]["id"] == offer.id
+
+
+def test_search_products_uses_full_text_index(client, db_session):
+    create_product_with_offer(db_session, name="Gourde isotherme")
+    whey, _ = create_product_with_offer(db_session, name="Whey Protéine Vanille")
+
+    response = client.get("/api/products/search?q=proteine")
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"][0]["id"] == whey.id
+
+
+def test_full_text_queries_match_every_token_as_a_prefix():
+    assert product_search_service._fts5_match_expression("Protéine whe") == '"Protéine"* "whe"*'
+    assert product_search_service._tsquery_expression("Protéine whe") == "Protéine:* & whe:*"
+    assert product_search_service._tsquery_expression("!!") is None
+
+
+def test_search_products_sorts_by_relevance(client, db_session):
+    in_name, _ = create_product_with_offer(db_session, name="Créatine monohydrate")
+    in_description = Product(name="Pack récupération", description="Contient de la créatine", price=30)
+    db_session.add(in_description)
+    db_session.commit()
+
+    response = client.get("/api/products/search?q=creatine&sort=relevance")
+
+    assert response.status_code == status.HTTP_200_OK
+    ids = [item["id"] for item in response.json()["items"]]
+    assert ids == [in_name.id, in_description.id]
+
+
+def test_list_products_cursor_pagination_walks_all_pages(client, db_session):
+    created = [create_product_with_offer(db_session, name=f"Cursor {idx}")[0].id for idx in range(5)]
+
+    first = client.get("/api/products?page_size=2").json()
+    second = client.get(f"/api/products?page_size=2&cursor={first['next_cursor']}").json()
+    third = client.get(f"/api/products?page_size=2&cursor={second['next_cursor']}").json()
+
+    seen = [item["id"] for page in (first, second, third) for item in page["items"]]
+    assert seen == created[::-1]
+    assert third["next_cursor"] is None
+
+
+def test_list_products_switching_from_page_to_cursor_keeps_order(client, db_session):
+    created = [create_product_with_offer(db_session, name=f"Switch {idx}")[0] for idx in range(4)]
+    # The oldest row carries the latest timestamp: pages must not depend on it.
+    created[0].created_at = datetime(2030, 1, 1)
+    db_session.commit()
+    created_ids = [product.id for product in created]
+
+    first = client.get("/api/products?page=1&page_size=2").json()
+    second = client.get(f"/api/products?page_size=2&cursor={first['next_cursor']}").json()
+
+    seen = [item["id"] for page in (first, second) for item in page["items"]]
+    assert seen == created_ids[::-1]
+
+
+def test_list_products_rejects_invalid_cursor(client):
+    response = client.get("/api/products?cursor=not-a-cursor")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_list_products_capped_count(client, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "count_cap", 2)
+    for idx in range(3):
+        create_product_with_offer(db_session, name=f"Capped {idx}")
+
+    data = client.get("/api/products?count_mode=capped").json()
+
+    assert data["total"] == 2
+    assert data["total_mode"] == "capped"
+
+
+def test_list_products_cached_count(client, db_session, fake_redis):
+    create_product_with_offer(db_session, name="Cached")
+
+    first = client.get("/api/products?count_mode=cached").json()
+    create_product_with_offer(db_session, name="Cached again")
+    second = client.get("/api/products?count_mode=cached").json()
+
+    assert (first["total"], first["total_mode"]) == (1, "exact")
+    assert (second["total"], second["total_mode"]) == (1, "cached")
+
+
+def test_search_products_answers_typos_with_trigram_similarity(client, db_session):
+    whey, _ = create_product_with_offer(db_session, name="Whey Protéine Vanille")
+    create_product_with_offer(db_session, name="Tapis de yoga")
+
+    response = client.get("/api/products/search?q=whei proteine")
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [item["id"] for item in data["items"]] == [whey.id]
+
+
+def test_fuzzy_search_applies_filters_before_its_limit(client, db_session, monkeypatch):
+    monkeypatch.setattr(product_routes, "FUZZY_LIMIT", 1)
+    premium, _ = create_product_with_offer(db_session, name="Whey Protéine", price=Decimal("50"))
+    create_product_with_offer(db_session, name="Whey Protéine", price=Decimal("20"))
+    create_product_with_offer(db_session, name="Whey Protéine", price=Decimal("25"))
+
+    filtered = client.get("/api/products/search?q=whei proteine&price_min=40").json()
+    unfiltered = client.get("/api/products/search?q=whei proteine").json()
+
+    assert [item["id"] for item in filtered["items"]] == [premium.id]
+    assert (filtered["total"], filtered["total_mode"]) == (1, "exact")
+    assert (unfiltered["total"], unfiltered["total_mode"]) == (1, "capped")
+
+
+def test_product_facets_count_current_filter_set(client, db_session, fake_redis):
+    for name, brand, price in [("Whey", "MyProtein", 25), ("Créatine", "MyProtein", 15), ("Gants", "Decathlon", 8)]:
+        db_session.add(Product(name=name, brand=brand, category="nutrition", price=price, source="web"))
+    db_session.commit()
+
+    response = client.get("/api/products/facets?price_min=10")
+
+    assert response.status_code == status.HTTP_200_OK
+    facets = response.json()
+    assert facets["brand"] == [{"value": "MyProtein", "count": 2}]
+    assert {bucket["min"]: bucket["count"] for bucket in facets["price"]} == {
+        None: 0,
+        10: 1,
+        20: 1,
+        50: 0,
+        100: 0,
+    }
+
+
+def test_product_facets_are_cached_until_invalidated(client, db_session, fake_redis):
+    db_session.add(Product(name="Whey", brand="MyProtein", price=25))
+    db_session.commit()
+    client.get("/api/products/facets")
+
+    db_session.add(Product(name="Shaker", brand="Decathlon", price=5))
+    db_session.commit()
+    cached = client.get("/api/products/facets").json()
+    fake_redis.store["cache_version:facets:products"] = "1"
+    fresh = client.get("/api/products/facets").json()
+
+    assert len(cached["brand"]) == 1
+    assert len(fresh["brand"]) == 2
+
+
+def test_get_product_serves_cached_response_until_invalidated(client, db_session, fake_redis):
+    product, _ = create_product_with_offer(db_session, name="Original")
+    product_id = product.id
+    client.get(f"/api/products/{product_id}")
+
+    db_session.get(Product, product_id).name = "Renamed"
+    db_session.commit()
+    cached = client.get(f"/api/products/{product_id}")
+    fake_redis.store["cache_version:route:products"] = "1"
+    fresh = client.get(f"/api/products/{product_id}")
+
+    assert cached.headers["X-Cache"] == "HIT"
+    assert cached.json()["name"] == "Original"
+    assert fresh.json()["name"] == "Renamed"
+
+
+def test_hybrid_search_merges_live_results_by_url(client, db_session, monkeypatch):
+    product = Product(name="Whey Isolate", price=30, url="https://shop.example/whey")
+    db_session.add(product)
+    db_session.commit()
+    product_id = product.id
+
+    async def fake_search(query, **kwargs):
+        live = [
+            {"id": -1, "name": "Whey Isolate", "url": "https://www.shop.example/whey/", "created_at": "2026-01-01T00:00:00"},
+            {"id": -2, "name": "Whey Native", "url": "https://other.example/whey", "created_at": "2026-01-01T00:00:00"},
+            {"id": -3, "name": "Whey Isolate", "url": "https://shop.example/whey?utm_source=serp", "created_at": "2026-01-01T00:00:00"},
+        ]
+        return {"items": live, "total": 3, "page": 1, "page_size": 12}
+
+    monkeypatch.setattr(settings, "serpapi_key", "test-key")
+    monkeypatch.setattr(product_routes.serpapi_service, "search_supplements", fake_search)
+
+    response = client.get("/api/products/search?q=whey&hybrid=true")
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [item["id"] for item in data["items"]] == [product_id, -2]
+    assert (data["total"], data["total_mode"]) == (2, "estimated")
+
+
+def test_search_speculates_live_call_for_known_misses(client, db_session, fake_redis, monkeypatch):
+    calls = []
+
+    async def fake_search(query, **kwargs):
+        calls.append(query)
+        if len(calls) > 1:
+            await asyncio.sleep(30)
+        return {"items": [], "total": 0, "page": 1, "page_size": 12}
+
+    monkeypatch.setattr(settings, "serpapi_key", "test-key")
+    monkeypatch.setattr(product_routes.serpapi_service, "search_supplements", fake_search)
+
+    assert client.get("/api/products/search?q=zumba").json()["total"] == 0
+    assert any(key.startswith("search_miss:") for key in fake_redis.store)
+
+    db_session.add(Product(name="Zumba Shoes", price=50))
+    db_session.commit()
+    response = client.get("/api/products/search?q=zumba")
+
+    # The live call was started next to the database query, then dropped.
+    assert len(calls) == 2
+    assert [item["name"] for item in response.json()["items"]] == ["Zumba Shoes"]
+
+
+def test_scrape_bulk_upserts_and_reports_item_errors(client, db_session, fake_redis, monkeypatch):
+    existing = Product(name="Old name", price=10, url="https://shop.example/whey")
+    db_session.add(existing)
+    db_session.commit()
+    existing_id = existing.id
+
+    async def fake_scrape(url, source, redis=None, *, refresh=False):
+        if "broken" in url:
+            raise ValueError("page introuvable")
+        return {"name": None if "whey" in url else "Créatine", "price": 25.0, "brand": "Shop"}
+
+    monkeypatch.setattr(product_ingest_service, "scrape_product", fake_scrape)
+
+    response = client.post(
+        "/api/products/scrape-bulk?parallelism=2",
+        json=[
+            {"url": "https://shop.example/whey", "source": "shop"},
+            {"url": "https://shop.example/creatine", "source": "shop"},
+            {"url": "https://shop.example/broken", "source": "shop"},
+            {"url": "https://shop.example/no-source"},
+        ],
+    )
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = wait_for_job(client, response.json()["job_id"])
+    assert job["status"] == "succeeded"
+    assert job["progress"] == {"total": 4, "done": 4, "failed": 2}
+    assert sorted(error["item"] for error in job["errors"]) == [
+        "https://shop.example/broken",
+        "https://shop.example/no-source",
+    ]
+    assert job["result"]["succeeded"] == 2
+    assert existing_id in job["result"]["product_ids"]
+    whey = db_session.get(Product, existing_id)
+    assert (whey.name, whey.price) == ("Old name", 25.0)
+    assert db_session.query(Product).filter(Product.name == "Créatine").count() == 1
+
+
+def test_scrape_bulk_streams_ndjson_lines(client, db_session, monkeypatch):
+    async def fake_scrape(url, source, redis=None, *, refresh=False):
+        return {"name": url.rsplit("/", 1)[-1]}
+
+    monkeypatch.setattr(product_ingest_service, "scrape_product", fake_scrape)
+
+    response = client.post(
+        "/api/products/scrape-bulk?stream=true",
+        json=[{"url": "https://shop.example/whey", "source": "shop"}, {"url": "", "source": "shop"}],
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted((line["url"], bool(line["error"])) for line in lines) == [
+        ("", True),
+        ("https://shop.example/whey", False),
+    ]
+
+
+def test_ingest_records_price_changes_and_serves_downsampled_history(client, db_session, monkeypatch):
+    prices = iter([20.0, 20.0, 18.0])
+
+    async def fake_scrape(url, source, redis=None, *, refresh=False):
+        return {"name": "Whey", "price": next(prices)}
+
+    monkeypatch.setattr(product_ingest_service, "scrape_product", fake_scrape)
+    for _ in range(3):
+        product = asyncio.run(product_ingest_service.ingest_product("https://shop.example/whey", "shop", db_session))
+
+    assert [obs.price for obs in product.price_observations] == [20.0, 18.0]
+    # Monday and Wednesday of a week well inside the default 365-day window.
+    earlier = datetime.now(timezone.utc).date() - timedelta(weeks=4)
+    monday = earlier - timedelta(days=earlier.weekday())
+    monday_morning = datetime.combine(monday, time(8))
+    db_session.add_all(
+        [
+            PriceObservation(product_id=product.id, source="shop", price=25.0, observed_at=monday_morning),
+            PriceObservation(
+                product_id=product.id, source="shop", price=22.0, observed_at=monday_morning + timedelta(days=2)
+            ),
+        ]
+    )
+    db_session.commit()
+
+    daily = client.get(f"/api/products/{product.id}/price-history").json()
+    weekly = client.get(f"/api/products/{product.id}/price-history?bucket=week").json()
+
+    today = daily["points"][-1]
+    assert (today["min"], today["max"], today["last"], today["count"]) == (18.0, 20.0, 18.0, 2)
+    assert weekly["points"][0] == {"start": monday.isoformat(), "min": 22.0, "max": 25.0, "last": 22.0, "count": 2}
+    assert client.get("/api/products/999999/price-history").status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,47 @@
+import math
+
+from app.auth.utils import hash_password
+from app.models.program_co_save import ProgramCoSave
+from app.models.training import FavoriteProgram, WorkoutProgram
+from app.models.user import User
+from app.services.program_co_save_service import rebuild_co_saves
+
+
+def _pairs(db_session):
+    rows = db_session.query(ProgramCoSave.program_id, ProgramCoSave.other_id, ProgramCoSave.count, ProgramCoSave.score)
+    return sorted((a, b, count, round(score, 9)) for a, b, count, score in rows)
+
+
+def test_also_saved_follows_favorite_writes(client, db_session, auth_headers):
+    other = User(email="other@example.com", full_name="Other", hashed_password=hash_password("password"))
+    programs = [WorkoutProgram(title=title) for title in ("Force", "HIIT", "Mobilité")]
+    db_session.add_all([other, *programs])
+    db_session.flush()
+    force, hiit, mobility = (program.id for program in programs)
+    db_session.add_all(
+        [
+            FavoriteProgram(user_id=other.id, program_id=force),
+            FavoriteProgram(user_id=other.id, program_id=hiit),
+            FavoriteProgram(user_id=other.id, program_id=mobility),
+        ]
+    )
+    db_session.commit()
+    other_id = other.id
+
+    for program_id in (force, hiit):
+        assert client.post(f"/api/programs/{program_id}/favorite", headers=auth_headers).status_code == 200
+
+    also = client.get(f"/api/programs/{force}/also-saved").json()
+    assert [(program["id"], program["saved_together"]) for program in also] == [(hiit, 2), (mobility, 1)]
+    assert also[0]["score"] == 1.0
+    assert math.isclose(also[1]["score"], 1 / math.sqrt(2))
+
+    assert client.delete(f"/api/programs/{hiit}/favorite", headers=auth_headers).status_code == 204
+    incremental = _pairs(db_session)
+    assert [(b, count) for a, b, count, _score in incremental if a == force] == [(hiit, 1), (mobility, 1)]
+
+    db_session.query(FavoriteProgram).filter_by(user_id=other_id, program_id=mobility).delete()
+    rebuild_co_saves(db_session.connection())
+    db_session.add(FavoriteProgram(user_id=other_id, program_id=mobility))
+    db_session.flush()
+    assert _pairs(db_session) == incremental
@@ -0,0 +1,57 @@
+import json
+
+from sqlalchemy import insert
+
+from app.models.program_document import ProgramDocument
+from app.models.training import Coach, WorkoutExercise, WorkoutProgram, WorkoutSession, WorkoutWeek
+from app.services.program_document_service import build_program_document, get_program_document
+from tests.conftest import count_queries
+
+
+def test_program_document_is_served_and_rebuilt_on_writes(client, db_session):
+    coach = Coach(name="Alex")
+    program = WorkoutProgram(title="Force", coach=coach)
+    week = WorkoutWeek(program=program, week_number=1)
+    session = WorkoutSession(week=week, title="Jambes")
+    exercise = WorkoutExercise(session=session, name="Squat", sets=5)
+    db_session.add_all([coach, program, week, session, exercise])
+    db_session.commit()
+    program_id, coach_id, exercise_id = program.id, coach.id, exercise.id
+
+    response = client.get(f"/api/programs/{program_id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    detail = response.json()
+    assert (detail["coach"]["name"], detail["weeks"][0]["sessions"][0]["exercises"][0]["sets"]) == ("Alex", 5)
+    assert db_session.get(ProgramDocument, program_id) is not None
+
+    with count_queries(db_session) as statements:
+        assert get_program_document(db_session, program_id) == response.content
+    assert len(statements) == 1
+
+    db_session.get(WorkoutExercise, exercise_id).sets = 3
+    db_session.commit()
+    assert db_session.get(ProgramDocument, program_id) is None
+
+    detail = json.loads(get_program_document(db_session, program_id))
+    assert detail["weeks"][0]["sessions"][0]["exercises"][0]["sets"] == 3
+
+    db_session.get(Coach, coach_id).name = "Sam"
+    db_session.commit()
+    assert json.loads(get_program_document(db_session, program_id))["coach"]["name"] == "Sam"
+
+    assert client.get("/api/programs/999999").status_code == 404
+    assert client.get("/api/programs/coaches").status_code == 200
+
+
+def test_building_a_program_document_overwrites_a_stored_one(db_session):
+    program = WorkoutProgram(title="Cardio")
+    db_session.add(program)
+    db_session.commit()
+    program_id = program.id
+
+    # Stored by a concurrent first read between this session's miss and its build.
+    db_session.execute(insert(ProgramDocument).values(program_id=program_id, version=0, body=b"{}"))
+    assert build_program_document(db_session, program_id) is not None
+    db_session.commit()
+    assert json.loads(get_program_document(db_session, program_id))["title"] == "Cardio"
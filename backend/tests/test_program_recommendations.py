@@ -0,0 +1,87 @@
+from app.core.config import settings
+from app.models.program_neighbor import ProgramNeighbor
+from app.models.program_term import ProgramTerm
+from app.models.training import Coach, FavoriteProgram, WorkoutExercise, WorkoutProgram, WorkoutSession, WorkoutWeek
+from app.services.program_recommendation_service import refresh_program_neighbors
+from tests.conftest import count_queries
+
+
+def _program(db_session, title, goal, level, duration, coach, exercise):
+    program = WorkoutProgram(title=title, goal=goal, level=level, duration_weeks=duration, coach=coach)
+    week = WorkoutWeek(program=program, week_number=1)
+    session = WorkoutSession(week=week, title="Séance")
+    db_session.add_all([program, week, session, WorkoutExercise(session=session, name=exercise)])
+    return program
+
+
+def _neighbors(db_session, program_id):
+    rows = db_session.query(ProgramNeighbor).filter_by(program_id=program_id).order_by(ProgramNeighbor.score.desc())
+    return [row.neighbor_id for row in rows]
+
+
+def test_neighbors_follow_program_writes(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "program_neighbors", 2)
+    strength = Coach(name="Alex", specialty="Force")
+    cardio = Coach(name="Sam", specialty="Cardio")
+    squat = _program(db_session, "Force A", "force", "avancé", 12, strength, "Squat barre")
+    deadlift = _program(db_session, "Force B", "force", "avancé", 16, strength, "Squat avant")
+    hiit = _program(db_session, "HIIT", "hiit", "débutant", 4, cardio, "Burpees")
+    db_session.commit()
+
+    assert _neighbors(db_session, squat.id) == [deadlift.id]
+    assert _neighbors(db_session, hiit.id) == []
+
+    hiit.goal, hiit.level, hiit.duration_weeks = "force", "avancé", 12
+    db_session.commit()
+
+    assert _neighbors(db_session, hiit.id) == [squat.id, deadlift.id]
+    assert hiit.id in _neighbors(db_session, squat.id)
+
+    incremental = db_session.query(ProgramNeighbor.program_id, ProgramNeighbor.neighbor_id, ProgramNeighbor.score)
+    incremental = sorted((p, n, round(s, 9)) for p, n, s in incremental)
+    refresh_program_neighbors(db_session.connection())
+    rebuilt = db_session.query(ProgramNeighbor.program_id, ProgramNeighbor.neighbor_id, ProgramNeighbor.score)
+    assert sorted((p, n, round(s, 9)) for p, n, s in rebuilt) == incremental
+
+    db_session.delete(deadlift)
+    db_session.commit()
+    assert db_session.query(ProgramNeighbor).filter_by(neighbor_id=deadlift.id).count() == 0
+
+
+def test_exercise_write_rebuilds_only_its_program_vector(db_session):
+    strength = Coach(name="Alex", specialty="Force")
+    squat = _program(db_session, "Force A", "force", "avancé", 12, strength, "Squat barre")
+    hiit = _program(db_session, "HIIT", "hiit", "débutant", 4, None, "Burpees")
+    db_session.commit()
+    squat_id, hiit_id = squat.id, hiit.id
+    hiit_terms = db_session.query(ProgramTerm.feature, ProgramTerm.term, ProgramTerm.weight).filter_by(program_id=hiit_id).all()
+
+    exercise = squat.weeks[0].sessions[0].exercises[0]
+
+    with count_queries(db_session) as statements:
+        exercise.name = "Fentes marchées"
+        db_session.flush()
+
+    # The touched programs are looked up once for both flush listeners.
+    assert sum("FROM workout_sessions" in statement for statement in statements) == 1
+    assert sum(statement.startswith("DELETE FROM program_terms") for statement in statements) == 1
+    terms = {term for (term,) in db_session.query(ProgramTerm.term).filter_by(program_id=squat_id, feature="exercises")}
+    assert terms == {"fentes", "marchees"}
+    assert db_session.query(ProgramTerm.feature, ProgramTerm.term, ProgramTerm.weight).filter_by(program_id=hiit_id).all() == hiit_terms
+
+
+def test_recommended_ranks_programs_close_to_favorites(client, db_session, test_user):
+    strength = Coach(name="Alex", specialty="Force")
+    saved = _program(db_session, "Force A", "force", "avancé", 12, strength, "Squat barre")
+    close = _program(db_session, "Force B", "force", "avancé", 12, strength, "Squat avant")
+    far = _program(db_session, "Mobilité", "mobilite", "débutant", 4, None, "Étirements")
+    db_session.flush()
+    db_session.add(FavoriteProgram(user_id=test_user.id, program_id=saved.id))
+    db_session.commit()
+    user_id, saved_id, close_id, far_id = test_user.id, saved.id, close.id, far.id
+
+    personalized = client.get("/api/programs/recommended", params={"user_id": user_id}).json()
+    assert [program["id"] for program in personalized] == [close_id, far_id]
+
+    anonymous = client.get("/api/programs/recommended", params={"level": "avancé"}).json()
+    assert [program["id"] for program in anonymous] == [saved_id, close_id]
@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from app.models.favorite import Favorite
+from app.models.gym import Gym
+from app.models.offer import Offer
+from app.models.product import Product
+from app.models.program import Program
+from app.models.training import WorkoutExercise, WorkoutProgram, WorkoutSession, WorkoutWeek
+from tests.conftest import count_queries
+
+
+def _queries_for(client, db_session, path: str, *keep) -> int:
+    # The request shares the test session: start from an empty identity map so
+    # relationships are really loaded by the endpoint.
+    db_session.expunge_all()
+    for instance in keep:
+        db_session.add(instance)
+        db_session.refresh(instance)
+    with count_queries(db_session) as statements:
+        response = client.get(path)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def _add_week(db_session, program_id: int, number: int) -> None:
+    week = WorkoutWeek(program_id=program_id, week_number=number)
+    for idx in range(2):
+        session = WorkoutSession(title=f"Séance {idx}", duration_minutes=45)
+        session.exercises = [WorkoutExercise(name=f"Exercice {n}", reps="10", sets=3) for n in range(3)]
+        week.sessions.append(session)
+    db_session.add(week)
+    db_session.commit()
+
+
+def _add_product_with_offers(db_session, offers: int = 2) -> tuple[int, int]:
+    product = Product(name="Whey", price=30)
+    db_session.add(product)
+    db_session.flush()
+    db_session.add_all(
+        [Offer(title=f"Shop {idx}", price=Decimal("20.00") + idx, product_id=product.id) for idx in range(offers)]
+    )
+    db_session.commit()
+    return product.id, product.offers[0].id if offers else None
+
+
+def test_program_weeks_cost_constant_queries(client, db_session):
+    program = WorkoutProgram(title="Force")
+    db_session.add(program)
+    db_session.commit()
+    program_id = program.id
+    _add_week(db_session, program_id, 1)
+
+    small = _queries_for(client, db_session, f"/api/programs/{program_id}/weeks")
+    for number in range(2, 6):
+        _add_week(db_session, program_id, number)
+
+    assert _queries_for(client, db_session, f"/api/programs/{program_id}/weeks") == small
+    assert _queries_for(client, db_session, f"/api/programs/{program_id}/sessions") <= small
+
+
+def test_gym_detail_costs_constant_queries(client, db_session):
+    gym = Gym(name="Basic-Fit Lyon", url="https://basic-fit.example/lyon")
+    db_session.add(gym)
+    db_session.commit()
+    gym_id = gym.id
+    product_id, _ = _add_product_with_offers(db_session, offers=0)
+
+    def add_relations(count: int) -> None:
+        for idx in range(count):
+            db_session.add(Offer(title="Abonnement", price=Decimal("29.99"), product_id=product_id, gym_id=gym_id))
+            db_session.add(Program(name=f"Programme {idx}", gym_id=gym_id))
+        db_session.commit()
+
+    add_relations(1)
+    small = _queries_for(client, db_session, f"/api/gyms/{gym_id}")
+    add_relations(10)
+    large = _queries_for(client, db_session, f"/api/gyms/{gym_id}")
+
+    assert large == small
+
+
+def test_favorites_and_comparison_cost_constant_queries(authenticated_client, db_session, test_user):
+    user_id = test_user.id
+    product_ids = []
+
+    def add_favorites(count: int) -> None:
+        for _ in range(count):
+            product_id, offer_id = _add_product_with_offers(db_session)
+            product_ids.append(product_id)
+            db_session.add(Favorite(user_id=user_id, offer_id=offer_id))
+        db_session.commit()
+
+    add_favorites(1)
+    small_favorites = _queries_for(authenticated_client, db_session, "/api/favorites", test_user)
+    small_comparison = _queries_for(authenticated_client, db_session, f"/api/comparison?ids={product_ids[0]}")
+    add_favorites(5)
+
+    assert _queries_for(authenticated_client, db_session, "/api/favorites", test_user) == small_favorites
+    ids = ",".join(str(product_id) for product_id in product_ids)
+    assert _queries_for(authenticated_client, db_session, f"/api/comparison?ids={ids}") == small_comparison
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services import serpapi_service
+from app.services.cache_service import set_cache
+from tests.conftest import FakeRedis
+
+
+def test_search_product_serves_stale_payload_and_refreshes_once(monkeypatch):
+    calls = []
+
+    async def fake_request(params):
+        calls.append(params)
+        return {"shopping_results": [{"title": f"Rope v{len(calls)}"}]}
+
+    monkeypatch.setattr(serpapi_service, "_perform_request", fake_request)
+    redis = FakeRedis()
+
+    async def scenario():
+        first = await serpapi_service.search_product("Rope", redis=redis)
+        fresh = await serpapi_service.search_product("  rope ", redis=redis)
+
+        key = serpapi_service._cache_key({"engine": "google_shopping", "q": "rope", "hl": "fr", "gl": "fr"})
+        stale_at = time.time() - serpapi_service.settings.serpapi_cache_soft_seconds - 1
+        await set_cache(redis, key, {"fetched_at": stale_at, "payload": {"shopping_results": [{"title": "Old"}]}})
+        stale = await serpapi_service.search_product("rope", redis=redis)
+        await asyncio.gather(*serpapi_service._refresh_tasks)
+        refreshed = await serpapi_service.search_product("rope", redis=redis)
+        return first, fresh, stale, refreshed
+
+    first, fresh, stale, refreshed = asyncio.run(scenario())
+
+    assert first["offers"][0]["title"] == fresh["offers"][0]["title"] == "Rope v1"
+    assert stale["offers"][0]["title"] == "Old"
+    assert refreshed["offers"][0]["title"] == "Rope v2"
+    assert len(calls) == 2
+
+
+def test_upstream_error_status_keeps_serving_stale_payload(monkeypatch):
+    async def rate_limited(url, **kwargs):
+        return httpx.Response(429, request=httpx.Request("GET", url))
+
+    monkeypatch.setattr(serpapi_service, "fetch", rate_limited)
+    monkeypatch.setattr(serpapi_service.settings, "serpapi_key", "key")
+    redis = FakeRedis()
+
+    async def scenario():
+        with pytest.raises(serpapi_service.SerpApiError):
+            await serpapi_service._perform_request({"q": "rope"})
+
+        params = {"engine": "google_shopping", "q": "rope"}
+        stale_at = time.time() - serpapi_service.settings.serpapi_cache_soft_seconds - 1
+        await set_cache(redis, serpapi_service._cache_key(params), {"fetched_at": stale_at, "payload": {"stale": True}})
+        stale = await serpapi_service._cached_request(params, redis=redis)
+        return stale, await asyncio.gather(*serpapi_service._refresh_tasks, return_exceptions=True)
+
+    stale, refreshes = asyncio.run(scenario())
+
+    assert stale == {"stale": True}
+    assert refreshes == [None]
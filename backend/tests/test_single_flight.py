@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+
+from app.services import http_client, product_scraper_service
+from app.services.cache_service import set_cache
+from app.services.single_flight import LOCK_PREFIX, single_flight
+from tests.conftest import FakeRedis
+
+
+def test_concurrent_scrapes_share_one_upstream_call(monkeypatch):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/robots.txt":
+            return httpx.Response(404)
+        calls.append(request.url)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, text='<meta property="og:title" content="Whey">')
+
+    redis = FakeRedis()
+
+    async def scenario():
+        monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        try:
+            return await asyncio.gather(
+                *(product_scraper_service.scrape_product("https://shop.example/whey", "shop", redis) for _ in range(5))
+            )
+        finally:
+            await http_client.close_http_client()
+
+    results = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert all(result["name"] == "Whey" for result in results)
+    assert "product:shop:https://shop.example/whey" in redis.store
+    assert not any(key.startswith(LOCK_PREFIX) for key in redis.store)
+
+
+def test_single_flight_waits_for_leader_in_another_worker():
+    redis = FakeRedis()
+    redis.store[f"{LOCK_PREFIX}gym_details:basicfit:x"] = "other-worker"
+
+    async def should_not_run():
+        raise AssertionError("the other worker is already computing this key")
+
+    async def other_worker_finishes():
+        await asyncio.sleep(0.15)
+        await set_cache(redis, "gym_details:basicfit:x", {"name": "Basic-Fit"})
+
+    async def scenario():
+        result, _ = await asyncio.gather(
+            single_flight("gym_details:basicfit:x", should_not_run, redis=redis),
+            other_worker_finishes(),
+        )
+        return result
+
+    assert asyncio.run(scenario()) == {"name": "Basic-Fit"}